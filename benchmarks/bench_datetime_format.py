@@ -0,0 +1,43 @@
+"""
+Compare the datetime formatting used by `marshal` against calling
+strftime/isoformat directly on each value.
+
+Usage: python -m benchmarks.bench_datetime_format [count]
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List
+
+from jsonmarshal.datetimes import _DatetimeFormatter
+
+FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def timed(name: str, func: Callable[[datetime], str], values: List[datetime]) -> None:
+    start = time.perf_counter()
+    for value in values:
+        func(value)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<40} {elapsed:8.3f}s  {len(values) / elapsed / 1e6:6.2f}M/s")
+
+
+def main(count: int) -> None:
+    base = datetime(2020, 6, 1, tzinfo=timezone.utc)
+    unique = [base + timedelta(seconds=i) for i in range(count)]
+    # Values repeated heavily, as with the start/end dates of records.
+    repeated = [base + timedelta(days=i % 365) for i in range(count)]
+
+    print(f"Formatting {count} datetimes")
+    for label, values in (("unique", unique), ("repeated", repeated)):
+        timed(f"isoformat ({label})", datetime.isoformat, values)
+        timed(f"isoformat + cache ({label})", _DatetimeFormatter(cache_size=4096).format_datetime, values)
+        timed(f"strftime ({label})", lambda value: value.strftime(FORMAT), values)
+        timed(f"compiled format ({label})", _DatetimeFormatter(datetime_fmt=FORMAT).format_datetime, values)
+        formatter = _DatetimeFormatter(datetime_fmt=FORMAT, cache_size=4096)
+        timed(f"compiled format + cache ({label})", formatter.format_datetime, values)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,79 @@
+"""
+Compare the throughput of `write_ndjson`/`read_ndjson` on compressed NDJSON
+files against writing/reading them line by line with the compression module
+and `marshal`/`unmarshal`, in a single thread.
+
+The rows are the tasks of the collected_data test fixture, repeated up to
+the requested count. The throughput is given in uncompressed MB/s.
+
+Usage: python -m benchmarks.bench_ndjson [count] [gzip|bz2|lzma]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from itertools import cycle, islice
+from typing import Any, Callable, Iterable, Iterator, List
+
+from benchmarks.bench_records import load_tasks
+from jsonmarshal import marshal, read_ndjson, unmarshal, write_ndjson
+from jsonmarshal.ndjson import _COMPRESSIONS
+from tests.fixtures.collected_data import datetime_fmt
+from tests.fixtures.collected_data.schema import Task
+
+
+def timed(name: str, func: Callable[[], Any], size: int) -> None:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<20} {elapsed:8.2f}s  {size / elapsed / 1e6:8.1f}MB/s")
+
+
+def write_lines(path: str, compression: str, tasks: Iterable[Task]) -> None:
+    with _COMPRESSIONS[compression](path, "wt") as buf:
+        for task in tasks:
+            buf.write(json.dumps(marshal(task, datetime_fmt=datetime_fmt)) + "\n")
+
+
+def read_lines(path: str, compression: str) -> None:
+    with _COMPRESSIONS[compression](path, "rb") as buf:
+        for line in buf:
+            unmarshal(json.loads(line), Task, datetime_fmt=datetime_fmt)
+
+
+def read_all(path: str, compression: str) -> None:
+    for _ in read_ndjson(path, Task, compression=compression, datetime_fmt=datetime_fmt):
+        pass
+
+
+def main(count: int, compression: str) -> None:
+    # The tasks are repeated rather than held in memory, so that large files (e.g. 1GB) can be measured.
+    fixture = unmarshal(load_tasks(), List[Task], datetime_fmt=datetime_fmt)
+
+    def tasks() -> Iterator[Task]:
+        return islice(cycle(fixture), count)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tasks.ndjson")
+        write_ndjson(path, tasks(), compression=None, datetime_fmt=datetime_fmt)
+        size = os.path.getsize(path)
+
+        print(f"{count} {Task.__name__} rows, {size / 1e6:.1f}MB uncompressed, {compression}")
+        timed("write lines", lambda: write_lines(path, compression, tasks()), size)
+        timed(
+            "write_ndjson",
+            lambda: write_ndjson(path, tasks(), compression=compression, datetime_fmt=datetime_fmt),
+            size,
+        )
+        print(f"{os.path.getsize(path) / 1e6:.1f}MB compressed")
+        timed("read lines", lambda: read_lines(path, compression), size)
+        timed("read_ndjson", lambda: read_all(path, compression), size)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+        sys.argv[2] if len(sys.argv) > 2 else "gzip",
+    )
@@ -0,0 +1,48 @@
+"""
+Compare the memory used by the dataclasses returned by `unmarshal` against
+the compact records returned with output="record".
+
+The rows are the tasks of the collected_data test fixture, repeated up to
+the requested count.
+
+Usage: python -m benchmarks.bench_records [count]
+"""
+
+import json
+import sys
+import tracemalloc
+from itertools import cycle, islice
+from typing import Any, Dict, List, Optional
+
+from jsonmarshal import unmarshal
+from tests.fixtures.collected_data import datetime_fmt, marshalled
+from tests.fixtures.collected_data.schema import Task
+
+
+def load_tasks() -> List[Dict[str, Any]]:
+    with open(marshalled) as buf:
+        data = json.load(buf)
+    officers = [officer for officers in data["officers"].values() for officer in officers]
+    officers.extend(data["ownership_structure"]["beneficial_owners"])
+    return [task for officer in officers for task in officer["linked_profile"]["tasks"]]
+
+
+def measure(text: str, output: Optional[str]) -> None:
+    # unmarshal modifies the rows, each measurement decodes its own copy.
+    rows = json.loads(text)
+    tracemalloc.start()
+    result = unmarshal(rows, List[Task], datetime_fmt=datetime_fmt, output=output)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{output or 'dataclass':<10} {size / 2**20:10.1f}MiB  {size / len(result):6.0f}B/row")
+
+
+def main(count: int) -> None:
+    text = json.dumps(list(islice(cycle(load_tasks()), count)))
+    print(f"Memory of {count} unmarshalled {Task.__name__} rows")
+    measure(text, None)
+    measure(text, "record")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -1,5 +1,28 @@
+from jsonmarshal.columns import marshal_columns, unmarshal_columns
 from jsonmarshal.fields import json_field
+from jsonmarshal.interning import InternTable
+from jsonmarshal.lazy import LazyList
 from jsonmarshal.marshal import marshal
+from jsonmarshal.ndjson import NdjsonReader, read_ndjson, write_ndjson
+from jsonmarshal.parallel import marshal_parallel
+from jsonmarshal.raw import RawJSON
+from jsonmarshal.stream import Decoder, marshal_to_stream, unmarshal_stream
 from jsonmarshal.unmarshal import unmarshal
 
-__all__ = ["json_field", "unmarshal", "marshal"]
+__all__ = [
+    "json_field",
+    "unmarshal",
+    "marshal",
+    "InternTable",
+    "LazyList",
+    "RawJSON",
+    "unmarshal_columns",
+    "marshal_columns",
+    "NdjsonReader",
+    "read_ndjson",
+    "write_ndjson",
+    "marshal_parallel",
+    "unmarshal_stream",
+    "Decoder",
+    "marshal_to_stream",
+]
@@ -0,0 +1,35 @@
+"""Conversion of json lists to and from typed numeric arrays (array.array and numpy)."""
+
+import array
+from typing import Any, List, Optional
+
+from jsonmarshal.utils.optional import numpy as np
+
+# numpy dtype kinds stored as json numbers/booleans: bool, signed, unsigned and float.
+_NUMERIC_KINDS = "biuf"
+
+
+def _validate_typecode(typecode: Optional[str]) -> None:
+    if typecode is not None and typecode not in array.typecodes:
+        raise ValueError(f"Invalid typecode {typecode!r}, expected one of {list(array.typecodes)}")
+
+
+def _validate_dtype(dtype: Any) -> None:
+    if dtype is None or np is None:
+        return
+    try:
+        np.dtype(dtype)
+    except TypeError as e:
+        raise ValueError(f"Invalid dtype {dtype!r}: {e}") from None
+
+
+def _to_numeric_ndarray(values: List[Any], dtype: Any) -> Any:
+    """Convert a (nested) json list of numbers into a numpy array in a single call.
+
+    Unlike numpy, values are not truncated when converted to a different kind,
+    e.g. floats into an integer dtype.
+    """
+    converted = np.array(values, dtype=dtype)
+    if values and not np.can_cast(np.asarray(values).dtype, converted.dtype, casting="same_kind"):
+        raise TypeError(f"Cannot convert {values} to {dtype} without loss")
+    return converted
@@ -0,0 +1,253 @@
+"""Columnar (struct of arrays) unmarshalling and marshalling of lists of dataclasses."""
+
+import array
+import dataclasses
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from jsonmarshal.exceptions import MarshalError, UnmarshalError
+from jsonmarshal.fields import _get_json_key, _omit_field
+from jsonmarshal.interning import InternTable
+from jsonmarshal.marshal import _Marshaller
+from jsonmarshal.types import _PRIMITIVE_TYPES, NoneType, _get_optional_type, _is_optional
+from jsonmarshal.unmarshal import _Unmarshaller
+from jsonmarshal.utils.optional import numpy as np
+
+_NUMERIC = ["array", "numpy"]
+
+# Typecodes of the array.array/numpy columns of numeric fields.
+_TYPECODES = {int: "q", float: "d"}
+
+_JSON_PRIMITIVE_TYPES = {str, int, float, bool, NoneType}
+
+
+def unmarshal_columns(
+    data: List[Any],
+    schema: Any,
+    numeric: Optional[str] = None,
+    datetime_fmt: Optional[str] = None,
+    date_fmt: Optional[str] = None,
+    datetime_cache_size: int = 0,
+    epoch: Optional[str] = None,
+    uuid_format: Optional[str] = None,
+    intern: Optional[InternTable] = None,
+) -> Dict[str, Any]:
+    """Unmarshal a list of json objects into a column of values per field of the dataclass schema.
+
+    Instead of a list of dataclasses, a dict of lists is returned: one list per
+    field, holding the value of the field for each object. The fields of nested
+    dataclasses are flattened into columns named by the dotted field names, e.g.
+    "variant.id". When a nested dataclass is null, its columns are null too.
+
+    The "numeric" option stores the columns of int and float fields as
+    `array.array` ("array") or numpy arrays ("numpy") instead of lists. Columns
+    with null values, or ints too large for 64 bits, are kept as lists.
+
+    The remaining options are the same as for `unmarshal`.
+    """
+    _validate_numeric(numeric)
+    if type(data) is not list:
+        raise UnmarshalError(
+            f"Invalid schema. schema = {List[schema]}, data = '{data}' ({type(data)}) at location = "
+        )
+
+    unmarshaller = _Unmarshaller(
+        None, schema, datetime_fmt, date_fmt, datetime_cache_size, epoch, uuid_format, intern
+    )
+    columns = {}
+    for column in _columns(schema):
+        values = _extract(data, schema, column)
+        if _is_primitive_column(values, column.schema):
+            if intern is not None and column.schema in (str, Optional[str]):
+                values = [v if v is None else intern.intern_field(v, column.field.name) for v in values]
+            columns[column.name] = _to_numeric(values, column.schema, numeric)
+        else:
+            columns[column.name] = unmarshaller.unmarshal_column(
+                values, column.schema, column.field, column.name
+            )
+
+    return columns
+
+
+def marshal_columns(
+    columns: Dict[str, Sequence[Any]],
+    schema: Any,
+    datetime_fmt: Optional[str] = None,
+    date_fmt: Optional[str] = None,
+    datetime_cache_size: int = 0,
+    epoch: Optional[str] = None,
+    uuid_format: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Marshal columns of values of the fields of the dataclass schema into a list of json objects.
+
+    This is the reverse of `unmarshal_columns`: `columns` holds a sequence (list,
+    `array.array`, numpy array...) of values per field, named by the dotted field
+    names. A nested dataclass is marshalled as null when all of its columns are
+    null and the field is optional.
+
+    The remaining options are the same as for `marshal`.
+    """
+    plan = _columns(schema)
+    missing = [column.name for column in plan if column.name not in columns]
+    if missing:
+        raise MarshalError(f"Missing columns {missing} for schema {schema}.")
+
+    lengths = {len(columns[column.name]) for column in plan}
+    if len(lengths) > 1:
+        raise MarshalError(f"Columns must all have the same length, got lengths {sorted(lengths)}.")
+
+    marshaller = _Marshaller(None, datetime_fmt, date_fmt, datetime_cache_size, epoch, uuid_format)
+    encoded = [_encode(columns[column.name], column, marshaller) for column in plan]
+    return _objects(schema, iter(encoded), lengths.pop() if lengths else 0)
+
+
+@dataclasses.dataclass
+class _Column:
+    name: str
+    # The fields leading from the root schema to the value of the column.
+    fields: Tuple[dataclasses.Field, ...]
+
+    @property
+    def field(self) -> dataclasses.Field:
+        return self.fields[-1]
+
+    @property
+    def schema(self) -> Any:
+        # The values are null when any of the nested dataclasses is.
+        if any(_is_optional(field.type) for field in self.fields[:-1]):
+            return Optional[self.field.type]
+        return self.field.type
+
+
+@lru_cache(maxsize=None)
+def _columns(schema: Any) -> Tuple[_Column, ...]:
+    """Flatten the fields of the dataclass `schema` into columns, expanding nested dataclasses."""
+    columns = []
+    for field in dataclasses.fields(schema):
+        nested = _nested_schema(field.type)
+        if nested is None:
+            columns.append(_Column(field.name, (field,)))
+            continue
+
+        for column in _columns(nested):
+            columns.append(_Column(f"{field.name}.{column.name}", (field, *column.fields)))
+
+    return tuple(columns)
+
+
+def _nested_schema(t: Any) -> Any:
+    """Get the dataclass of a field that is (optionally) typed as a dataclass."""
+    if _is_optional(t):
+        t = _get_optional_type(t)
+    return t if dataclasses.is_dataclass(t) else None
+
+
+def _extract(data: List[Any], schema: Any, column: _Column) -> List[Any]:
+    """Get the json value of the column from each object."""
+    if len(column.fields) == 1:
+        key = _get_json_key(column.field)
+        try:
+            return [obj[key] for obj in data]
+        except (KeyError, TypeError):
+            # Missing (optional) keys or invalid objects
+            pass
+
+    return [_extract_value(obj, schema, column, f".{index}") for index, obj in enumerate(data)]
+
+
+def _extract_value(obj: Any, schema: Any, column: _Column, path: str) -> Any:
+    for field in column.fields:
+        if type(obj) is not dict:
+            raise UnmarshalError(
+                f"Invalid schema. schema = {schema}, data = '{obj}' ({type(obj)}) at location = {path}"
+            )
+
+        key = _get_json_key(field)
+        if key not in obj:
+            if _is_optional(field.type):
+                return None
+            raise UnmarshalError(
+                f"Expected json key is not present in object at position '{path}'. "
+                f"'{key}' not in {list(obj.keys())}"
+            )
+
+        obj = obj[key]
+        if obj is None and field is not column.field and _is_optional(field.type):
+            # The nested object is null, and so are its fields.
+            return None
+
+        path = f"{path}.{key}"
+        schema = field.type
+
+    return obj
+
+
+def _is_primitive_column(values: List[Any], schema: Any) -> bool:
+    """Can the values be used as they are, without being unmarshalled one by one?"""
+    if schema in _PRIMITIVE_TYPES:
+        return all(type(v) is schema for v in values)
+
+    if _is_optional(schema) and _get_optional_type(schema) in _PRIMITIVE_TYPES:
+        schema = _get_optional_type(schema)
+        return all(v is None or type(v) is schema for v in values)
+
+    return False
+
+
+def _to_numeric(values: List[Any], schema: Any, numeric: Optional[str]) -> Any:
+    if numeric is None or schema not in _TYPECODES:
+        return values
+
+    try:
+        if numeric == "numpy":
+            return np.array(values, dtype=_TYPECODES[schema])
+        return array.array(_TYPECODES[schema], values)
+    except OverflowError:
+        return values
+
+
+def _encode(values: Sequence[Any], column: _Column, marshaller: _Marshaller) -> List[Any]:
+    """Marshal the values of a column."""
+    if isinstance(values, array.array) or (np is not None and isinstance(values, np.ndarray)):
+        values = values.tolist()
+    else:
+        values = list(values)
+
+    if all(type(v) in _JSON_PRIMITIVE_TYPES for v in values):
+        return values
+
+    return marshaller.marshal_column(values, column.field, column.name)
+
+
+def _objects(schema: Any, encoded: Iterator[List[Any]], count: int) -> List[Dict[str, Any]]:
+    """Build the json objects of `schema` from its marshalled columns, in the order of `_columns`."""
+    fields = []
+    for field in dataclasses.fields(schema):
+        nested = _nested_schema(field.type)
+        if nested is None:
+            fields.append((field, _get_json_key(field), next(encoded), False))
+        else:
+            fields.append(
+                (field, _get_json_key(field), _objects(nested, encoded, count), _is_optional(field.type))
+            )
+
+    objects = []
+    for index in range(count):
+        obj = {}
+        for field, key, values, nullable in fields:
+            value = values[index]
+            if nullable and all(v is None for v in value.values()):
+                value = None
+            if not _omit_field(field, value):
+                obj[key] = value
+        objects.append(obj)
+
+    return objects
+
+
+def _validate_numeric(numeric: Optional[str]) -> None:
+    if numeric is not None and numeric not in _NUMERIC:
+        raise ValueError(f"Invalid numeric option {numeric!r}, expected one of {_NUMERIC}")
+
+    if numeric == "numpy" and np is None:  # pragma: no cover
+        raise ImportError("numpy is required for the numeric option 'numpy'")
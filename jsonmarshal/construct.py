@@ -0,0 +1,165 @@
+"""Creation of dataclass instances from decoded field values."""
+
+import dataclasses
+from operator import itemgetter
+from types import MemberDescriptorType
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+Constructor = Callable[[Dict[str, Any]], Any]
+
+_OUTPUTS = ["dataclass", "record"]
+
+# Constructors and record types are built once per dataclass.
+_CONSTRUCTORS: Dict[type, Constructor] = {}
+_RECORD_CONSTRUCTORS: Dict[type, Constructor] = {}
+_RECORD_TYPES: Dict[type, type] = {}
+# The dataclass fields of each record type.
+_RECORD_FIELDS: Dict[type, Tuple[dataclasses.Field, ...]] = {}
+
+
+def _validate_output(output: Optional[str]) -> None:
+    if output is not None and output not in _OUTPUTS:
+        raise ValueError(f"Invalid output {output!r}, expected one of {_OUTPUTS}")
+
+
+def _constructor(schema: type) -> Constructor:
+    """Get the function creating instances of the dataclass `schema` from a dict of field values."""
+    try:
+        return _CONSTRUCTORS[schema]
+    except KeyError:
+        constructor = _CONSTRUCTORS[schema] = _build_constructor(schema)
+        return constructor
+
+
+def _build_constructor(schema: Any) -> Constructor:
+    if not schema.__dataclass_params__.frozen or not _is_known_safe(schema):
+        # The generated __init__ of mutable dataclasses is already as fast as
+        # setting the attributes directly.
+        return lambda data: schema(**data)
+
+    # Frozen dataclasses set each field with object.__setattr__ in __init__, the
+    # same is done here without the cost of the keyword argument handling. Like
+    # dataclasses, the function is generated to avoid looping over the fields.
+    namespace: Dict[str, Any] = {"new": object.__new__, "schema": schema}
+    lines = []
+    for index, field in enumerate(dataclasses.fields(schema)):
+        setter = f"set_{index}"
+        descriptor = getattr(schema, field.name, None)
+        if type(descriptor) is MemberDescriptorType:
+            # Slotted field, set it straight into the slot.
+            namespace[setter] = descriptor.__set__
+            lines.append(f"    {setter}(obj, data[{field.name!r}])")
+        else:
+            namespace[setter] = object.__setattr__
+            lines.append(f"    {setter}(obj, {field.name!r}, data[{field.name!r}])")
+
+    source = "\n".join(["def construct(data):", "    obj = new(schema)", *lines, "    return obj"])
+    exec(source, namespace)
+    return namespace["construct"]
+
+
+def _is_known_safe(schema: Any) -> bool:
+    """Can instances of `schema` be created without calling `__init__`?
+
+    This is only the case when the dataclass generated `__init__` would do
+    nothing but set each field: there is no `__post_init__`, no InitVar or
+    init=False fields and neither `__init__`, `__new__` or `__setattr__`
+    have been customised.
+    """
+    params = schema.__dataclass_params__
+    init = schema.__dict__.get("__init__")
+    # The dataclass generated __init__ is compiled from a string.
+    if not params.init or getattr(getattr(init, "__code__", None), "co_filename", None) != "<string>":
+        return False
+
+    if hasattr(schema, "__post_init__") or schema.__new__ is not object.__new__:
+        return False
+
+    if not params.frozen and schema.__setattr__ is not object.__setattr__:
+        return False
+
+    fields = dataclasses.fields(schema)
+    return len(fields) == len(schema.__dataclass_fields__) and all(field.init for field in fields)
+
+
+def _record_type(schema: Any) -> type:
+    """Get the compact record type used in place of the dataclass `schema`.
+
+    Records are tuples with the same name and attribute names as the
+    dataclass. They have no `__dict__` and are immutable. Unlike named tuples,
+    any field name is supported (e.g. `_id`). The dataclass fields of each
+    record type are kept in `_RECORD_FIELDS`, so that records can be marshalled
+    like the dataclass they replace. Records are pickled as their dataclass
+    and values, see `_make_record`.
+    """
+    try:
+        return _RECORD_TYPES[schema]
+    except KeyError:
+        pass
+
+    fields = dataclasses.fields(schema)
+    names = tuple(field.name for field in fields)
+    name = schema.__name__
+
+    def __repr__(self: Any) -> str:
+        values = ", ".join(f"{key}={value!r}" for key, value in zip(names, self))
+        return f"{name}({values})"
+
+    def __reduce__(self: Any) -> Tuple[Any, ...]:
+        # The record type is not importable, its name being the one of the dataclass.
+        return _make_record, (schema, tuple(self))
+
+    def _asdict(self: Any) -> Dict[str, Any]:
+        return dict(zip(names, self))
+
+    # The class argument of __new__ must not clash with the field names.
+    cls = "_cls"
+    while cls in names:
+        cls += "_"
+    namespace: Dict[str, Any] = {"new": tuple.__new__}
+    arguments = ", ".join([cls, *names])
+    values = "".join(f"{field_name}, " for field_name in names)
+    exec(f"def __new__({arguments}):\n    return new({cls}, ({values}))", namespace)
+
+    attributes: Dict[str, Any] = {
+        "__slots__": (),
+        "__module__": schema.__module__,
+        "__qualname__": schema.__qualname__,
+        "__new__": namespace["__new__"],
+        "__repr__": __repr__,
+        "__reduce__": __reduce__,
+        "_asdict": _asdict,
+        "_fields": names,
+    }
+    for index, field_name in enumerate(names):
+        attributes[field_name] = property(itemgetter(index), doc=f"Alias for field number {index}")
+
+    record = type(name, (tuple,), attributes)
+    _RECORD_TYPES[schema] = record
+    _RECORD_FIELDS[record] = fields
+    return record
+
+
+def _make_record(schema: Any, values: Tuple[Any, ...]) -> Any:
+    """Create a record of the dataclass `schema`, e.g. when unpickling."""
+    return tuple.__new__(_record_type(schema), values)
+
+
+def _dataclass_fields(value: Any) -> Iterable[dataclasses.Field]:
+    """Get the fields of a dataclass instance, or of the dataclass of a record."""
+    fields = _RECORD_FIELDS.get(type(value))
+    return fields if fields is not None else value.__dataclass_fields__.values()
+
+
+def _record_constructor(schema: Any) -> Constructor:
+    """Get the function creating records of the dataclass `schema` from a dict of field values."""
+    try:
+        return _RECORD_CONSTRUCTORS[schema]
+    except KeyError:
+        pass
+
+    namespace: Dict[str, Any] = {"new": tuple.__new__, "record": _record_type(schema)}
+    values = "".join(f"data[{field.name!r}], " for field in dataclasses.fields(schema))
+    exec(f"def construct(data):\n    return new(record, ({values}))", namespace)
+    constructor = _RECORD_CONSTRUCTORS[schema] = namespace["construct"]
+    return constructor
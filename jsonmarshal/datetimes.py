@@ -0,0 +1,359 @@
+"""Conversion of strings to and from dates and datetimes."""
+
+import re
+import warnings
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Dict, Hashable, List, Optional, Pattern, Tuple, TypeVar, Union, cast
+
+from jsonmarshal.utils.optional import numpy as np
+
+_UTC = timezone.utc
+
+# tzinfo instances shared between all parsed values, keyed by utc offset.
+_TZINFOS: Dict[timedelta, tzinfo] = {timedelta(0): _UTC}
+
+# Microseconds in each of the supported epoch timestamp units.
+_EPOCH_UNITS = {"s": 1_000_000, "ms": 1_000}
+_EPOCH = datetime(1970, 1, 1, tzinfo=_UTC)
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+
+# Matches the parts of an ISO-8601 string that older versions of
+# `datetime.fromisoformat` are unable to handle.
+_ISO_FRACTION = re.compile(r"(?<=\d\d:\d\d:\d\d)\.(\d+)")
+_ISO_COMPACT_OFFSET = re.compile(r"([+-]\d\d)(\d\d)$")
+_ISO_UTC = re.compile(r"Z$")
+
+# Regular expressions for each supported strptime directive. These mirror the
+# expressions used by the standard library `_strptime` module so that the
+# compiled parsers accept exactly the same input as `datetime.strptime`.
+_DIRECTIVES = {
+    "Y": r"(\d\d\d\d)",
+    "y": r"(\d\d)",
+    "m": r"(1[0-2]|0[1-9]|[1-9])",
+    "d": r"(3[0-1]|[1-2]\d|0[1-9]|[1-9]| [1-9])",
+    "H": r"(2[0-3]|[0-1]\d|\d)",
+    "M": r"([0-5]\d|\d)",
+    "S": r"(6[0-1]|[0-5]\d|\d)",
+    "f": r"([0-9]{1,6})",
+    "z": r"([+-]\d\d:?[0-5]\d(?::?[0-5]\d(?:\.\d{1,6})?)?|(?-i:Z))",
+}
+
+# Position of each directive in the datetime constructor arguments.
+_POSITIONS = {"Y": 0, "y": 0, "m": 1, "d": 2, "H": 3, "M": 4, "S": 5, "f": 6, "z": 7}
+
+# The attribute and printf style format used for each strftime directive.
+# Years before 1000 are zero padded by strftime on some platforms only (not with glibc).
+_YEAR_SPEC = "%04d" if date(1, 1, 1).strftime("%Y") == "0001" else "%d"
+_DATE_ATTRIBUTES = {"Y": ("year", _YEAR_SPEC), "m": ("month", "%02d"), "d": ("day", "%02d")}
+_DATETIME_ATTRIBUTES = {
+    **_DATE_ATTRIBUTES,
+    "H": ("hour", "%02d"),
+    "M": ("minute", "%02d"),
+    "S": ("second", "%02d"),
+    "f": ("microsecond", "%06d"),
+}
+
+T = TypeVar("T")
+
+
+def _parse_iso_datetime(value: str) -> datetime:
+    """Parse an ISO-8601 formatted string into a datetime."""
+    try:
+        v = datetime.fromisoformat(value)
+    except ValueError:
+        v = datetime.fromisoformat(_normalize_iso(value))
+
+    tz = v.tzinfo
+    if tz is None or tz is _UTC:
+        return v
+    # fromisoformat only ever creates fixed offset timezones.
+    shared = _shared_tzinfo(cast(timezone, tz))
+    # combine is cheaper than replace to swap the tzinfo.
+    return v if shared is tz else datetime.combine(v, v.time(), shared)
+
+
+def _normalize_iso(value: str) -> str:
+    """Rewrite an ISO-8601 string into the subset accepted by `datetime.fromisoformat`.
+
+    Older versions of python only accept fractional seconds with 3 or 6 digits
+    and offsets separated with a colon, not "Z".
+    """
+    normalized = _ISO_UTC.sub("+00:00", value, count=1)
+    normalized = _ISO_FRACTION.sub(lambda m: "." + m.group(1)[:6].ljust(6, "0"), normalized, count=1)
+    normalized = _ISO_COMPACT_OFFSET.sub(r"\1:\2", normalized)
+    try:
+        datetime.fromisoformat(normalized)
+    except ValueError:
+        raise ValueError(f"Invalid isoformat string: {value!r}") from None
+    return normalized
+
+
+def _shared_tzinfo(tz: timezone) -> tzinfo:
+    """Return the shared tzinfo instance for the fixed offset timezone `tz`."""
+    return _TZINFOS.setdefault(tz.utcoffset(None), tz)
+
+
+def _parse_offset(value: str) -> tzinfo:
+    """Convert a strptime %z value into a shared tzinfo."""
+    if value == "Z":
+        return _UTC
+    sign = -1 if value[0] == "-" else 1
+    digits = value[1:].replace(":", "")
+    seconds = float(digits[4:]) if len(digits) > 4 else 0.0
+    offset = timedelta(hours=int(digits[:2]), minutes=int(digits[2:4]), seconds=seconds) * sign
+    tz = _TZINFOS.get(offset)
+    if tz is None:
+        tz = _TZINFOS.setdefault(offset, timezone(offset))
+    return tz
+
+
+def _validate_epoch(unit: Optional[str]) -> None:
+    """Ensure the epoch option is one of the supported units."""
+    if unit is not None and unit not in _EPOCH_UNITS:
+        raise ValueError(f"Invalid epoch unit '{unit}', expected one of {list(_EPOCH_UNITS)}")
+
+
+def _to_epoch(value: date, unit: str) -> Union[int, float]:
+    """Convert a date/datetime into a timestamp since the unix epoch.
+
+    Naive values are assumed to be UTC. An int is returned unless the value
+    can only be represented with a fractional part.
+    """
+    if type(value) is date:
+        value = datetime(value.year, value.month, value.day)
+    value = cast(datetime, value)
+    delta = value - (_NAIVE_EPOCH if value.utcoffset() is None else _EPOCH)
+    micro = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    per_unit = _EPOCH_UNITS[unit]
+    whole, remainder = divmod(micro, per_unit)
+    return whole if remainder == 0 else micro / per_unit
+
+
+def _from_epoch(value: Union[int, float], unit: str) -> datetime:
+    """Convert a timestamp since the unix epoch into a UTC datetime."""
+    if type(value) is not int and type(value) is not float:
+        raise TypeError(f"Expected an epoch timestamp, got {type(value)}")
+    return _EPOCH + timedelta(microseconds=value * _EPOCH_UNITS[unit])
+
+
+def _parse_datetime64(values: List[Optional[str]], dtype: Any) -> Any:
+    """Parse a list of ISO-8601 strings into a numpy datetime64 array in a single call.
+
+    Timezone aware strings are converted to UTC and null values become NaT.
+    """
+    # numpy is much slower at parsing the "Z" suffix than it is at removing it here.
+    values = [v[:-1] if v and v[-1] == "Z" else v for v in values]
+    with warnings.catch_warnings():
+        # numpy warns that it has no representation of timezones.
+        warnings.simplefilter("ignore", UserWarning)
+        return np.array(values, dtype=dtype)
+
+
+def _format_datetime64(values: Any) -> List[Optional[str]]:
+    """Format a numpy datetime64 array into a list of ISO-8601 strings."""
+    formatted = np.datetime_as_string(values).tolist()
+    if np.isnat(values).any():
+        formatted = [None if v == "NaT" else v for v in formatted]
+    return formatted
+
+
+@lru_cache(maxsize=None)
+def _compile_format(fmt: str) -> Optional[Tuple[Pattern, List[Tuple[int, str]]]]:
+    """Compile a strptime format into a regular expression.
+
+    Returns the compiled expression along with the datetime argument position
+    and directive of each group. `None` is returned when the format uses a
+    directive that is not supported (e.g. locale dependent names), in which
+    case the caller must fallback to `datetime.strptime`.
+    """
+    regex = []
+    groups = []
+    index = 0
+    while index < len(fmt):
+        char = fmt[index]
+        if char.isspace():
+            # A run of whitespace matches any (non empty) whitespace, as with strptime.
+            if index == 0 or not fmt[index - 1].isspace():
+                regex.append(r"\s+")
+            index += 1
+            continue
+        if char != "%":
+            regex.append(re.escape(char))
+            index += 1
+            continue
+
+        directive = fmt[index + 1] if index + 1 < len(fmt) else ""
+        index += 2
+        if directive == "%":
+            regex.append("%")
+        elif directive in _DIRECTIVES:
+            regex.append(_DIRECTIVES[directive])
+            groups.append((_POSITIONS[directive], directive))
+        else:
+            return None
+
+    if len({position for position, _ in groups}) != len(groups):
+        # Repeated directives are left to strptime to report.
+        return None
+
+    return re.compile("".join(regex), re.IGNORECASE), groups
+
+
+def _format_parser(fmt: str) -> Callable[[str], datetime]:
+    """Create a function parsing strings in the strptime format `fmt` into datetimes."""
+    compiled = _compile_format(fmt)
+    if compiled is None:
+        return lambda value: datetime.strptime(value, fmt)
+
+    pattern, groups = compiled
+
+    def parse(value: str) -> datetime:
+        match = pattern.fullmatch(value)
+        if match is None:
+            raise ValueError(f"time data {value!r} does not match format {fmt!r}")
+
+        args: list = [1900, 1, 1, 0, 0, 0, 0, None]
+        for (position, directive), v in zip(groups, match.groups()):
+            if directive == "z":
+                args[position] = _parse_offset(v)
+            elif directive == "f":
+                args[position] = int(v.ljust(6, "0"))
+            elif directive == "y":
+                year = int(v)
+                args[position] = year + (2000 if year < 69 else 1900)
+            else:
+                args[position] = int(v)
+        return datetime(*args)
+
+    return parse
+
+
+def _strftime_formatter(fmt: str, attributes: Dict[str, Tuple[str, str]]) -> Callable[[Any], str]:
+    """Create a function formatting dates/datetimes using the strftime format `fmt`.
+
+    The format is compiled into a printf style template that is filled
+    from the value's attributes. Formats using any directive not included
+    in `attributes` (e.g. locale dependent names) fallback to strftime.
+    """
+    template = []
+    names = []
+    index = 0
+    while index < len(fmt):
+        char = fmt[index]
+        if char != "%":
+            template.append(char)
+            index += 1
+            continue
+
+        directive = fmt[index + 1] if index + 1 < len(fmt) else ""
+        index += 2
+        if directive == "%":
+            template.append("%%")
+        elif directive in attributes:
+            name, spec = attributes[directive]
+            template.append(spec)
+            names.append(name)
+        else:
+            return lambda value: value.strftime(fmt)
+
+    compiled = "".join(template)
+    if not names:
+        return lambda value: compiled % ()
+    if len(names) == 1:
+        # attrgetter only returns a tuple when fetching multiple attributes.
+        getter = attrgetter(names[0])
+        return lambda value: compiled % (getter(value),)
+    getters = attrgetter(*names)
+    return lambda value: compiled % getters(value)
+
+
+def _memoize(func: Callable[[T], str], size: int, key: Callable[[T], Hashable]) -> Callable[[T], str]:
+    """Cache up to `size` results of `func`, starting afresh each time the cache is full."""
+    memo: Dict[Hashable, str] = {}
+
+    def memoized(value: T) -> str:
+        k = key(value)
+        try:
+            return memo[k]
+        except KeyError:
+            pass
+        v = func(value)
+        if len(memo) >= size:
+            memo.clear()
+        memo[k] = v
+        return v
+
+    return memoized
+
+
+def _datetime_key(value: datetime) -> Hashable:
+    # Datetimes in different timezones compare equal when they represent the
+    # same instant, include the offset so each is formatted separately.
+    return value, value.utcoffset()
+
+
+class _DatetimeFormatter:
+    """Convert datetimes and dates into strings.
+
+    Values are formatted using `isoformat` unless a format is given, in which
+    case the format is compiled once and reused. When `cache_size` is set,
+    the most recently formatted values are memoized.
+    """
+
+    def __init__(
+        self,
+        datetime_fmt: Optional[str] = None,
+        date_fmt: Optional[str] = None,
+        cache_size: int = 0,
+    ) -> None:
+        format_datetime: Callable[[datetime], str] = datetime.isoformat
+        if datetime_fmt:
+            format_datetime = _strftime_formatter(datetime_fmt, _DATETIME_ATTRIBUTES)
+
+        format_date: Callable[[date], str] = date.isoformat
+        if date_fmt:
+            format_date = _strftime_formatter(date_fmt, _DATE_ATTRIBUTES)
+
+        if cache_size:
+            format_datetime = _memoize(format_datetime, cache_size, _datetime_key)
+            format_date = _memoize(format_date, cache_size, lambda value: value)
+
+        self.format_datetime = format_datetime
+        self.format_date = format_date
+
+
+class _DatetimeParser:
+    """Convert strings into datetimes and dates.
+
+    ISO-8601 strings are parsed with `datetime.fromisoformat`, while
+    user defined formats are compiled once and reused. When `cache_size`
+    is set, the results of the most recently parsed strings are kept
+    in a bounded LRU cache.
+    """
+
+    def __init__(
+        self,
+        datetime_fmt: Optional[str] = None,
+        date_fmt: Optional[str] = None,
+        cache_size: int = 0,
+    ) -> None:
+        parse_datetime = _format_parser(datetime_fmt) if datetime_fmt else _parse_iso_datetime
+        parse_date: Callable[[str], date]
+        if date_fmt:
+            parse_fmt = _format_parser(date_fmt)
+
+            def parse_date_fmt(value: str) -> date:
+                return parse_fmt(value).date()
+
+            parse_date = parse_date_fmt
+        else:
+            parse_date = date.fromisoformat
+
+        if cache_size:
+            parse_datetime = lru_cache(maxsize=cache_size)(parse_datetime)
+            parse_date = lru_cache(maxsize=cache_size)(parse_date)
+
+        self.parse_datetime: Callable[[str], datetime] = parse_datetime
+        self.parse_date: Callable[[str], date] = parse_date
@@ -0,0 +1,51 @@
+"""Lookup tables for converting enums to and from json values."""
+
+from enum import Enum, EnumMeta
+from typing import Any, Dict, Type
+
+# Tables are built once per enum class.
+_TABLES: Dict[EnumMeta, "_EnumTable"] = {}
+
+
+class _EnumTable:
+    """Precomputed value -> member and member -> value lookups of an enum class."""
+
+    def __init__(self, schema: Type[Enum]) -> None:
+        self.schema = schema
+        self.members: Dict[Any, Enum] = {}
+        self.values: Dict[Enum, Any] = {}
+        self.folded_members: Dict[str, Enum] = {}
+
+        for member in schema.__members__.values():
+            self.values[member] = member.value
+            try:
+                self.members.setdefault(member.value, member)
+            except TypeError:
+                # Unhashable values are left to the enum to look up.
+                continue
+            if type(member.value) is str:
+                self.folded_members.setdefault(member.value.casefold(), member)
+
+    def member(self, value: Any, case_insensitive: bool = False) -> Enum:
+        """Return the member for the json value, raising ValueError when there is no match."""
+        try:
+            return self.members[value]
+        except (KeyError, TypeError):
+            pass
+
+        if case_insensitive and type(value) is str:
+            member = self.folded_members.get(value.casefold())
+            if member is not None:
+                return member
+
+        # Let the enum decide, this supports any custom `_missing_` lookups.
+        return self.schema(value)
+
+
+def _enum_table(schema: Type[Enum]) -> _EnumTable:
+    """Get the lookup table for the enum class `schema`."""
+    try:
+        return _TABLES[schema]
+    except KeyError:
+        table = _TABLES[schema] = _EnumTable(schema)
+        return table
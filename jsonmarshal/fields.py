@@ -1,11 +1,29 @@
 import dataclasses
-from typing import Any, Union
+from typing import Any, Optional, Union
 
+from jsonmarshal.arrays import _validate_dtype, _validate_typecode
+from jsonmarshal.datetimes import _validate_epoch
+from jsonmarshal.indexing import _validate_index
 from jsonmarshal.types import _is_optional
+from jsonmarshal.uuids import _validate_uuid_format
 
 
 def json_field(
-    *args: list, json: str = None, omitempty: bool = False, metadata: dict = None, **kwargs: dict
+    *args: list,
+    json: str = None,
+    omitempty: bool = False,
+    dtype: Any = None,
+    epoch: Optional[str] = None,
+    case_insensitive: bool = False,
+    uuid_format: Optional[str] = None,
+    typecode: Optional[str] = None,
+    lazy: bool = False,
+    index_by: Optional[str] = None,
+    group_by: Optional[str] = None,
+    duplicates: str = "error",
+    discriminator: Optional[str] = None,
+    metadata: dict = None,
+    **kwargs: dict,
 ) -> dataclasses.Field:
     """Extend the python dataclass field with additional arguments.
 
@@ -17,6 +35,39 @@ def json_field(
     from marshalling if the field is typed as an `Optional[...]` value,
     and is set to `None`.
 
+    The "dtype" option specifies the numpy dtype used when the field
+    is typed as a `numpy.ndarray`, e.g. "datetime64[ms]" or "float64".
+
+    The "epoch" option specifies that a date/datetime field is represented
+    in json as a number of seconds ("s") or milliseconds ("ms") since the
+    unix epoch. This overrides the "epoch" option given to marshal/unmarshal.
+
+    The "case_insensitive" option specifies that enum values are matched
+    ignoring case when unmarshalling.
+
+    The "uuid_format" option specifies how a UUID field is represented in
+    json: "str", "hex", "int" or "bytes". This overrides the "uuid_format"
+    option given to marshal/unmarshal.
+
+    The "typecode" option specifies the typecode used when the field is
+    typed as an `array.array`, e.g. "d" for doubles.
+
+    The "lazy" option specifies that a list field is unmarshalled into a
+    `LazyList`, decoding its elements when they are first accessed.
+
+    The "index_by" option specifies that a json list of objects is decoded
+    into a `Dict[K, V]` field keyed by the named field of the dataclasses,
+    and the "group_by" option into a `Dict[K, List[V]]` field. The
+    "duplicates" option specifies what is done when elements have the same
+    key with index_by: "error" (default), keep the "first" or the "last".
+    The values of the dict are marshalled back into a list.
+
+    The "discriminator" option specifies the field tagging the dataclasses
+    of a `Union[A, B, ...]` field: each dataclass holds its tag as the
+    default value of that field, e.g. `kind: str = "click"`, and the json
+    objects are decoded into the dataclass matching their tag. This
+    overrides the "discriminator" option given to unmarshal.
+
     E.g. A dataclass defining the field results in the following json:
      - `my_value: str`  ->  {"my_value": ...}.
      - `my_value: str = json_field(json="myValue")`  ->  {"myValue": ...}
@@ -27,6 +78,21 @@ def json_field(
 
     metadata["json"] = json
     metadata["omitempty"] = omitempty
+    _validate_dtype(dtype)
+    metadata["dtype"] = dtype
+    _validate_epoch(epoch)
+    metadata["epoch"] = epoch
+    metadata["case_insensitive"] = case_insensitive
+    _validate_uuid_format(uuid_format)
+    metadata["uuid_format"] = uuid_format
+    _validate_typecode(typecode)
+    metadata["typecode"] = typecode
+    metadata["lazy"] = lazy
+    _validate_index(index_by, group_by, duplicates)
+    metadata["index_by"] = index_by
+    metadata["group_by"] = group_by
+    metadata["duplicates"] = duplicates
+    metadata["discriminator"] = discriminator
 
     return dataclasses.field(*args, metadata=metadata, **kwargs)  # type: ignore
 
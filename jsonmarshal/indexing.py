@@ -0,0 +1,84 @@
+"""Decoding of lists of dataclasses into dicts keyed (or grouped) by a field."""
+
+import dataclasses
+from typing import Any, Dict, List, Optional
+
+from jsonmarshal.exceptions import UnmarshalError
+from jsonmarshal.types import _get_optional_type, _is_optional, get_args, get_origin
+
+_DUPLICATES = ["error", "first", "last"]
+
+
+def _validate_index(index_by: Optional[str], group_by: Optional[str], duplicates: str) -> None:
+    """Ensure the index_by, group_by and duplicates options are consistent."""
+    if index_by is not None and group_by is not None:
+        raise ValueError("The index_by and group_by options cannot be used together")
+    if duplicates not in _DUPLICATES:
+        raise ValueError(f"Invalid duplicates '{duplicates}', expected one of {_DUPLICATES}")
+
+
+def _validate_index_schema(index_by: Optional[str], group_by: Optional[str], schema: Any) -> None:
+    """Ensure the top-level schema of the index_by/group_by options is a Dict[K, V] or Dict[K, List[V]]."""
+    dict_schema = _get_optional_type(schema) if _is_optional(schema) else schema
+    args = get_args(dict_schema) if get_origin(dict_schema) is dict else ()
+    if index_by is not None and len(args) != 2:
+        raise ValueError(f"The index_by option requires a Dict[K, V] schema, got {schema}")
+    if group_by is not None and (len(args) != 2 or get_origin(args[1]) is not list):
+        raise ValueError(f"The group_by option requires a Dict[K, List[V]] schema, got {schema}")
+
+
+class _Index:
+    """Adds the elements of a list to a dict, keyed by the value of one of their fields."""
+
+    def __init__(self, key: str, group: bool, duplicates: str) -> None:
+        self.key = key
+        self.group = group
+        self.duplicates = duplicates
+
+    @classmethod
+    def from_options(
+        cls, index_by: Optional[str], group_by: Optional[str], duplicates: str
+    ) -> Optional["_Index"]:
+        if index_by is not None:
+            return cls(index_by, False, duplicates)
+        if group_by is not None:
+            return cls(group_by, True, duplicates)
+        return None
+
+    def element_schema(self, schema: Any, location: str) -> Any:
+        """Get the dataclass of the elements from a Dict[K, V] schema, or Dict[K, List[V]] when grouping."""
+        schema = get_args(schema)[1]
+        if self.group:
+            if get_origin(schema) is not list:
+                raise UnmarshalError(
+                    f"group_by requires a Dict[..., List[...]] schema, got values of {schema} "
+                    f"at location = {location}"
+                )
+            schema = get_args(schema)[0]
+
+        if not dataclasses.is_dataclass(schema) or self.key not in schema.__dataclass_fields__:
+            option = "group_by" if self.group else "index_by"
+            raise UnmarshalError(
+                f"{option} requires a dataclass with a '{self.key}' field, got {schema} "
+                f"at location = {location}"
+            )
+        return schema
+
+    def add(self, index: Dict[Any, Any], value: Any, location: str) -> None:
+        key = getattr(value, self.key)
+        if self.group:
+            group: Optional[List[Any]] = index.get(key)
+            if group is None:
+                index[key] = [value]
+            else:
+                group.append(value)
+            return
+
+        if key in index:
+            if self.duplicates == "error":
+                raise UnmarshalError(
+                    f"Duplicate key {key!r} for index_by '{self.key}' at location = {location}"
+                )
+            if self.duplicates == "first":
+                return
+        index[key] = value
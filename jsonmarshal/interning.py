@@ -0,0 +1,65 @@
+"""Deduplication of strings decoded by unmarshal."""
+
+import sys
+from typing import Dict, Iterable, Optional
+
+
+class InternTable:
+    """A bounded table of strings shared between unmarshalled objects.
+
+    Pass an instance as the "intern" option of `unmarshal` to replace
+    repeated strings (e.g. country codes) with a single shared instance.
+    The same table can be reused across calls.
+
+    The "fields" option restricts interning to the named dataclass fields.
+    When it is not specified, every string of at most "max_length"
+    characters is interned.
+
+    The "max_size" option bounds the number of distinct strings stored.
+    Once full, strings already in the table are still deduplicated but
+    no new strings are added.
+
+    The "hits" and "saved_bytes" attributes report how many strings were
+    replaced by a shared instance and the memory that was released.
+    """
+
+    def __init__(
+        self, fields: Optional[Iterable[str]] = None, max_length: int = 64, max_size: int = 100_000
+    ) -> None:
+        self.fields = frozenset(fields) if fields is not None else None
+        self.max_length = max_length
+        self.max_size = max_size
+        self.strings: Dict[str, str] = {}
+        self.hits = 0
+        self.saved_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def intern(self, value: str) -> str:
+        """Return the shared instance of the string `value`."""
+        try:
+            shared = self.strings[value]
+        except KeyError:
+            if len(self.strings) < self.max_size:
+                self.strings[value] = value
+            return value
+
+        if shared is not value:
+            self.hits += 1
+            self.saved_bytes += sys.getsizeof(value)
+        return shared
+
+    def intern_field(self, value: str, field_name: Optional[str]) -> str:
+        """Return the shared instance of the string `value` decoded for the dataclass field `field_name`.
+
+        The string is returned as it is when the table is not configured to
+        intern it, i.e. the field is not in "fields" or, when all fields are
+        interned, it is longer than "max_length" characters.
+        """
+        if self.fields is None:
+            if len(value) > self.max_length:
+                return value
+        elif field_name not in self.fields:
+            return value
+        return self.intern(value)
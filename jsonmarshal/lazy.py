@@ -0,0 +1,69 @@
+"""Lists whose elements are unmarshalled on first access."""
+
+from typing import Any, Callable, Iterator, List, Sequence, TypeVar, Union, overload
+
+T = TypeVar("T")
+
+
+class LazyList(Sequence[T]):
+    """A list of json elements, each unmarshalled the first time it is accessed.
+
+    Indexing, slicing and iterating decode (and memoize) only the elements
+    being accessed, so that reading a page of a large list costs as many
+    decodes as elements in the page. `materialize()` decodes all the elements
+    into a regular list.
+
+    Errors in an element are only reported (as an UnmarshalError) when the
+    element is accessed. LazyLists are not thread-safe.
+    """
+
+    __slots__ = ("_items", "_decoded", "_decode")
+
+    def __init__(self, raw: Sequence[Any], decode: Callable[[Any, int], T]) -> None:
+        # Holds the json elements, replaced by the unmarshalled ones as they are decoded.
+        self._items: List[Any] = list(raw)
+        self._decoded = bytearray(len(self._items))
+        self._decode = decode
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @overload
+    def __getitem__(self, index: int) -> T:
+        pass  # pragma: no cover
+
+    @overload
+    def __getitem__(self, index: slice) -> List[T]:
+        pass  # pragma: no cover
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[T, List[T]]:
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(len(self))[index]]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("list index out of range")
+        return self._get(index)
+
+    def __iter__(self) -> Iterator[T]:
+        for index in range(len(self)):
+            yield self._get(index)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (list, LazyList)):
+            return self.materialize() == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"<LazyList of {len(self)} elements, {self._decoded.count(1)} decoded>"
+
+    def materialize(self) -> List[T]:
+        """Decode all the elements, returning them as a list."""
+        return [self._get(index) for index in range(len(self))]
+
+    def _get(self, index: int) -> T:
+        if not self._decoded[index]:
+            self._items[index] = self._decode(self._items[index], index)
+            self._decoded[index] = 1
+        return self._items[index]
@@ -1,16 +1,37 @@
+import array
 import dataclasses
 import inspect
+from datetime import date, datetime
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional, TypeVar
-
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, TypeVar, cast
+from uuid import UUID
+
+from jsonmarshal.arrays import _NUMERIC_KINDS
+from jsonmarshal.construct import _RECORD_FIELDS, _dataclass_fields
+from jsonmarshal.datetimes import _DatetimeFormatter, _format_datetime64, _to_epoch, _validate_epoch
+from jsonmarshal.enums import _enum_table
 from jsonmarshal.exceptions import MarshalError
 from jsonmarshal.fields import _get_json_key, _omit_field
-from jsonmarshal.types import _PRIMITIVES, _TYPE_MAP, _Type
+from jsonmarshal.lazy import LazyList
+from jsonmarshal.types import _PRIMITIVE_TYPES, _PRIMITIVES, _TYPE_MAP, NoneType, _Type
+from jsonmarshal.utils.optional import numpy as np
+from jsonmarshal.uuids import _uuid_encoder, _validate_uuid_format
 
 T = TypeVar("T")
 
+# The types of the values that are already json.
+_JSON_TYPES = {str, int, float, bool, NoneType}
+
 
-def marshal(data: Any, datetime_fmt: Optional[str] = None, date_fmt: Optional[str] = None) -> Any:
+def marshal(
+    data: Any,
+    datetime_fmt: Optional[str] = None,
+    date_fmt: Optional[str] = None,
+    datetime_cache_size: int = 0,
+    epoch: Optional[str] = None,
+    uuid_format: Optional[str] = None,
+) -> Any:
     """Marshal python dataclasses into json.
 
     Given a dataclass `X`, marshal it into a json serializable format.
@@ -23,8 +44,21 @@ def marshal(data: Any, datetime_fmt: Optional[str] = None, date_fmt: Optional[st
 
     Both "datetime_fmt" and "date_fmt" options use the strftime/strptime behaviour:
     https://docs.python.org/3/library/datetime.html#strftime-strptime-behavior
+
+    The "datetime_cache_size" option memoizes the strings of the most recently
+    formatted dates/datetimes. This is useful when the same values are repeated
+    throughout the data.
+
+    The "epoch" option marshals dates/datetimes into a number of seconds ("s")
+    or milliseconds ("ms") since the unix epoch. Naive values are assumed to be
+    UTC. The option can also be set per field using `json_field(epoch=...)`.
+
+    The "uuid_format" option specifies how UUIDs are represented: "str"
+    (default), "hex" (32 hex digits), "int" or "bytes" (16 raw bytes, for
+    binary transports). The option can also be set per field using
+    `json_field(uuid_format=...)`.
     """
-    marshaller = _Marshaller(data, datetime_fmt, date_fmt)
+    marshaller = _Marshaller(data, datetime_fmt, date_fmt, datetime_cache_size, epoch, uuid_format)
     return marshaller.marshal()
 
 
@@ -33,7 +67,8 @@ class _ResultContainer:
     data: Any
     parent_key: str
     path: str
-    parent_path: str
+    parent_item: Optional["_ResultContainer"]
+    field: Optional[dataclasses.Field] = None
     cleaned: bool = False
     marshalled: bool = False
     _schema_type: _Type = _Type.NOT_SET
@@ -45,6 +80,11 @@ class _ResultContainer:
             self._schema_type = _get_type(self.data)
         return self._schema_type
 
+    @property
+    def metadata(self) -> Any:
+        # The json_field options of the dataclass field this item belongs to.
+        return self.field.metadata if self.field is not None else {}
+
 
 class _Marshaller:
     def __init__(
@@ -52,10 +92,18 @@ class _Marshaller:
         result: Any,
         datetime_fmt: Optional[str] = None,
         date_fmt: Optional[str] = None,
+        datetime_cache_size: int = 0,
+        epoch: Optional[str] = None,
+        uuid_format: Optional[str] = None,
     ) -> None:
-        self.result = [_ResultContainer(data=result, parent_key="", parent_path="", path="")]
+        _validate_epoch(epoch)
+        _validate_uuid_format(uuid_format)
+        self.result = [_ResultContainer(data=result, parent_key="", parent_item=None, path="")]
         self.datetime_fmt = datetime_fmt
         self.date_fmt = date_fmt
+        self.datetimes = _DatetimeFormatter(datetime_fmt, date_fmt, datetime_cache_size)
+        self.epoch = epoch
+        self.uuid_format = uuid_format
         self.dump: List[_ResultContainer] = []
         self.processors: Dict[_Type, Callable[[_ResultContainer], None]] = {
             _Type.DATACLASS: self.process_dataclass,
@@ -65,6 +113,9 @@ class _Marshaller:
             _Type.UUID: self.process_uuid,
             _Type.DATETIME: self.process_datetime,
             _Type.DATE: self.process_date,
+            _Type.NDARRAY: self.process_ndarray,
+            _Type.ARRAY: self.process_array,
+            _Type.RAW: self.process_raw,
         }
         # Add each primitive individually
         for t in _PRIMITIVES:
@@ -85,6 +136,18 @@ class _Marshaller:
 
         return item.data
 
+    def marshal_column(self, values: List[Any], field: dataclasses.Field, path: str) -> List[Any]:
+        # Marshal the values of a dataclass field taken from many objects at once.
+        self.result = [
+            _ResultContainer(data=values, parent_key=path, parent_item=None, path=path, field=field)
+        ]
+        return self.marshal()
+
+    def marshal_value(self, data: Any) -> Any:
+        # Marshal another value with the same options, e.g. a batch of streamed objects.
+        self.result = [_ResultContainer(data=data, parent_key="", parent_item=None, path="")]
+        return self.marshal()
+
     def get_item(self) -> _ResultContainer:
         item = self.result.pop()
         return item
@@ -103,9 +166,9 @@ class _Marshaller:
     def clean_dataclass(self, item: _ResultContainer) -> _ResultContainer:
         marshalled = {}
 
-        for field in item.data.__dataclass_fields__.values():
+        for field in _dataclass_fields(item.data):
             json_key = _get_json_key(field)
-            value = item.data.__dict__[field.name]
+            value = getattr(item.data, field.name)
 
             # As this is a dataclass, we are relying on the fact that python
             # will only allow certain types to be set on it, so we just figure out
@@ -118,13 +181,17 @@ class _Marshaller:
             if type_ in _PRIMITIVES:
                 # Primitive values can be attached directly to the new dict
                 marshalled[json_key] = value
+            elif type_ is _Type.RAW:
+                # So are raw json values, which are not walked.
+                marshalled[json_key] = value.value
             else:
                 # value needs further marshalling. add to dump for later processing.
                 r = _ResultContainer(
                     data=value,
                     parent_key=json_key,
-                    parent_path=item.path,
+                    parent_item=item,
                     path=f"{item.path}.{json_key}",
+                    field=field,
                 )
                 self.dump.append(r)
 
@@ -134,66 +201,215 @@ class _Marshaller:
         return item
 
     def process_list(self, item: _ResultContainer) -> None:
-        if item.cleaned is False:
+        if type(item.data) is set or type(item.data) is frozenset:
+            # Sets are marshalled into arrays, in their iteration order.
+            item.data = list(item.data)
+
+        if item.cleaned is False and self.encode_list_in_bulk(item):
+            # Every element was encoded at once, there are no children to process.
+            item.cleaned = True
+            item.marshalled = True
+        elif item.cleaned is False:
             item = self._clean_list(item)
         else:
             item.marshalled = True
 
         self.result.append(item)
 
-    def _clean_list(self, item: _ResultContainer) -> _ResultContainer:
-        index = 0
+    def encode_list_in_bulk(self, item: _ResultContainer) -> bool:
+        # Lists of simple values can be encoded in one pass without creating a
+        # container per element.
+        if not item.data:
+            return False
+
+        type_ = type(item.data[0])
+        if not all(type(v) is type_ for v in item.data):
+            return False
+
+        if type_ in _PRIMITIVE_TYPES:
+            item.data = list(item.data)
+            return True
+
+        encode = self.element_encoder(type_, item.metadata)
+        if encode is None:
+            return False
+
+        item.data = [encode(v) for v in item.data]
+        return True
+
+    def element_encoder(self, type_: Any, metadata: Any) -> Optional[Callable[[Any], Any]]:
+        # The function encoding each of the elements of a list holding values of type_, if they are simple.
+        epoch = metadata.get("epoch") or self.epoch
 
-        while item.data:
-            # Remove element from the data in order
-            elem = item.data.pop(0)
+        if type_ is UUID:
+            return _uuid_encoder(metadata.get("uuid_format") or self.uuid_format)
 
+        if issubclass(type_, Enum):
+            return partial(_encode_enum, _enum_table(type_).values)
+
+        if type_ is datetime:
+            return partial(_to_epoch, unit=epoch) if epoch else self.datetimes.format_datetime
+
+        if type_ is date:
+            return partial(_to_epoch, unit=epoch) if epoch else self.datetimes.format_date
+
+        return None
+
+    def _clean_list(self, item: _ResultContainer) -> _ResultContainer:
+        for index, elem in enumerate(item.data):
             r = _ResultContainer(
-                data=elem, parent_key=item.parent_key, parent_path=item.path, path=f"{item.path}.{index}"
+                data=elem,
+                parent_key=item.parent_key,
+                parent_item=item,
+                path=f"{item.path}.{index}",
+                field=item.field,
             )
             self.dump.append(r)
-            index += 1
 
+        # The marshalled elements are appended to a new list (in order)
+        item.data = []
         item.cleaned = True
         return item
 
     def process_dict(self, item: _ResultContainer) -> None:
-        # Assume a dict is already properly structured and ok for marshalling
-        item.cleaned = True
-        item.marshalled = True
+        if item.metadata.get("index_by") or item.metadata.get("group_by"):
+            # A list decoded into a dict by unmarshal, it is marshalled back into a list.
+            self.process_indexed_dict(item)
+            return
+
+        if item.cleaned is False and self.encode_dict_in_bulk(item):
+            item.cleaned = True
+            item.marshalled = True
+        elif item.cleaned is False:
+            item = self._clean_dict(item)
+        else:
+            item.marshalled = True
+
         self.result.append(item)
 
+    def encode_dict_in_bulk(self, item: _ResultContainer) -> bool:
+        # Dicts of simple values are encoded in one pass without creating a
+        # container per value.
+        if _is_flat_json(item.data):
+            # The dict is already json (e.g. loaded json), it is kept as it is.
+            return True
+
+        values = list(item.data.values())
+        type_ = type(values[0])
+        if not all(type(v) is type_ for v in values):
+            return False
+
+        if type_ in _JSON_TYPES:
+            item.data = {self.encode_key(key, item): value for key, value in item.data.items()}
+            return True
+
+        encode = self.element_encoder(type_, item.metadata)
+        if encode is None:
+            return False
+
+        item.data = {self.encode_key(key, item): encode(value) for key, value in item.data.items()}
+        return True
+
+    def _clean_dict(self, item: _ResultContainer) -> _ResultContainer:
+        marshalled = {}
+        for key, value in item.data.items():
+            json_key = self.encode_key(key, item)
+            if type(value) in _JSON_TYPES or (type(value) is dict and _is_flat_json(value)):
+                marshalled[json_key] = value
+                continue
+
+            # The key is set now to keep the order of the dict, the value is set when marshalled.
+            marshalled[json_key] = None
+            self.dump.append(
+                _ResultContainer(
+                    data=value,
+                    parent_key=json_key,
+                    parent_item=item,
+                    path=f"{item.path}.{json_key}",
+                    field=item.field,
+                )
+            )
+
+        item.data = marshalled
+        item.cleaned = True
+        return item
+
+    def encode_key(self, key: Any, item: _ResultContainer) -> Any:
+        # Json keys are strings (json.dumps converts numbers), other keys are encoded like values.
+        if type(key) in _JSON_TYPES:
+            return key
+
+        encode = self.element_encoder(type(key), item.metadata)
+        if encode is None:
+            raise MarshalError(f"Unable to marshal dict key '{key}' ({type(key)}) at location = {item.path}")
+        return encode(key)
+
+    def process_indexed_dict(self, item: _ResultContainer) -> None:
+        if item.metadata.get("group_by"):
+            item.data = [value for group in item.data.values() for value in group]
+        else:
+            item.data = list(item.data.values())
+        item._schema_type = _Type.LIST
+        self.process_list(item)
+
     def process_primitive(self, item: _ResultContainer) -> None:
         item.cleaned = True
         item.marshalled = True
         self.result.append(item)
 
     def process_datetime(self, item: _ResultContainer) -> None:
-        if self.datetime_fmt:
-            item.data = item.data.strftime(self.datetime_fmt)
+        epoch = item.metadata.get("epoch") or self.epoch
+        if epoch:
+            item.data = _to_epoch(item.data, epoch)
         else:
-            item.data = item.data.isoformat()
+            item.data = self.datetimes.format_datetime(item.data)
         item.cleaned = True
         item.marshalled = True
         self.result.append(item)
 
     def process_date(self, item: _ResultContainer) -> None:
-        if self.date_fmt:
-            item.data = item.data.strftime(self.date_fmt)
+        epoch = item.metadata.get("epoch") or self.epoch
+        if epoch:
+            item.data = _to_epoch(item.data, epoch)
         else:
-            item.data = item.data.isoformat()
+            item.data = self.datetimes.format_date(item.data)
         item.cleaned = True
         item.marshalled = True
         self.result.append(item)
 
     def process_enum(self, item: _ResultContainer) -> None:
-        item.data = item.data.value
+        item.data = _encode_enum(_enum_table(type(item.data)).values, item.data)
         item.cleaned = True
         item.marshalled = True
         self.result.append(item)
 
     def process_uuid(self, item: _ResultContainer) -> None:
-        item.data = str(item.data)
+        encode = _uuid_encoder(item.metadata.get("uuid_format") or self.uuid_format)
+        item.data = encode(item.data)
+        item.cleaned = True
+        item.marshalled = True
+        self.result.append(item)
+
+    def process_ndarray(self, item: _ResultContainer) -> None:
+        if item.data.dtype.kind == "M":
+            item.data = _format_datetime64(item.data)
+        elif item.data.dtype.kind in _NUMERIC_KINDS:
+            item.data = item.data.tolist()
+        else:
+            raise MarshalError(f"Unable to marshal numpy array with dtype {item.data.dtype}.")
+        item.cleaned = True
+        item.marshalled = True
+        self.result.append(item)
+
+    def process_array(self, item: _ResultContainer) -> None:
+        item.data = item.data.tolist()
+        item.cleaned = True
+        item.marshalled = True
+        self.result.append(item)
+
+    def process_raw(self, item: _ResultContainer) -> None:
+        # The value is emitted as it is, without walking it.
+        item.data = item.data.value
         item.cleaned = True
         item.marshalled = True
         self.result.append(item)
@@ -205,44 +421,20 @@ class _Marshaller:
             self.flush_dump()
             return
 
-        while len(self.result) >= 2:
-            item = self.result.pop()
-            prev = self.result.pop()
-
-            if item.marshalled is False:
-                # item is not ready to be promoted, move onto next one.
-                self.dump.append(item)
-                self.result.append(prev)
-                continue
-
-            # Check to see if the item can be attached to the previous key/array
-            if item.parent_path != prev.path:
-                # This item cannot be attached to the parent. see if it can be attached to the one after.
-                self.result.append(item)
-                self.dump.append(prev)
-                continue
-
-            if prev.schema_type == _Type.LIST:
-                prev.data.append(item.data)
-                self.result.append(prev)
-                continue
-
-            if prev.schema_type == _Type.DATACLASS:
-                # Put the object on the parents data key then back onto the result queue
-                prev.data[item.parent_key] = item.data
-                # prev has been updated so needs further processing
-                self.result.append(prev)
-                continue
+        if len(self.result) < 2 or self.result[-1].marshalled is False:
+            # item is not ready to be promoted, it will be processed again.
+            return
 
-            # The following exception has been included as a failsafe.
-            # It is not expected for the program to get here, but that
-            # doesn't mean it's impossible.
-            raise MarshalError(
-                "Unexpected Error occurred. Please file an issue with the repo to address this."
-            )  # pragma: no cover
+        item = self.result.pop()
+        parent = cast(_ResultContainer, item.parent_item)
 
-        # Ensure that we haven't left anything in the dump
-        self.flush_dump()
+        # Children are processed depth first, so the elements of a list are
+        # completed (and appended) in order.
+        if parent.schema_type == _Type.LIST:
+            parent.data.append(item.data)
+        else:
+            # Put the object on the parents data key
+            parent.data[item.parent_key] = item.data
 
     def flush_dump(self) -> None:
         # Put all dumped items back onto the result queue
@@ -250,19 +442,42 @@ class _Marshaller:
             self.result.append(self.dump.pop())
 
 
+def _is_flat_json(data: Dict[Any, Any]) -> bool:
+    """Is the dict already json, with string keys and simple values?"""
+    return all(type(key) is str and type(value) in _JSON_TYPES for key, value in data.items())
+
+
+def _encode_enum(values: Dict[Enum, Any], member: Enum) -> Any:
+    try:
+        return values[member]
+    except KeyError:
+        # Composite flags are not members of the lookup table.
+        return member.value
+
+
 def _get_type(data: Any) -> _Type:
     if dataclasses.is_dataclass(data):
         return _Type.DATACLASS
 
     type_of_data = type(data)
 
-    if type_of_data is list:
+    if type_of_data in _RECORD_FIELDS:
+        # Records are marshalled like the dataclass they replace.
+        return _Type.DATACLASS
+
+    if type_of_data is list or type_of_data is LazyList:
         return _Type.LIST
 
     if type_of_data is dict:
         return _Type.DICT
         # raise MarshalError(f"Marshalling to json is not supported for dicts: {data}")
 
+    if np is not None and type_of_data is np.ndarray:
+        return _Type.NDARRAY
+
+    if type_of_data is array.array:
+        return _Type.ARRAY
+
     if type_of_data in _TYPE_MAP:
         return _TYPE_MAP[type_of_data]
 
@@ -0,0 +1,374 @@
+"""Reading and writing of newline delimited json (NDJSON) files."""
+
+import array
+import bz2
+import gzip
+import json
+import lzma
+import mmap
+import os
+import queue
+import re
+import struct
+import tempfile
+import threading
+from contextlib import ExitStack, contextmanager, suppress
+from itertools import islice
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+    overload,
+)
+
+from jsonmarshal.exceptions import UnmarshalError
+from jsonmarshal.marshal import _Marshaller
+from jsonmarshal.raw import RawJSON, _encode_values
+from jsonmarshal.unmarshal import _Unmarshaller
+
+T = TypeVar("T")
+
+_COMPRESSIONS: Dict[str, Callable[..., Any]] = {"gzip": gzip.open, "bz2": bz2.open, "lzma": lzma.open}
+_EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "lzma", ".lzma": "lzma"}
+
+# Number of blocks buffered between the main and the background threads.
+_QUEUE_SIZE = 4
+
+# Number of objects marshalled at once when writing.
+_WRITE_BATCH_SIZE = 1000
+
+# Header of persisted indexes: magic, size and modification time of the indexed file.
+_INDEX_MAGIC = b"JMNDIDX1"
+_INDEX_HEADER = struct.Struct("<8sqq")
+
+# Matches the first non blank byte of a line, found without copying the line.
+_NON_BLANK = re.compile(rb"\S")
+
+
+class NdjsonReader(Generic[T]):
+    """Random access to the records of an NDJSON file.
+
+    The file is memory mapped and an index of the offsets of its lines is
+    built when the reader is created. Indexing (`reader[i]`), slicing and
+    iterating only parse and unmarshal the requested records into the
+    dataclass schema. Blank lines are skipped.
+
+    The "index_path" option persists the index, so that it is only built
+    again when the file has changed (in size or modification time).
+
+    The remaining options are passed to `unmarshal`.
+    """
+
+    def __init__(self, path: str, schema: Type[T], index_path: Optional[str] = None, **options: Any) -> None:
+        self.path = path
+        self.schema = schema
+        self.options = options
+        self._unmarshaller = _Unmarshaller(None, schema, **options)
+        self._file = open(path, "rb")
+        self._mmap: Union[mmap.mmap, bytes] = b""
+        try:
+            stat = os.fstat(self._file.fileno())
+            # Empty files cannot be memory mapped.
+            if stat.st_size:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+            offsets = _load_index(index_path, stat) if index_path else None
+            if offsets is None:
+                offsets = _build_index(self._mmap)
+                if index_path:
+                    _save_index(index_path, stat, offsets)
+        except BaseException:
+            self.close()
+            raise
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    @overload
+    def __getitem__(self, index: int) -> T:
+        pass  # pragma: no cover
+
+    @overload
+    def __getitem__(self, index: slice) -> List[T]:
+        pass  # pragma: no cover
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[T, List[T]]:
+        if isinstance(index, slice):
+            return [self._read(i) for i in range(len(self))[index]]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"record index {index} out of range")
+        return self._read(index)
+
+    def __iter__(self) -> Iterator[T]:
+        for index in range(len(self)):
+            yield self._read(index)
+
+    def __enter__(self) -> "NdjsonReader[T]":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        self._file.close()
+
+    def raw(self, index: int) -> bytes:
+        """Get the json text of a record."""
+        start = self._offsets[index]
+        end = self._mmap.find(b"\n", start)
+        if end == -1:
+            end = len(self._mmap)
+        return self._mmap[start:end]
+
+    def _read(self, index: int) -> T:
+        if self.schema is RawJSON:
+            return cast(T, RawJSON.from_text(self.raw(index)))
+        try:
+            data = json.loads(self.raw(index))
+        except ValueError as e:
+            raise UnmarshalError(f"Invalid json in record {index} of {self.path}: {e}")
+        return cast(T, self._unmarshaller.unmarshal_value(data, self.schema, ""))
+
+
+def _build_index(data: Union[mmap.mmap, bytes]) -> array.array:
+    """Find the offsets of the (non blank) lines."""
+    offsets = array.array("q")
+    find = data.find
+    non_blank = _NON_BLANK.search
+    size = len(data)
+    start = 0
+    while start < size:
+        end = find(b"\n", start)
+        if end == -1:
+            end = size
+        if non_blank(data, start, end):
+            offsets.append(start)
+        start = end + 1
+    return offsets
+
+
+def _load_index(index_path: str, stat: os.stat_result) -> Optional[array.array]:
+    """Load a persisted index, unless it is missing or out of date."""
+    try:
+        with open(index_path, "rb") as buf:
+            header = buf.read(_INDEX_HEADER.size)
+            if header != _INDEX_HEADER.pack(_INDEX_MAGIC, stat.st_size, stat.st_mtime_ns):
+                return None
+            offsets = array.array("q")
+            offsets.frombytes(buf.read())
+            return offsets
+    except FileNotFoundError:
+        return None
+
+
+def _save_index(index_path: str, stat: os.stat_result, offsets: array.array) -> None:
+    """Persist an index, written to a temporary file moved into place so that it is never truncated."""
+    directory, name = os.path.split(os.path.abspath(index_path))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{name}.", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as buf:
+            buf.write(_INDEX_HEADER.pack(_INDEX_MAGIC, stat.st_size, stat.st_mtime_ns))
+            offsets.tofile(buf)
+        os.replace(temp_path, index_path)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.unlink(temp_path)
+        raise
+
+
+def read_ndjson(
+    file: Union[str, os.PathLike, IO[bytes]],
+    schema: Any,
+    compression: Optional[str] = "infer",
+    block_size: int = 1024 * 1024,
+    **options: Any,
+) -> Iterator[Any]:
+    """Read the records of an NDJSON file unmarshalled into the dataclass schema, one at a time.
+
+    The "compression" option decompresses the file with "gzip", "bz2" or
+    "lzma". By default ("infer"), it is inferred from the extension of the
+    file name (.gz, .bz2, .xz or .lzma). Use None for uncompressed files.
+
+    The file is read (and decompressed) in blocks of "block_size" bytes by a
+    background thread, overlapping with the unmarshalling of the records.
+    Blank lines are skipped.
+
+    The remaining options are passed to `unmarshal`.
+    """
+    unmarshaller = _Unmarshaller(None, schema, **options)
+    with _open(file, "rb", compression, block_size) as fp:
+        # The parts of the last line read, joined once it is complete.
+        parts: List[bytes] = []
+        lineno = 0
+        for block in _read_blocks(fp, block_size):
+            lines = block.split(b"\n")
+            parts.append(lines[0])
+            if len(lines) == 1:
+                continue
+            lines[0] = b"".join(parts)
+            parts = [lines.pop()]
+            for line in lines:
+                lineno += 1
+                if line.strip():
+                    yield _read_record(unmarshaller, schema, line, lineno, fp)
+
+        rest = b"".join(parts)
+        if rest.strip():
+            yield _read_record(unmarshaller, schema, rest, lineno + 1, fp)
+
+
+def write_ndjson(
+    file: Union[str, os.PathLike, IO[bytes]],
+    objects: Iterable[Any],
+    compression: Optional[str] = "infer",
+    block_size: int = 1024 * 1024,
+    **options: Any,
+) -> None:
+    """Write objects (dataclasses...) marshalled into json as the lines of an NDJSON file.
+
+    The "compression" option compresses the file with "gzip", "bz2" or
+    "lzma". By default ("infer"), it is inferred from the extension of the
+    file name (.gz, .bz2, .xz or .lzma). Use None for uncompressed files.
+
+    The lines are written (and compressed) by a background thread,
+    overlapping with the marshalling of the objects. The file is buffered in
+    blocks of "block_size" bytes.
+
+    The remaining options are passed to `marshal`.
+    """
+    marshaller = _Marshaller(None, **options)
+    objects = iter(objects)
+    with _open(file, "wb", compression, block_size) as fp:
+        writer = _BackgroundWriter(fp)
+        try:
+            batch = list(islice(objects, _WRITE_BATCH_SIZE))
+            while batch:
+                # The text of RawJSON objects may span several lines, separated by whitespace.
+                lines = [line.replace("\n", " ") for line in _encode_values(batch, marshaller.marshal_value)]
+                writer.write(("\n".join(lines) + "\n").encode())
+                batch = list(islice(objects, _WRITE_BATCH_SIZE))
+        finally:
+            writer.close()
+
+
+def _read_record(unmarshaller: _Unmarshaller, schema: Any, line: bytes, lineno: int, fp: IO[bytes]) -> Any:
+    if schema is RawJSON:
+        # The record is kept as text, it is only parsed if its value is accessed.
+        return RawJSON.from_text(line)
+    return unmarshaller.unmarshal_value(_loads(line, lineno, fp), schema, "")
+
+
+def _loads(line: bytes, lineno: int, fp: IO[bytes]) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        raise UnmarshalError(f"Invalid json on line {lineno} of {getattr(fp, 'name', fp)}: {e}")
+
+
+@contextmanager
+def _open(
+    file: Union[str, os.PathLike, IO[bytes]], mode: str, compression: Optional[str], block_size: int
+) -> Iterator[IO[bytes]]:
+    """Open a file, or use a file object, (de)compressing its content."""
+    _validate_compression(compression)
+    if compression == "infer":
+        name = os.fspath(file) if isinstance(file, (str, os.PathLike)) else getattr(file, "name", "")
+        compression = _EXTENSIONS.get(os.path.splitext(str(name))[1])
+
+    with ExitStack() as stack:
+        if isinstance(file, (str, os.PathLike)):
+            fp = stack.enter_context(open(file, mode, buffering=block_size))
+        else:
+            fp = file
+        if compression is not None:
+            fp = stack.enter_context(_COMPRESSIONS[compression](fp, mode))
+        yield fp
+
+
+def _read_blocks(fp: IO[bytes], block_size: int) -> Iterator[bytes]:
+    """Read blocks of a file in a background thread."""
+    blocks: "queue.Queue[Union[bytes, BaseException]]" = queue.Queue(maxsize=_QUEUE_SIZE)
+    stop = threading.Event()
+
+    def read() -> None:
+        try:
+            block = None
+            while block != b"" and not stop.is_set():
+                block = fp.read(block_size)
+                blocks.put(block)
+        except BaseException as e:
+            blocks.put(e)
+
+    thread = threading.Thread(target=read, daemon=True)
+    thread.start()
+    try:
+        while True:
+            block = blocks.get()
+            if isinstance(block, BaseException):
+                raise block
+            if not block:
+                return
+            yield block
+    finally:
+        # Stop the thread if the blocks were not all read, it may be waiting for room in the queue.
+        stop.set()
+        while thread.is_alive():
+            with suppress(queue.Empty):
+                blocks.get(timeout=0.01)
+
+
+class _BackgroundWriter:
+    """Write blocks to a file in a background thread."""
+
+    def __init__(self, fp: IO[bytes]) -> None:
+        self.fp = fp
+        self.blocks: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=_QUEUE_SIZE)
+        self.error: Optional[BaseException] = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def write(self, block: bytes) -> None:
+        self._raise_error()
+        self.blocks.put(block)
+
+    def close(self) -> None:
+        self.blocks.put(None)
+        self.thread.join()
+        self._raise_error()
+
+    def _run(self) -> None:
+        while True:
+            block = self.blocks.get()
+            if block is None:
+                return
+            # After an error, the remaining blocks are discarded.
+            if self.error is None:
+                try:
+                    self.fp.write(block)
+                except BaseException as e:
+                    self.error = e
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            raise self.error
+
+
+def _validate_compression(compression: Optional[str]) -> None:
+    if compression is not None and compression != "infer" and compression not in _COMPRESSIONS:
+        raise ValueError(f"Invalid compression {compression!r}, expected one of {['infer', *_COMPRESSIONS]}")
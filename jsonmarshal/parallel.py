@@ -0,0 +1,92 @@
+"""Marshalling of large lists into json using a pool of processes."""
+
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count, repeat
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from jsonmarshal.marshal import _Marshaller
+
+# The lists being marshalled, inherited by the (forked) worker processes.
+_SHARED: Dict[int, Sequence[Any]] = {}
+_TOKENS = count()
+
+# Number of chunks per worker, so that chunks taking longer than others are balanced.
+_CHUNKS_PER_WORKER = 4
+
+
+def marshal_parallel(
+    objects: Sequence[Any],
+    ndjson: bool = False,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    datetime_fmt: Optional[str] = None,
+    date_fmt: Optional[str] = None,
+    datetime_cache_size: int = 0,
+    epoch: Optional[str] = None,
+    uuid_format: Optional[str] = None,
+) -> bytes:
+    """Marshal a list of objects (dataclasses...) into json bytes using a pool of processes.
+
+    The list is split into chunks of "chunk_size" objects which are marshalled
+    and encoded by "workers" processes (by default, the number of CPUs). The
+    result is the same as `json.dumps(marshal(objects)).encode()`, or the NDJSON
+    lines of the objects with the "ndjson" option.
+
+    The workers are started with the start method of multiprocessing, which
+    is left to the application. When it is "fork" (the default on Linux
+    before Python 3.14), the workers access the list inherited from the
+    parent process, so that only the encoded chunks are transferred between
+    processes. Otherwise, the chunks are pickled, and the types of the
+    objects must be importable by the workers.
+
+    The remaining options are the same as for `marshal`.
+    """
+    options: Dict[str, Any] = {
+        "datetime_fmt": datetime_fmt,
+        "date_fmt": date_fmt,
+        "datetime_cache_size": datetime_cache_size,
+        "epoch": epoch,
+        "uuid_format": uuid_format,
+    }
+    # Validate the options before starting any process.
+    _Marshaller(None, **options)
+
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or -(-len(objects) // (workers * _CHUNKS_PER_WORKER)) or 1
+    bounds = [(start, min(start + chunk_size, len(objects))) for start in range(0, len(objects), chunk_size)]
+
+    if workers == 1 or len(bounds) <= 1:
+        fragments = [_encode(objects[start:stop], ndjson, options) for start, stop in bounds]
+    elif multiprocessing.get_start_method() == "fork":
+        token = next(_TOKENS)
+        _SHARED[token] = objects
+        try:
+            with ProcessPoolExecutor(workers) as pool:
+                shared = pool.map(_encode_shared, repeat(token), bounds, repeat(ndjson), repeat(options))
+                fragments = list(shared)
+        finally:
+            del _SHARED[token]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            chunks = (objects[start:stop] for start, stop in bounds)
+            fragments = list(pool.map(_encode, chunks, repeat(ndjson), repeat(options)))
+
+    if ndjson:
+        return b"".join(fragments)
+    return b"[" + b", ".join(fragments) + b"]"
+
+
+def _encode_shared(token: int, bounds: Tuple[int, int], ndjson: bool, options: Dict[str, Any]) -> bytes:
+    start, stop = bounds
+    return _encode(_SHARED[token][start:stop], ndjson, options)
+
+
+def _encode(objects: Sequence[Any], ndjson: bool, options: Dict[str, Any]) -> bytes:
+    """Encode a chunk of objects, as the lines of NDJSON or the elements of a json array."""
+    marshalled: List[Any] = _Marshaller(None, **options).marshal_value(list(objects))
+    if ndjson:
+        return "".join(json.dumps(data) + "\n" for data in marshalled).encode()
+    return ", ".join(json.dumps(data) for data in marshalled).encode()
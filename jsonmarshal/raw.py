@@ -0,0 +1,65 @@
+"""Json values kept undecoded by unmarshal and re-emitted as-is by marshal."""
+
+import json
+from typing import Any, Callable, List, Optional, Sequence, Union, cast
+
+_NOT_DECODED = object()
+
+
+class RawJSON:
+    """A json sub-tree passed through unmarshal and marshal without being processed.
+
+    Fields typed as `RawJSON` hold the loaded json value (dicts, lists...)
+    exactly as it appears in the response, without unmarshalling it, and
+    marshal emits the value as-is without walking it.
+
+    Records read from NDJSON files (`NdjsonReader`, `read_ndjson`) into the
+    `RawJSON` schema keep their original text instead of being parsed. The
+    text is only parsed when the value is accessed, and `write_ndjson` or
+    `marshal_to_stream` write it back without serializing it again.
+    """
+
+    __slots__ = ("_value", "_text")
+
+    def __init__(self, value: Any) -> None:
+        self._value = value
+        self._text: Optional[str] = None
+
+    @classmethod
+    def from_text(cls, text: Union[str, bytes]) -> "RawJSON":
+        """Create a RawJSON from json text, which is parsed when the value is first accessed."""
+        raw = cls(_NOT_DECODED)
+        raw._text = text.decode() if isinstance(text, bytes) else text
+        return raw
+
+    @property
+    def value(self) -> Any:
+        """The loaded json value."""
+        if self._value is _NOT_DECODED:
+            self._value = json.loads(cast(str, self._text))
+        return self._value
+
+    @property
+    def text(self) -> str:
+        """The json text, the original one if the RawJSON was created from text."""
+        if self._text is None:
+            self._text = json.dumps(self._value)
+        return self._text
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, RawJSON):
+            return bool(self.value == other.value)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        if self._value is _NOT_DECODED:
+            return f"RawJSON.from_text({self._text!r})"
+        return f"RawJSON({self._value!r})"
+
+
+def _encode_values(values: Sequence[Any], marshal: Callable[[List[Any]], List[Any]]) -> List[str]:
+    """Marshal values into json text, using the text of the RawJSON values as it is."""
+    marshalled = marshal([None if type(value) is RawJSON else value for value in values])
+    return [
+        value.text if type(value) is RawJSON else json.dumps(data) for value, data in zip(values, marshalled)
+    ]
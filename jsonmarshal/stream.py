@@ -0,0 +1,564 @@
+"""Streaming (un)marshalling of json read from file objects, received in chunks or written to streams."""
+
+import asyncio
+import codecs
+import dataclasses
+import json
+import re
+from typing import IO, Any, Dict, Iterator, List, NoReturn, Optional, Union, cast
+
+from jsonmarshal.construct import _RECORD_FIELDS, _dataclass_fields
+from jsonmarshal.exceptions import UnmarshalError
+from jsonmarshal.fields import _get_json_key, _omit_field
+from jsonmarshal.interning import InternTable
+from jsonmarshal.lazy import LazyList
+from jsonmarshal.marshal import _Marshaller
+from jsonmarshal.raw import RawJSON, _encode_values
+from jsonmarshal.unmarshal import _Unmarshaller
+
+_NON_WHITESPACE = re.compile(r"[^ \t\n\r]")
+# The characters that matter when finding the end of a document: within strings,
+# within arrays/objects and after numbers, true, false or null.
+_STRING_END = re.compile(r'["\\]')
+_STRUCTURE = re.compile(r'[{}\[\]"]')
+_SCALAR_END = re.compile(r'[ \t\n\r{}\[\]"]')
+# The first character that is not part of the end of an invalid document.
+_NOT_CLOSING = re.compile(r"[^ \t\n\r}\]]")
+_DECODER = json.JSONDecoder()
+
+# The types marshalled into json arrays.
+_ARRAY_TYPES = {list, tuple, set, frozenset, LazyList}
+
+# Number of list elements marshalled at once when writing to a stream.
+_MARSHAL_BATCH_SIZE = 100
+
+
+def unmarshal_stream(
+    fp: IO[Any],
+    schema: Any,
+    path: Optional[str] = None,
+    chunk_size: int = 65536,
+    datetime_fmt: Optional[str] = None,
+    date_fmt: Optional[str] = None,
+    datetime_cache_size: int = 0,
+    epoch: Optional[str] = None,
+    uuid_format: Optional[str] = None,
+    intern: Optional[InternTable] = None,
+    output: Optional[str] = None,
+) -> "ArrayStream":
+    """Unmarshal the elements of a json array read from a file object one at a time.
+
+    The "path" option names the array within the json document, as the
+    dotted keys of the objects enclosing it, e.g. "data" for
+    `{"meta": {...}, "data": [...], "next": "..."}`. By default, the
+    document itself is the array.
+
+    The returned `ArrayStream` is iterated to get the elements unmarshalled
+    into the dataclass schema, while the rest of the document is loaded into
+    `ArrayStream.envelope`. Only the element being unmarshalled, and
+    "chunk_size" characters of the file, are held in memory.
+
+    The file object can be opened in text or binary (utf-8) mode.
+
+    The remaining options are the same as for `unmarshal`.
+    """
+    unmarshaller = _Unmarshaller(
+        None, schema, datetime_fmt, date_fmt, datetime_cache_size, epoch, uuid_format, intern, output
+    )
+    return ArrayStream(_Scanner(fp, chunk_size), schema, path.split(".") if path else [], unmarshaller)
+
+
+class ArrayStream:
+    """The elements of a json array being read, see `unmarshal_stream`.
+
+    `envelope` holds the json values around the array (without the array
+    itself), nested as in the document. It is only complete once all the
+    elements have been iterated over.
+    """
+
+    def __init__(
+        self, scanner: "_Scanner", schema: Any, keys: List[str], unmarshaller: _Unmarshaller
+    ) -> None:
+        self.schema = schema
+        self.envelope: Dict[str, Any] = {}
+        self._scanner = scanner
+        self._keys = keys
+        self._unmarshaller = unmarshaller
+        self._elements = self._stream()
+
+    def __iter__(self) -> Iterator[Any]:
+        return self._elements
+
+    def _stream(self) -> Iterator[Any]:
+        yield from self._find(self._keys, self.envelope, "")
+        if self._scanner.peek():
+            self._scanner.error("Extra data")
+
+    def _find(self, keys: List[str], envelope: Dict[str, Any], location: str) -> Iterator[Any]:
+        """Stream the elements of the array at `keys` in the object being read."""
+        scanner = self._scanner
+        if not keys:
+            yield from self._array(location)
+            return
+
+        if scanner.peek() != "{":
+            raise UnmarshalError(f"Expected a json object at location = {location}, got {scanner.value()!r}")
+
+        found = False
+        scanner.expect("{")
+        empty = scanner.peek() == "}"
+        while not empty:
+            key = scanner.key()
+            if key == keys[0] and not found:
+                found = True
+                path = f"{location}.{key}" if location else key
+                if scanner.peek() == "n":
+                    # A null array has no elements.
+                    scanner.value()
+                elif len(keys) > 1:
+                    yield from self._find(keys[1:], envelope.setdefault(key, {}), path)
+                else:
+                    yield from self._array(path)
+            else:
+                envelope[key] = scanner.value()
+
+            if scanner.expect(",}") == "}":
+                break
+        if empty:
+            scanner.expect("}")
+
+        if not found:
+            raise UnmarshalError(
+                f"Expected json key is not present in object at position '{location}'. "
+                f"'{keys[0]}' not in {list(envelope.keys())}"
+            )
+
+    def _array(self, location: str) -> Iterator[Any]:
+        scanner = self._scanner
+        if scanner.peek() != "[":
+            raise UnmarshalError(f"Expected a json array at location = {location}, got {scanner.value()!r}")
+
+        scanner.expect("[")
+        if scanner.peek() == "]":
+            scanner.expect("]")
+            return
+
+        index = 0
+        while True:
+            yield self._unmarshaller.unmarshal_value(scanner.value(), self.schema, f"{location}.{index}")
+            index += 1
+            if scanner.expect(",]") == "]":
+                return
+
+
+class _Scanner:
+    """Read json tokens and values from a file object, buffering at most one value and one chunk."""
+
+    def __init__(self, fp: IO[Any], chunk_size: int) -> None:
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        # Number of characters dropped from the start of the buffer.
+        self.consumed = 0
+        self.eof = False
+        self.decoder: Optional[codecs.IncrementalDecoder] = None
+
+    def read(self) -> bool:
+        """Append the next chunk to the buffer, returns False at the end of the file."""
+        if self.eof:
+            return False
+
+        chunk = self._read_chunk()
+        # Drop what has been read from the buffer.
+        pos, self.pos = self.pos, 0
+        self.consumed += pos
+        self.buffer = self.buffer[pos:] + chunk
+        return True
+
+    def _read_chunk(self) -> str:
+        """Read the next chunk of the file, or "" at its end."""
+        chunk = self.fp.read(self.chunk_size)
+        self.eof = not chunk
+        if isinstance(chunk, bytes):
+            if self.decoder is None:
+                self.decoder = codecs.getincrementaldecoder("utf-8")()
+            chunk = self.decoder.decode(chunk, final=self.eof)
+        return chunk
+
+    def peek(self) -> str:
+        """Skip whitespace and get the next character, or "" at the end of the file."""
+        while True:
+            match = _NON_WHITESPACE.search(self.buffer, self.pos)
+            if match:
+                self.pos = match.start()
+                return self.buffer[self.pos]
+            self.pos = len(self.buffer)
+            if not self.read():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            self.error(f"Expecting one of {list(chars)}")
+        self.pos += 1
+        return char
+
+    def key(self) -> str:
+        if self.peek() != '"':
+            self.error("Expecting property name enclosed in double quotes")
+        key = self.value()
+        self.expect(":")
+        return key
+
+    def value(self) -> Any:
+        """Decode the next json value."""
+        char = self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.pos)
+                # A number at the end of the buffer may continue in the next chunk.
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    self.pos = e.pos
+                    self.error(e.msg)
+            self._read_value(char)
+
+    def _read_value(self, char: str) -> None:
+        """Read chunks until the buffer may hold the end of the value starting with `char`.
+
+        The chunks are joined once, rather than after each of them, when the
+        closing brackets balance the opening ones (or a quote ends a string),
+        or when the buffered size doubles (e.g. with brackets within strings).
+        """
+        closing = {"{": "}", "[": "]"}.get(char)
+        pos = self.pos
+        parts = [self.buffer[pos:]]
+        size = limit = len(parts[0])
+        opened = parts[0].count(char)
+        closed = parts[0].count(closing) if closing else 0
+        while True:
+            chunk = self._read_chunk()
+            parts.append(chunk)
+            size += len(chunk)
+            if closing:
+                opened += chunk.count(char)
+                closed += chunk.count(closing)
+                end = closed >= opened
+            else:
+                # Numbers, true, false and null are short: any chunk may end them.
+                end = char != '"' or '"' in chunk
+            if end or not chunk or size >= 2 * limit:
+                break
+
+        self.consumed += pos
+        self.buffer, self.pos = "".join(parts), 0
+
+    def error(self, msg: str) -> NoReturn:
+        raise UnmarshalError(f"Invalid json: {msg} at position {self.consumed + self.pos}")
+
+
+class Decoder:
+    """Incrementally unmarshal json documents received in chunks, e.g. from a socket.
+
+    The documents can be newline delimited (NDJSON) or simply concatenated.
+    Each call to `feed` returns the documents completed by the chunk,
+    unmarshalled into the dataclass schema. Chunks can be str or bytes (utf-8)
+    and split documents anywhere.
+
+    The "max_buffer_size" option bounds the size (in characters) of an
+    incomplete document held by the decoder; an UnmarshalError is raised and
+    the buffer is cleared when it is exceeded.
+
+    When a document cannot be decoded, an UnmarshalError is raised and the
+    document is skipped; the documents completed before it are returned by
+    the next call to `feed`.
+
+    The remaining options are the same as for `unmarshal`.
+    """
+
+    def __init__(
+        self,
+        schema: Any,
+        max_buffer_size: int = 16 * 1024 * 1024,
+        datetime_fmt: Optional[str] = None,
+        date_fmt: Optional[str] = None,
+        datetime_cache_size: int = 0,
+        epoch: Optional[str] = None,
+        uuid_format: Optional[str] = None,
+        intern: Optional[InternTable] = None,
+        output: Optional[str] = None,
+    ) -> None:
+        self.schema = schema
+        self.max_buffer_size = max_buffer_size
+        self._unmarshaller = _Unmarshaller(
+            None, schema, datetime_fmt, date_fmt, datetime_cache_size, epoch, uuid_format, intern, output
+        )
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._documents: List[Any] = []
+        # The data being scanned, and the parts of the incomplete document
+        # received in previous chunks, joined once the document is complete.
+        self._buffer = ""
+        self._pending: List[str] = []
+        self._pending_size = 0
+        # Scanning state: the position reached in the buffer, the start of the
+        # document being scanned (None between documents), the closing brackets
+        # of its open arrays/objects and whether the position is within a string.
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._closing: List[str] = []
+        self._in_string = False
+
+    def feed(self, chunk: Union[str, bytes]) -> List[Any]:
+        """Add a chunk of data, returning the documents it completes."""
+        if isinstance(chunk, bytes):
+            chunk = self._decoder.decode(chunk)
+        # The buffer is empty, unless an invalid document stopped the previous scan.
+        self._buffer += chunk
+        try:
+            self._scan()
+        finally:
+            self._trim()
+
+        documents, self._documents = self._documents, []
+        return documents
+
+    def close(self) -> List[Any]:
+        """Signal the end of the data, returning the last document if it was not terminated (e.g. `1`)."""
+        self._buffer += self._decoder.decode(b"", final=True)
+        self._decoder.reset()
+        try:
+            self._scan()
+            if self._start is not None:
+                # Only a number, true, false or null can be complete at the end of the data.
+                if self._closing or self._in_string:
+                    raise UnmarshalError("Invalid json: incomplete document at the end of the data")
+                self._decode(self._document(self._start, len(self._buffer)))
+        finally:
+            self._reset()
+
+        documents, self._documents = self._documents, []
+        return documents
+
+    def _scan(self) -> None:
+        """Find and decode the documents completed in the buffer."""
+        while self._start is not None or self._begin():
+            if not self._advance():
+                return
+
+            if not self._in_string and not self._closing:
+                start, self._start = cast(int, self._start), None
+                self._decode(self._document(start, self._pos))
+
+    def _document(self, start: int, end: int) -> str:
+        """Get the text of the document completed in the buffer, which may have begun in previous chunks."""
+        if not self._pending:
+            return self._buffer[start:end]
+        self._pending.append(self._buffer[start:end])
+        text = "".join(self._pending)
+        self._pending, self._pending_size = [], 0
+        return text
+
+    def _trim(self) -> None:
+        """Drop the scanned data from the buffer, setting aside the part of an incomplete document."""
+        start = self._start
+        if start is None:
+            pos = self._pos
+            self._buffer, self._pos = self._buffer[pos:], 0
+            return
+
+        size = self._pending_size + len(self._buffer) - start
+        if size > self.max_buffer_size:
+            self._reset()
+            raise UnmarshalError(
+                f"Incomplete json document exceeds max_buffer_size ({self.max_buffer_size})"
+            )
+        self._pending.append(self._buffer[start:])
+        self._pending_size = size
+        # The position can be past the end of the buffer after an escape character.
+        self._pos -= len(self._buffer)
+        self._buffer, self._start = "", 0
+
+    def _reset(self) -> None:
+        """Drop the buffered data and the scanning state."""
+        self._buffer, self._pending, self._pending_size = "", [], 0
+        self._pos, self._start, self._closing, self._in_string = 0, None, [], False
+
+    def _begin(self) -> bool:
+        """Find the start of the next document, returns False when more data is needed."""
+        while True:
+            match = _NON_WHITESPACE.search(self._buffer, self._pos)
+            if match is None:
+                self._pos = len(self._buffer)
+                return False
+
+            self._start = self._pos = match.start()
+            if not self._decode_line():
+                break
+
+        char = self._buffer[self._pos]
+        if char in "}]":
+            # A stray closing bracket, e.g. after an invalid document, is skipped.
+            self._start = None
+            self._pos += 1
+            raise UnmarshalError(f"Invalid json: unexpected {char!r}")
+        if char in "{[":
+            self._closing.append("}" if char == "{" else "]")
+            self._pos += 1
+        elif char == '"':
+            self._in_string = True
+            self._pos += 1
+        # Otherwise a number, true, false or null
+        return True
+
+    def _advance(self) -> bool:
+        """Move to the next character changing the state, returns False when more data is needed."""
+        if self._in_string:
+            pattern = _STRING_END
+        elif self._closing:
+            pattern = _STRUCTURE
+        else:
+            pattern = _SCALAR_END
+
+        match = pattern.search(self._buffer, self._pos)
+        if match is None:
+            # The position is past the end of the buffer after an escape character.
+            self._pos = max(self._pos, len(self._buffer))
+            return False
+
+        char = match.group()
+        if self._in_string:
+            # Skip escaped characters
+            self._pos = match.end() + (char == "\\")
+            self._in_string = char != '"'
+        elif self._closing:
+            self._pos = match.end()
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._closing.append("}" if char == "{" else "]")
+            elif char == self._closing[-1]:
+                self._closing.pop()
+            else:
+                # Mismatched brackets, the (invalid) document ends here.
+                self._closing.clear()
+        else:
+            self._pos = match.start()
+        return True
+
+    def _decode_line(self) -> bool:
+        """Decode a complete document at the start position at once, e.g. a line of NDJSON."""
+        if self._buffer.find("\n", self._pos) == -1:
+            return False
+
+        try:
+            data, end = _DECODER.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            # Incomplete, or invalid which is reported once it is complete.
+            return False
+
+        self._start = None
+        self._pos = end
+        self._documents.append(self._unmarshaller.unmarshal_value(data, self.schema, ""))
+        return True
+
+    def _decode(self, text: str) -> None:
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            # Skip the rest of the invalid document, e.g. the "}" of `{"a": ]}`.
+            match = _NOT_CLOSING.search(self._buffer, self._pos)
+            self._pos = match.start() if match else len(self._buffer)
+            raise UnmarshalError(f"Invalid json: {e}")
+        self._documents.append(self._unmarshaller.unmarshal_value(data, self.schema, ""))
+
+
+async def marshal_to_stream(
+    writer: asyncio.StreamWriter,
+    data: Any,
+    chunk_size: int = 65536,
+    datetime_fmt: Optional[str] = None,
+    date_fmt: Optional[str] = None,
+    datetime_cache_size: int = 0,
+    epoch: Optional[str] = None,
+    uuid_format: Optional[str] = None,
+) -> None:
+    """Marshal python dataclasses into json written to an asyncio stream, a chunk at a time.
+
+    Dataclasses and lists are encoded incrementally, the elements of lists
+    being marshalled a few at a time. Each time about "chunk_size" bytes have
+    been encoded, they are written and `writer.drain()` is awaited, so that the
+    encoded data does not pile up when the peer reads slowly, and other tasks
+    get to run.
+
+    The json is the same as `marshal(data)`, with the keys of objects in the
+    order of the dataclass fields.
+
+    The remaining options are the same as for `marshal`.
+    """
+    marshaller = _Marshaller(None, datetime_fmt, date_fmt, datetime_cache_size, epoch, uuid_format)
+    chunk: List[str] = []
+    size = 0
+    for text in _encode_incrementally(data, marshaller, None, ""):
+        chunk.append(text)
+        size += len(text)
+        if size >= chunk_size:
+            await _write(writer, chunk)
+            chunk, size = [], 0
+
+    if chunk:
+        await _write(writer, chunk)
+
+
+async def _write(writer: asyncio.StreamWriter, chunk: List[str]) -> None:
+    writer.write("".join(chunk).encode())
+    await writer.drain()
+    # drain() only waits when the transport's buffer is full.
+    await asyncio.sleep(0)
+
+
+def _encode_incrementally(
+    data: Any, marshaller: _Marshaller, field: Optional[dataclasses.Field], path: str
+) -> Iterator[str]:
+    """Encode data into pieces of json text, descending into dataclasses and lists."""
+    if (dataclasses.is_dataclass(data) and not isinstance(data, type)) or type(data) in _RECORD_FIELDS:
+        yield "{"
+        separator = ""
+        for field in _dataclass_fields(data):
+            value = getattr(data, field.name)
+            if _omit_field(field, value):
+                continue
+
+            json_key = _get_json_key(field)
+            yield f"{separator}{json.dumps(json_key)}: "
+            yield from _encode_incrementally(value, marshaller, field, f"{path}.{json_key}")
+            separator = ", "
+        yield "}"
+
+    elif type(data) in _ARRAY_TYPES:
+        if type(data) is set or type(data) is frozenset:
+            data = list(data)
+        yield "["
+        for start in range(0, len(data), _MARSHAL_BATCH_SIZE):
+            end = start + _MARSHAL_BATCH_SIZE
+            batch = _encode_values(data[start:end], lambda values: _marshal(values, marshaller, field, path))
+            yield ("" if start == 0 else ", ") + ", ".join(batch)
+        yield "]"
+
+    elif type(data) is RawJSON:
+        yield data.text
+
+    else:
+        yield json.dumps(_marshal([data], marshaller, field, path)[0])
+
+
+def _marshal(
+    values: List[Any], marshaller: _Marshaller, field: Optional[dataclasses.Field], path: str
+) -> List[Any]:
+    """Marshal values taken from a list, or from the field of a dataclass."""
+    if field is None:
+        return marshaller.marshal_value(values)
+    return marshaller.marshal_column(values, field, path)
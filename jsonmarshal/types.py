@@ -1,8 +1,11 @@
 from datetime import date, datetime
 from enum import Enum
+from functools import lru_cache
 from typing import Any, Union
 from uuid import UUID
 
+from jsonmarshal.raw import RawJSON
+
 try:
     from typing import get_args, get_origin  # type: ignore
 except ImportError:  # pragma: no cover
@@ -31,6 +34,12 @@ class _Type(Enum):
     ENUM = "ENUM"
     DATETIME = "DATETIME"
     DATE = "DATE"
+    NDARRAY = "NDARRAY"
+    ARRAY = "ARRAY"
+    ANY = "ANY"
+    RAW = "RAW"
+    MAPPING = "MAPPING"
+    UNION = "UNION"
 
 
 _TYPE_MAP = {
@@ -45,10 +54,18 @@ _TYPE_MAP = {
     UUID: _Type.UUID,
     dict: _Type.DICT,
     list: _Type.LIST,
+    tuple: _Type.LIST,
+    set: _Type.LIST,
+    frozenset: _Type.LIST,
+    Any: _Type.ANY,
+    RawJSON: _Type.RAW,
 }
 
 _PRIMITIVES = {_Type.STRING, _Type.INT, _Type.FLOAT, _Type.BOOL, _Type.NONETYPE}
 
+# The python types of the (non null) primitives
+_PRIMITIVE_TYPES = {str, int, float, bool}
+
 
 def _is_optional(t: Any) -> bool:
     """Determine if this type is a defined Optional[...] type."""
@@ -67,6 +84,7 @@ def _is_union(t: Any) -> bool:
     return get_origin(t) is Union
 
 
+@lru_cache(maxsize=None)
 def _get_optional_type(t: Any) -> Any:
     """Given a Optional type, return the type that is non-null"""
     valid = [t for t in get_args(t) if t is not NoneType]
@@ -0,0 +1,73 @@
+"""Decoding of unions of dataclasses tagged by the value of a discriminator field."""
+
+import dataclasses
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Dict
+
+from jsonmarshal.exceptions import UnmarshalError
+from jsonmarshal.fields import _get_json_key
+from jsonmarshal.types import NoneType, get_args
+
+
+class _TaggedUnion:
+    """Picks the dataclass of a union from the json value of their discriminator field."""
+
+    def __init__(self, discriminator: str, key: str, variants: Dict[Any, type]) -> None:
+        self.discriminator = discriminator
+        self.key = key
+        self.variants = variants
+
+    def variant(self, data: Any, location: str) -> type:
+        """Get the dataclass of the json object `data`, with one lookup whatever the number of variants."""
+        if type(data) is not dict:
+            raise UnmarshalError(
+                f"Expected an object tagged by '{self.key}', got '{data}' ({type(data)}) "
+                f"at location = {location}"
+            )
+
+        if self.key not in data:
+            raise UnmarshalError(f"Missing discriminator '{self.key}' in object at location = {location}")
+
+        tag = data[self.key]
+        try:
+            return self.variants[tag]
+        except (KeyError, TypeError):
+            raise UnmarshalError(
+                f"Unknown discriminator {tag!r} for '{self.key}', expected one of {list(self.variants)} "
+                f"at location = {location}"
+            )
+
+
+@lru_cache(maxsize=None)
+def _tagged_union(schema: Any, discriminator: str) -> _TaggedUnion:
+    """Build the table of the dataclasses of the union `schema`, keyed by the json value of their tag.
+
+    Each dataclass declares its tag as the default value of the discriminator
+    field, e.g. `kind: str = "click"`.
+    """
+    keys = set()
+    variants: Dict[Any, type] = {}
+    for variant in get_args(schema):
+        if variant is NoneType:
+            continue
+
+        field = getattr(variant, "__dataclass_fields__", {}).get(discriminator)
+        if field is None or field.default is dataclasses.MISSING:
+            raise UnmarshalError(
+                f"Unions tagged by '{discriminator}' require dataclasses with a '{discriminator}' field "
+                f"holding their tag as default value, got {variant} in {schema}"
+            )
+
+        tag = field.default.value if isinstance(field.default, Enum) else field.default
+        if tag in variants:
+            raise UnmarshalError(f"Duplicate tag {tag!r} for {variants[tag]} and {variant} in {schema}")
+        variants[tag] = variant
+        keys.add(_get_json_key(field))
+
+    if len(keys) != 1:
+        raise UnmarshalError(
+            f"The '{discriminator}' fields of the dataclasses of {schema} must use the same json key, "
+            f"got {sorted(keys)}"
+        )
+    return _TaggedUnion(discriminator, keys.pop(), variants)
@@ -1,27 +1,63 @@
+import array
 import dataclasses
 import inspect
 from datetime import date, datetime
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional, TypeVar
-
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar, cast
+from uuid import UUID
+
+from jsonmarshal.arrays import _NUMERIC_KINDS, _to_numeric_ndarray
+from jsonmarshal.construct import _constructor, _record_constructor, _validate_output
+from jsonmarshal.datetimes import _DatetimeParser, _from_epoch, _parse_datetime64, _validate_epoch
+from jsonmarshal.enums import _enum_table
 from jsonmarshal.exceptions import UnmarshalError
 from jsonmarshal.fields import _get_json_key
+from jsonmarshal.indexing import _Index, _validate_index, _validate_index_schema
+from jsonmarshal.interning import InternTable
+from jsonmarshal.lazy import LazyList
+from jsonmarshal.raw import RawJSON
 from jsonmarshal.types import (
+    _PRIMITIVE_TYPES,
     _PRIMITIVES,
     _TYPE_MAP,
+    NoneType,
     _get_optional_type,
     _is_optional,
     _is_typing,
     _is_union,
     _Type,
+    get_args,
+    get_origin,
 )
+from jsonmarshal.unions import _tagged_union
+from jsonmarshal.utils.optional import numpy as np
+from jsonmarshal.uuids import _uuid_decoder, _validate_uuid_format
 
 T = TypeVar("T")
 
+# The decoders of json keys (strings) other than the ones of simple values, see `decode_keys`.
+_KEY_DECODERS: Dict[Any, Callable[[str], Any]] = {int: int, float: float}
+
+# The origins of the schemas of json arrays.
+_ARRAY_ORIGINS = {list, tuple, set, frozenset}
+
 
 # Special types that need further processing
 # None is included here as it also needs custom handling.
-_CUSTOM_TYPES = {_Type.NONETYPE, _Type.UUID, _Type.ENUM, _Type.DATETIME, _Type.DATE}
+_CUSTOM_TYPES = {
+    _Type.NONETYPE,
+    _Type.UUID,
+    _Type.ENUM,
+    _Type.DATETIME,
+    _Type.DATE,
+    _Type.NDARRAY,
+    _Type.ARRAY,
+    _Type.ANY,
+    _Type.RAW,
+    _Type.MAPPING,
+    _Type.UNION,
+}
 
 
 def unmarshal(
@@ -29,6 +65,18 @@ def unmarshal(
     schema: T,
     datetime_fmt: Optional[str] = None,
     date_fmt: Optional[str] = None,
+    datetime_cache_size: int = 0,
+    epoch: Optional[str] = None,
+    uuid_format: Optional[str] = None,
+    intern: Optional[InternTable] = None,
+    output: Optional[str] = None,
+    lazy: bool = False,
+    where: Optional[Callable[[Any], bool]] = None,
+    index_by: Optional[str] = None,
+    group_by: Optional[str] = None,
+    duplicates: str = "error",
+    tuples: bool = False,
+    discriminator: Optional[str] = None,
 ) -> T:
     """Unmarshal a response containing loaded json (json.load(s)) into a specified dataclass schema.
 
@@ -40,8 +88,88 @@ def unmarshal(
 
     Both "datetime_fmt" and "date_fmt" options use the strftime/strptime behaviour:
     https://docs.python.org/3/library/datetime.html#strftime-strptime-behavior
+
+    The "datetime_cache_size" option enables a bounded LRU cache of the
+    parsed date/datetime strings. This is useful when the same timestamps
+    are repeated throughout the response.
+
+    The "epoch" option specifies that dates/datetimes are represented as a
+    number of seconds ("s") or milliseconds ("ms") since the unix epoch.
+    These are unmarshalled into UTC datetimes. The option can also be set
+    per field using `json_field(epoch=...)`.
+
+    The "uuid_format" option specifies how UUIDs are represented: "str"
+    (default), "hex" (32 hex digits), "int" or "bytes" (16 raw bytes, for
+    binary transports). The option can also be set per field using
+    `json_field(uuid_format=...)`.
+
+    The "intern" option takes an `InternTable` used to deduplicate the
+    decoded strings, see `InternTable` for details.
+
+    The "output" option specifies what the dataclasses are decoded into:
+    "dataclass" (default) or "record". Records are compact, read-only named
+    tuples with the same name and attributes as the dataclass, which is useful
+    for holding large amounts of data for analysis.
+
+    The "lazy" option decodes the lists of dataclasses into `LazyList`s, which
+    unmarshal each element the first time it is accessed. This is useful when
+    only a part of large lists is read. The option can also be set per field
+    using `json_field(lazy=True)`, for lists of any type.
+
+    Values typed as `Any` are passed through without being processed. Values
+    typed as `RawJSON` are wrapped as they are, to be emitted again by marshal
+    without being walked, see `RawJSON`.
+
+    The "where" option filters the elements of a response that is a list:
+    it is called with each element as loaded json (e.g. the dict of an
+    object, keyed by the json keys) and the elements for which it returns
+    False are skipped without being unmarshalled. It requires the schema of
+    a json array, or a `Dict` schema with the "index_by" or "group_by"
+    options.
+
+    The "index_by" option decodes a response that is a list of dataclasses
+    into a dict keyed by the value of the named field of each dataclass,
+    with a `Dict[K, V]` schema (a ValueError is raised otherwise). The "duplicates" option specifies what is
+    done when elements have the same key: raise an UnmarshalError ("error",
+    default), keep the "first" or the "last" element. Similarly, the
+    "group_by" option decodes the list into a dict of lists of the elements
+    with the same key, with a `Dict[K, List[V]]` schema. Both options can
+    also be set per field using `json_field(index_by=...)`.
+
+    Json arrays are unmarshalled into lists, or into tuples, sets and
+    frozensets when typed as `Tuple[X, ...]`, `Set[X]` or `FrozenSet[X]`. The
+    "tuples" option unmarshals the arrays typed as `List[X]` into tuples too,
+    which take less memory (except for lazy lists).
+
+    The "discriminator" option specifies the field tagging the dataclasses
+    of the `Union[A, B, ...]` schemas. Each dataclass holds its tag as the
+    default value of that field, e.g. `kind: str = "click"`, and each json
+    object is decoded into the dataclass matching its tag with a single
+    lookup. The option can also be set per field using
+    `json_field(discriminator=...)`.
     """
-    unmarshaller = _Unmarshaller(response, schema, datetime_fmt, date_fmt)
+    if where is not None:
+        _validate_where(schema, index_by is not None or group_by is not None)
+        if type(response) is list:
+            response = [elem for elem in response if where(elem)]
+
+    unmarshaller = _Unmarshaller(
+        response,
+        schema,
+        datetime_fmt,
+        date_fmt,
+        datetime_cache_size,
+        epoch,
+        uuid_format,
+        intern,
+        output,
+        lazy,
+        index_by,
+        group_by,
+        duplicates,
+        tuples,
+        discriminator,
+    )
     return unmarshaller.unmarshal()
 
 
@@ -51,10 +179,13 @@ class _ResultContainer:
     schema: Any
     parent: str
     path: str
-    parent_path: str
+    parent_item: Optional["_ResultContainer"]
+    field: Optional[dataclasses.Field] = None
     cleaned: bool = False
     unmarshalled: bool = False
     _schema_type: _Type = _Type.NOT_SET
+    index: Optional[_Index] = None
+    _container_schema: Any = None
 
     @property
     def schema_type(self) -> _Type:
@@ -63,20 +194,42 @@ class _ResultContainer:
             self._schema_type = _get_type(self.schema, self.data)
         return self._schema_type
 
+    @property
+    def container_schema(self) -> Any:
+        # The schema of a list, tuple, set or dict.
+        if self._container_schema is None:
+            if _is_union(self.schema):
+                # If this is a union, we need to get the valid part of that union.
+                self._container_schema = _get_optional_type(self.schema)
+            else:
+                self._container_schema = self.schema
+        return self._container_schema
+
     @property
     def inner_schema(self) -> type:
-        if _is_union(self.schema):
-            # If this is a union, we need to get the valid part of that union.
-            schema = _get_optional_type(self.schema)
-        else:
-            schema = self.schema
+        args = get_args(self.container_schema)
+        return args[0] if args else Any
 
-        return schema.__args__[0]
+    @property
+    def index_schema(self) -> Any:
+        # The Dict[K, V] schema of a list decoded into a dict, None for other lists.
+        schema = self.container_schema
+        return schema if get_origin(schema) is dict else None
+
+    @property
+    def mapping_schema(self) -> Tuple[Any, Any]:
+        # The key and value schemas of a Dict[K, V].
+        return get_args(self.container_schema) or (Any, Any)
 
     @property
     def schema_fields(self) -> Dict[str, dataclasses.Field]:
         return self.schema.__dataclass_fields__
 
+    @property
+    def metadata(self) -> Any:
+        # The json_field options of the dataclass field this item belongs to.
+        return self.field.metadata if self.field is not None else {}
+
     @property
     def data_keys(self) -> List[str]:
         return list(self.data.keys())
@@ -90,12 +243,11 @@ class _ResultContainer:
             # Special types that don't get cleaned automatically
             return
 
-        errmsg = (
-            f"Invalid schema. schema = {self.schema}, data = '{self.data}' ({type(self.data)}) "
-            f"at location = {self.parent}"
-        )
         if _TYPE_MAP[type(self.data)] != self.schema_type:
-            raise UnmarshalError(errmsg)
+            raise UnmarshalError(
+                f"Invalid schema. schema = {self.schema}, data = '{self.data}' ({type(self.data)}) "
+                f"at location = {self.parent}"
+            )
 
 
 class _Unmarshaller:
@@ -105,10 +257,35 @@ class _Unmarshaller:
         schema: Any,
         datetime_fmt: Optional[str] = None,
         date_fmt: Optional[str] = None,
+        datetime_cache_size: int = 0,
+        epoch: Optional[str] = None,
+        uuid_format: Optional[str] = None,
+        intern: Optional[InternTable] = None,
+        output: Optional[str] = None,
+        lazy: bool = False,
+        index_by: Optional[str] = None,
+        group_by: Optional[str] = None,
+        duplicates: str = "error",
+        tuples: bool = False,
+        discriminator: Optional[str] = None,
     ) -> None:
-        self.result = [_ResultContainer(data=response, schema=schema, parent="", parent_path="", path="")]
+        _validate_epoch(epoch)
+        _validate_uuid_format(uuid_format)
+        _validate_output(output)
+        self.result = [_ResultContainer(data=response, schema=schema, parent="", parent_item=None, path="")]
         self.datetime_fmt = datetime_fmt
         self.date_fmt = date_fmt
+        self.datetimes = _DatetimeParser(datetime_fmt, date_fmt, datetime_cache_size)
+        self.epoch = epoch
+        self.uuid_format = uuid_format
+        self.intern = intern
+        self.construct = _record_constructor if output == "record" else _constructor
+        self.lazy = lazy
+        self.tuples = tuples
+        self.discriminator = discriminator
+        _validate_index(index_by, group_by, duplicates)
+        _validate_index_schema(index_by, group_by, schema)
+        self.index = _Index.from_options(index_by, group_by, duplicates)
         self.dump: List[_ResultContainer] = []
         self.processors: Dict[Any, Callable[[_ResultContainer], None]] = {
             _Type.LIST: self.process_list,
@@ -117,6 +294,12 @@ class _Unmarshaller:
             _Type.UUID: self.process_uuid,
             _Type.DATETIME: self.process_datetime,
             _Type.DATE: self.process_date,
+            _Type.NDARRAY: self.process_ndarray,
+            _Type.ARRAY: self.process_array,
+            _Type.MAPPING: self.process_mapping,
+            _Type.ANY: self.process_any,
+            _Type.RAW: self.process_raw,
+            _Type.UNION: self.process_union,
         }
         # Add each primitive individually
         for t in _PRIMITIVES:
@@ -138,41 +321,251 @@ class _Unmarshaller:
 
         return item.data
 
+    def unmarshal_column(
+        self, values: List[Any], schema: Any, field: dataclasses.Field, path: str
+    ) -> List[Any]:
+        # Unmarshal the values of a dataclass field taken from many objects at once.
+        # The stacks are reset, as a previous value may have failed halfway through.
+        self.dump = []
+        self.result = [
+            _ResultContainer(
+                data=values, schema=List[schema], parent=path, parent_item=None, path=path, field=field
+            )
+        ]
+        return self.unmarshal()
+
+    def unmarshal_value(self, data: Any, schema: Any, path: str) -> Any:
+        # Unmarshal another value with the same options, e.g. the elements of a streamed array.
+        # The stacks are reset, as a previous value may have failed halfway through.
+        self.dump = []
+        self.result = [_ResultContainer(data=data, schema=schema, parent=path, parent_item=None, path=path)]
+        return self.unmarshal()
+
     def get_item(self) -> _ResultContainer:
         item = self.result.pop()
         item.validate_schema()
         return item
 
     def process_list(self, item: _ResultContainer) -> None:
-        if item.cleaned is False:
+        if item.cleaned is False and item.index_schema is not None:
+            # A list decoded into a dict by the index_by/group_by options.
+            item = self._clean_indexed_list(item, item.index_schema)
+        elif item.cleaned is False and self.is_lazy(item):
+            # The elements are decoded when they are accessed.
+            item.data = self.lazy_list(item)
+            item.cleaned = True
+            item.unmarshalled = True
+        elif item.cleaned is False and self.decode_list_in_bulk(item):
+            # Every element was decoded at once, there are no children to process.
+            self.complete_list(item)
+        elif item.cleaned is False:
             item = self._clean_list(item)
-        else:
+        elif item.index is None:
             # If this is the second time we are seeing the list, it should already have all of its
             # children correctly marshalled and re-appended to it. So it should now be complete.
+            self.complete_list(item)
+        else:
             item.unmarshalled = True
 
         # Put original (now empty item) back onto the result queue
         self.result.append(item)
 
-    def _clean_list(self, item: _ResultContainer) -> _ResultContainer:
-        index = 0
-        while item.data:
-            # Remove the element from the data (in order)
-            elem = item.data.pop(0)
+    def complete_list(self, item: _ResultContainer) -> None:
+        # Collect the unmarshalled elements into a tuple or a set, depending on the schema.
+        collect = _collector(item.container_schema, self.tuples)
+        if collect is not None:
+            try:
+                item.data = collect(item.data)
+            except TypeError as e:
+                raise UnmarshalError(f"Unable to collect the elements into a {collect.__name__}: {e}")
+        item.cleaned = True
+        item.unmarshalled = True
+
+    def is_lazy(self, item: _ResultContainer) -> bool:
+        if not item.metadata.get("lazy") and not (self.lazy and dataclasses.is_dataclass(item.inner_schema)):
+            return False
+
+        # Only lists are decoded lazily.
+        return get_origin(item.container_schema) is list
+
+    def lazy_list(self, item: _ResultContainer) -> LazyList:
+        schema, parent, path, field = item.inner_schema, item.parent, item.path, item.field
+
+        def decode(data: Any, index: int) -> Any:
+            # Elements can be decoded at any time, e.g. while unmarshalling another list.
+            state = self.result, self.dump
+            self.result = [
+                _ResultContainer(
+                    data=data,
+                    schema=schema,
+                    parent=parent,
+                    parent_item=None,
+                    path=f"{path}.{index}",
+                    field=field,
+                )
+            ]
+            self.dump = []
+            try:
+                return self.unmarshal()
+            finally:
+                self.result, self.dump = state
+
+        return LazyList(item.data, decode)
+
+    def decode_list_in_bulk(self, item: _ResultContainer) -> bool:
+        # Lists of simple values can be decoded in one pass without creating a
+        # container per element. Returns False when the list needs to be processed
+        # element by element, e.g. to report which element is invalid.
+        if not item.data:
+            return False
+
+        values = self.decode_in_bulk(item.data, item.inner_schema, item)
+        if values is None:
+            return False
+        item.data = values
+        return True
+
+    def decode_in_bulk(
+        self, values: Iterable[Any], schema: Any, item: _ResultContainer
+    ) -> Optional[List[Any]]:
+        # Decode the simple values of a list or a dict, returns None when they
+        # need to be processed one by one.
+        if schema is Any:
+            return list(values)
+
+        if schema in _PRIMITIVE_TYPES:
+            if not all(type(v) is schema for v in values):
+                return None
+            if self.intern is not None and schema is str:
+                field_name = item.field.name if item.field is not None else None
+                return [self.intern.intern_field(v, field_name) for v in values]
+            return list(values)
+
+        decode = self.element_decoder(schema, item.metadata)
+        if decode is None:
+            return None
+
+        try:
+            return [decode(v) for v in values]
+        except (ValueError, TypeError, AttributeError, OverflowError):
+            return None
+
+    def element_decoder(self, schema: Any, metadata: Any) -> Optional[Callable[[Any], Any]]:
+        # The function decoding each of the elements of a list or dict, if they are simple values.
+        if not _is_optional(schema):
+            return self._element_decoder(schema, metadata)
+
+        decode = self._element_decoder(_get_optional_type(schema), metadata)
+        return None if decode is None else _nullable(decode)
+
+    def _element_decoder(self, schema: Any, metadata: Any) -> Optional[Callable[[Any], Any]]:
+        epoch = metadata.get("epoch") or self.epoch
+
+        if schema is UUID:
+            return _uuid_decoder(metadata.get("uuid_format") or self.uuid_format)
+
+        if inspect.isclass(schema) and issubclass(schema, Enum):
+            return partial(
+                _enum_table(schema).member, case_insensitive=metadata.get("case_insensitive", False)
+            )
+
+        if schema is datetime:
+            return partial(_from_epoch, unit=epoch) if epoch else self.datetimes.parse_datetime
+
+        if schema is date:
+            return partial(_date_from_epoch, unit=epoch) if epoch else self.datetimes.parse_date
+
+        return None
+
+    def _clean_indexed_list(self, item: _ResultContainer, schema: Any) -> _ResultContainer:
+        if item.parent_item is None:
+            index = self.index
+        else:
+            metadata = item.metadata
+            index = _Index.from_options(
+                metadata.get("index_by"), metadata.get("group_by"), metadata.get("duplicates", "error")
+            )
+        if index is None:
+            raise UnmarshalError(
+                f"Invalid schema. schema = {item.schema}, data = '{item.data}' ({type(item.data)}) "
+                f"at location = {item.parent}"
+            )
+
+        item = self._clean_list(item, index.element_schema(schema, item.parent))
+        # The elements are added to the dict as they are unmarshalled (see promote).
+        item.data = {}
+        item.index = index
+        return item
+
+    def _clean_list(self, item: _ResultContainer, schema: Any = None) -> _ResultContainer:
+        for index, elem in enumerate(item.data):
             self.dump.append(
                 _ResultContainer(
                     data=elem,
-                    schema=item.inner_schema,
+                    schema=schema or item.inner_schema,
                     parent=item.parent,
-                    parent_path=item.path,
+                    parent_item=item,
                     path=f"{item.path}.{index}",
+                    field=item.field,
+                )
+            )
+
+        # The unmarshalled elements are appended to a new list (in order)
+        item.data = []
+        item.cleaned = True
+        return item
+
+    def process_mapping(self, item: _ResultContainer) -> None:
+        key_schema, value_schema = item.mapping_schema
+        if item.cleaned is False:
+            values = self.decode_in_bulk(item.data.values(), value_schema, item)
+            if values is None:
+                # The values are unmarshalled one by one, the keys are decoded once they are done.
+                item = self._clean_mapping(item, value_schema)
+                self.result.append(item)
+                return
+            item.data = dict(zip(item.data, values))
+
+        item.data = self.decode_keys(item, key_schema)
+        item.cleaned = True
+        item.unmarshalled = True
+        self.result.append(item)
+
+    def _clean_mapping(self, item: _ResultContainer, schema: Any) -> _ResultContainer:
+        for key, value in item.data.items():
+            self.dump.append(
+                _ResultContainer(
+                    data=value,
+                    schema=schema,
+                    parent=key,
+                    parent_item=item,
+                    path=f"{item.path}.{key}",
+                    field=item.field,
                 )
             )
-            index += 1
 
+        # The unmarshalled values are set back under their (json) key, in order
+        item.data = {}
         item.cleaned = True
         return item
 
+    def decode_keys(self, item: _ResultContainer, schema: Any) -> Dict[Any, Any]:
+        # Json keys are strings, they are decoded into other types of keys (ints, enums, dates...).
+        if schema is str or schema is Any:
+            return item.data
+
+        decode = _KEY_DECODERS.get(schema) or self._element_decoder(schema, item.metadata)
+        if decode is None:
+            raise UnmarshalError(f"Dict keys of type {schema} are not supported at location = {item.parent}")
+
+        decoded = {}
+        for key, value in item.data.items():
+            try:
+                decoded[decode(key)] = value
+            except (ValueError, TypeError, AttributeError, OverflowError):
+                raise UnmarshalError(f"Unable to use key '{key}' as {schema} at location = {item.parent}")
+        return decoded
+
     def process_dict(self, item: _ResultContainer) -> None:
         if not item.cleaned:
             # Go through each known field and fix the keys in the original dictionary
@@ -181,7 +574,7 @@ class _Unmarshaller:
         if not self.dump and item.unmarshalled is False:
             # This item has no children, we can safely unmarshal it to the specified datatype
             item.unmarshalled = True
-            item.data = item.schema(**item.data)
+            item.data = self.construct(item.schema)(item.data)
 
         self.result.append(item)
 
@@ -216,8 +609,9 @@ class _Unmarshaller:
                 data=v,
                 schema=schema_type,
                 parent=data_key,
-                parent_path=item.path,
+                parent_item=item,
                 path=f"{item.path}.{data_key}",
+                field=item.schema_fields[data_key],
             )
 
             if child.schema_type not in _PRIMITIVES:
@@ -225,12 +619,17 @@ class _Unmarshaller:
             else:
                 # We want to validate that the primitives are actually using the specified data
                 child.validate_schema()
+                if self.intern is not None and type(v) is str:
+                    item.data[data_key] = self.intern.intern_field(v, data_key)
 
         item.cleaned = True
         return item
 
     def process_primitive(self, item: _ResultContainer) -> None:
         # Just need to set the cleaned flag for a primtive and put it back on the list
+        if self.intern is not None and type(item.data) is str:
+            field_name = item.field.name if item.field is not None else None
+            item.data = self.intern.intern_field(item.data, field_name)
         item.cleaned = True
         item.unmarshalled = True
         self.result.append(item)
@@ -242,7 +641,7 @@ class _Unmarshaller:
             schema = item.schema
         try:
             # Try to cast the data value into the specified enum type.
-            v = schema(item.data)
+            v = _enum_table(schema).member(item.data, item.metadata.get("case_insensitive", False))
         except ValueError:
             raise UnmarshalError(f"Unable to use data value '{item.data}' as Enum {item.schema}")
 
@@ -252,12 +651,9 @@ class _Unmarshaller:
         self.result.append(item)
 
     def process_uuid(self, item: _ResultContainer) -> None:
-        if _is_union(item.schema):
-            schema = _get_optional_type(item.schema)
-        else:
-            schema = item.schema
+        decode = _uuid_decoder(item.metadata.get("uuid_format") or self.uuid_format)
         try:
-            v = schema(item.data)
+            v = decode(item.data)
         except (ValueError, TypeError, AttributeError):
             raise UnmarshalError(f"Unable to use data value '{item.data}' as UUID {item.schema}")
 
@@ -267,68 +663,132 @@ class _Unmarshaller:
         self.result.append(item)
 
     def process_datetime(self, item: _ResultContainer) -> None:
-        data = item.data
-        if self.datetime_fmt:
-            # Prioritise the users specified time format.
-            v = datetime.strptime(item.data, self.datetime_fmt)
+        epoch = item.metadata.get("epoch") or self.epoch
+        if epoch:
+            item.data = self.from_epoch(item, epoch)
         else:
-            data = f"{data[:-1]}+00:00" if data.endswith("Z") else data
-            v = datetime.fromisoformat(data)
-        item.data = v
+            item.data = self.datetimes.parse_datetime(item.data)
         item.cleaned = True
         item.unmarshalled = True
         self.result.append(item)
 
     def process_date(self, item: _ResultContainer) -> None:
-        if self.date_fmt:
-            # Prioritise the users specified date format.
-            v = datetime.strptime(item.data, self.date_fmt).date()
+        epoch = item.metadata.get("epoch") or self.epoch
+        if epoch:
+            item.data = self.from_epoch(item, epoch).date()
         else:
-            v = date.fromisoformat(item.data)
-        item.data = v
+            item.data = self.datetimes.parse_date(item.data)
+        item.cleaned = True
+        item.unmarshalled = True
+        self.result.append(item)
+
+    @staticmethod
+    def from_epoch(item: _ResultContainer, epoch: str) -> datetime:
+        try:
+            return _from_epoch(item.data, epoch)
+        except (TypeError, OverflowError):
+            raise UnmarshalError(
+                f"Unable to use data value '{item.data}' as epoch timestamp ({epoch}) "
+                f"at location = {item.parent}"
+            )
+
+    def process_ndarray(self, item: _ResultContainer) -> None:
+        dtype = item.metadata.get("dtype")
+        kind = np.dtype(dtype).kind if dtype is not None else None
+        if kind != "M" and (kind is None or kind not in _NUMERIC_KINDS):
+            raise UnmarshalError(
+                f"numpy.ndarray fields require a datetime64 or numeric dtype (json_field(dtype=...)), "
+                f"got {dtype} at location = {item.parent}"
+            )
+        self.validate_array_data(item)
+        try:
+            # Decode the whole list in a single vectorized call.
+            if kind == "M":
+                item.data = _parse_datetime64(item.data, dtype)
+            else:
+                item.data = _to_numeric_ndarray(item.data, dtype)
+        except (ValueError, TypeError, OverflowError):
+            raise UnmarshalError(
+                f"Unable to use data value '{item.data}' as {dtype} at location = {item.parent}"
+            )
         item.cleaned = True
         item.unmarshalled = True
         self.result.append(item)
 
+    def process_array(self, item: _ResultContainer) -> None:
+        typecode = item.metadata.get("typecode")
+        if typecode is None:
+            raise UnmarshalError(
+                "array.array fields require a typecode (json_field(typecode=...)) "
+                f"at location = {item.parent}"
+            )
+        self.validate_array_data(item)
+        try:
+            # Decode the whole list in a single call.
+            item.data = array.array(typecode, item.data)
+        except (TypeError, OverflowError):
+            raise UnmarshalError(
+                f"Unable to use data value '{item.data}' as array('{typecode}') at location = {item.parent}"
+            )
+        item.cleaned = True
+        item.unmarshalled = True
+        self.result.append(item)
+
+    def process_any(self, item: _ResultContainer) -> None:
+        # Values typed as Any are kept as they are, without being validated or walked.
+        item.cleaned = True
+        item.unmarshalled = True
+        self.result.append(item)
+
+    def process_raw(self, item: _ResultContainer) -> None:
+        item.data = RawJSON(item.data)
+        item.cleaned = True
+        item.unmarshalled = True
+        self.result.append(item)
+
+    def process_union(self, item: _ResultContainer) -> None:
+        discriminator = item.metadata.get("discriminator") or self.discriminator
+        if discriminator is None:
+            # Besides Optional[X], only the unions tagged by a discriminator are supported.
+            _validate_union_is_optional(item.schema)
+
+        # The dataclass is picked with the tag of the object (which is a dict), it is
+        # then processed like any other.
+        item.schema = _tagged_union(item.schema, discriminator).variant(item.data, item.parent)
+        item._schema_type = _Type.DICT
+        self.process_dict(item)
+
+    @staticmethod
+    def validate_array_data(item: _ResultContainer) -> None:
+        if type(item.data) is not list:
+            raise UnmarshalError(
+                f"Invalid schema. schema = {item.schema}, data = '{item.data}' ({type(item.data)}) "
+                f"at location = {item.parent}"
+            )
+
     def promote(self) -> None:
-        # promote combines the last element with it's parents.
+        # promote combines the last element with it's parent.
 
         if self.dump:
             # If the dump contains items, then there is still stuff to process
             self.flush_dump()
             return
 
-        while len(self.result) >= 2:
-            item = self.result.pop()
-            prev = self.result.pop()
-
-            if item.unmarshalled is False:
-                # item is not ready to be promoted, move onto next one.
-                self.dump.append(item)
-                self.result.append(prev)
-                continue
-
-            # Check to see if the item can be attached to the previous key/array
-            if item.parent_path != prev.path:
-                # This item cannot be attached to the parent. see if it can be attached to the one after.
-                self.result.append(item)
-                self.dump.append(prev)
-                continue
-
-            if prev.schema_type == _Type.LIST:
-                prev.data.append(item.data)
-                self.result.append(prev)
-                continue
-
-            if prev.schema_type == _Type.DICT:
-                # Put the object on the parents data key then back onto the result queue
-                prev.data[item.parent] = item.data
-                # prev has been updated so needs further processing
-                self.result.append(prev)
-                continue
+        if len(self.result) < 2 or self.result[-1].unmarshalled is False:
+            # item is not ready to be promoted, it will be processed again.
+            return
 
-        # Ensure that we haven't left anything in the dump
-        self.flush_dump()
+        item = self.result.pop()
+        parent = cast(_ResultContainer, item.parent_item)
+
+        # Children are processed depth first, so the elements of a list are
+        # completed (and appended) in order.
+        if parent.index is not None:
+            parent.index.add(parent.data, item.data, item.parent)
+        elif parent.schema_type == _Type.LIST:
+            parent.data.append(item.data)
+        else:
+            parent.data[item.parent] = item.data
 
     def flush_dump(self) -> None:
         # Put all dumped items back onto the result queue
@@ -349,6 +809,17 @@ class _Unmarshaller:
         )
 
 
+def _nullable(decode: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    def decode_nullable(value: Any) -> Any:
+        return None if value is None else decode(value)
+
+    return decode_nullable
+
+
+def _date_from_epoch(value: Any, unit: str) -> date:
+    return _from_epoch(value, unit).date()
+
+
 def _is_field_optional(field: dataclasses.Field) -> bool:
     return _is_optional(field.type)
 
@@ -368,15 +839,44 @@ def _get_type(schema: Any, data: Any) -> _Type:
         # Date check must come after datetime as datetime is a subclass of date
         return _Type.DATE
 
+    if np is not None and schema is np.ndarray:
+        return _Type.NDARRAY
+
+    if schema is array.array:
+        return _Type.ARRAY
+
     if _is_union(schema):
-        _validate_union_is_optional(schema)
-        return _get_matching_union_type(schema, data)
+        return _get_union_type(schema, data)
 
     if _is_typing(schema):
         # The data hasn't matched any previous check.
         # assuming it is a typing.* type which can be determined
         # from the __origin__ attribute
-        schema = schema.__origin__
+        return _get_origin_type(schema, data)
+
+    return _get_class_type(schema, data)
+
+
+def _validate_where(schema: Any, indexed: bool) -> None:
+    # The where option filters the elements of a json array, which may be decoded into a dict when indexed.
+    origin = get_origin(_get_optional_type(schema) if _is_optional(schema) else schema)
+    if origin not in _ARRAY_ORIGINS and not (indexed and origin is dict):
+        raise ValueError(f"The where option requires the schema of a json array, got {schema}")
+
+
+def _collector(schema: Any, tuples: bool) -> Optional[Callable[[List[Any]], Any]]:
+    # The type the elements of a json array are collected into, None for lists.
+    origin = getattr(schema, "__origin__", schema)
+    if origin is tuple or origin is set or origin is frozenset:
+        return origin
+
+    return tuple if tuples else None
+
+
+def _get_class_type(schema: Any, data: Any) -> _Type:
+    if schema is dict and type(data) is dict:
+        # A bare dict is decoded as a Dict[Any, Any].
+        return _Type.MAPPING
 
     if schema in _TYPE_MAP:
         return _TYPE_MAP[schema]
@@ -384,6 +884,38 @@ def _get_type(schema: Any, data: Any) -> _Type:
     raise UnmarshalError(f"Schema type '{schema}' is not currently supported.")
 
 
+def _get_origin_type(schema: Any, data: Any) -> _Type:
+    origin = schema.__origin__
+    if origin is dict and type(data) is list:
+        # Lists decoded into dicts by the index_by/group_by options.
+        return _Type.LIST
+
+    if origin is dict and type(data) is dict:
+        return _Type.MAPPING
+
+    if origin is tuple and get_args(schema) and get_args(schema)[1:] != (Ellipsis,):
+        # Only tuples of any length, the elements all having the same schema, are supported.
+        raise UnmarshalError(
+            f"Schema type '{schema}' is not currently supported, tuples must be typed as Tuple[X, ...]."
+        )
+
+    if origin in _TYPE_MAP:
+        return _TYPE_MAP[origin]
+
+    raise UnmarshalError(f"Schema type '{origin}' is not currently supported.")
+
+
+def _get_union_type(schema: Any, data: Any) -> _Type:
+    if _is_optional(schema):
+        return _get_matching_union_type(schema, data)
+
+    if data is None and NoneType in get_args(schema):
+        return _Type.NONETYPE
+
+    # Other unions are tagged unions of dataclasses, see process_union.
+    return _Type.UNION
+
+
 def _validate_union_is_optional(schema: Any) -> None:
     # Currently only supporting unions that denote Optional types.
     # Raising error if this is not the case
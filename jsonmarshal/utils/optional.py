@@ -0,0 +1,8 @@
+"""
+Optional third party dependencies. These are set to None when not installed.
+"""
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None  # type: ignore
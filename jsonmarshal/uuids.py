@@ -0,0 +1,87 @@
+"""Conversion of json values to and from UUIDs."""
+
+from typing import Any, Callable, Dict, Optional
+from uuid import UUID, SafeUUID
+
+_new = object.__new__
+_setattr = object.__setattr__
+_UNKNOWN = SafeUUID.unknown
+
+
+def _from_int(value: int) -> UUID:
+    """Create a UUID from a 128 bit int without going through `UUID.__init__`."""
+    uuid = _new(UUID)
+    _setattr(uuid, "int", value)
+    _setattr(uuid, "is_safe", _UNKNOWN)
+    return uuid
+
+
+def _from_hex(value: str) -> Optional[UUID]:
+    """Create a UUID from 32 hex digits, returns None when the value isn't plain hex."""
+    if len(value) != 32 or not value.isalnum():
+        return None
+    return _from_int(int(value, 16))
+
+
+def _decode_str(value: Any) -> UUID:
+    """Decode a UUID string. Canonical 36 character strings skip the `UUID` string cleanup."""
+    if type(value) is str and len(value) == 36 and value[8] == value[13] == value[18] == value[23] == "-":
+        uuid = _from_hex(value.replace("-", ""))
+        if uuid is not None:
+            return uuid
+    return UUID(value)
+
+
+def _decode_hex(value: Any) -> UUID:
+    uuid = _from_hex(value) if type(value) is str else None
+    if uuid is None:
+        raise ValueError(f"Expected 32 hex digits, got {value!r}")
+    return uuid
+
+
+def _decode_int(value: Any) -> UUID:
+    if type(value) is not int:
+        raise TypeError(f"Expected an int, got {type(value)}")
+    return UUID(int=value)
+
+
+def _decode_bytes(value: Any) -> UUID:
+    if type(value) is not bytes:
+        raise TypeError(f"Expected bytes, got {type(value)}")
+    return UUID(bytes=value)
+
+
+def _encode_str(value: UUID) -> str:
+    digits = "%032x" % value.int
+    return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+
+
+_DECODERS: Dict[str, Callable[[Any], UUID]] = {
+    "str": _decode_str,
+    "hex": _decode_hex,
+    "int": _decode_int,
+    "bytes": _decode_bytes,
+}
+
+_ENCODERS: Dict[str, Callable[[UUID], Any]] = {
+    "str": _encode_str,
+    "hex": lambda value: value.hex,
+    "int": lambda value: value.int,
+    "bytes": lambda value: value.bytes,
+}
+
+
+def _validate_uuid_format(uuid_format: Optional[str]) -> None:
+    """Ensure the uuid_format option is one of the supported formats."""
+    if uuid_format is not None and uuid_format not in _DECODERS:
+        raise ValueError(f"Invalid uuid format '{uuid_format}', expected one of {list(_DECODERS)}")
+
+
+def _uuid_decoder(uuid_format: Optional[str]) -> Callable[[Any], UUID]:
+    """Get the function converting json values in `uuid_format` into UUIDs."""
+    return _DECODERS[uuid_format or "str"]
+
+
+def _uuid_encoder(uuid_format: Optional[str]) -> Callable[[UUID], Any]:
+    """Get the function converting UUIDs into json values in `uuid_format`."""
+    return _ENCODERS[uuid_format or "str"]
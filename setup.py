@@ -3,7 +3,7 @@
 import setuptools
 
 application_dependencies = []
-test_dependencies = ["pytest", "pytest-env", "pytest-cov", "pytz"]
+test_dependencies = ["pytest", "pytest-env", "pytest-cov", "pytz", "numpy"]
 lint_dependencies = ["flake8", "flake8-docstrings", "black", "isort", "mypy"]
 docs_dependencies = []
 deploy_dependencies = ["requests", "twine"]
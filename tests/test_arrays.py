@@ -0,0 +1,61 @@
+import array
+from dataclasses import dataclass
+from typing import List, Optional
+
+import pytest
+
+from jsonmarshal import json_field, marshal, unmarshal
+from jsonmarshal.exceptions import UnmarshalError
+
+
+@dataclass
+class Reading:
+    values: array.array = json_field(typecode="d")
+    counts: Optional[array.array] = json_field(typecode="q")
+
+
+def test_unmarshal_array():
+    got = unmarshal({"values": [1.5, 2], "counts": None}, Reading)
+    assert got.values == array.array("d", [1.5, 2.0])
+    assert got.counts is None
+
+    got = unmarshal([{"values": [], "counts": [1, 2]}], List[Reading])
+    assert got == [Reading(values=array.array("d"), counts=array.array("q", [1, 2]))]
+
+
+def test_marshal_array():
+    data = Reading(values=array.array("d", [1.5, 2.0]), counts=array.array("q", [1]))
+    assert marshal(data) == {"values": [1.5, 2.0], "counts": [1]}
+
+
+@pytest.mark.parametrize("values", [[1.5], ["1"], [2**64], [None]])
+def test_unmarshal_array_invalid(values):
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal({"values": [], "counts": values}, Reading)
+    assert str(exc_info.value) == f"Unable to use data value '{values}' as array('q') at location = counts"
+
+
+def test_unmarshal_array_not_a_list():
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal({"values": 1.5, "counts": None}, Reading)
+    assert str(exc_info.value) == (
+        "Invalid schema. schema = <class 'array.array'>, data = '1.5' (<class 'float'>) at location = values"
+    )
+
+
+def test_unmarshal_array_without_typecode():
+    @dataclass
+    class Item:
+        values: array.array
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal({"values": [1.5]}, Item)
+    assert str(exc_info.value) == (
+        "array.array fields require a typecode (json_field(typecode=...)) at location = values"
+    )
+
+
+def test_invalid_typecode():
+    with pytest.raises(ValueError) as exc_info:
+        json_field(typecode="x")
+    assert str(exc_info.value).startswith("Invalid typecode 'x', expected one of ['b', 'B',")
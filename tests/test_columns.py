@@ -0,0 +1,229 @@
+import array
+import copy
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from enum import Enum
+from typing import List, Optional
+from uuid import UUID
+
+import pytest
+
+from jsonmarshal import InternTable, json_field, marshal, marshal_columns, unmarshal, unmarshal_columns
+from jsonmarshal.exceptions import MarshalError, UnmarshalError
+from tests.fixtures import load_json
+from tests.fixtures.collected_data import datetime_fmt, marshalled
+from tests.fixtures.collected_data.schema import Task
+
+
+class State(Enum):
+    OPEN = "OPEN"
+    CLOSED = "CLOSED"
+
+
+@dataclass
+class Variant:
+    id: UUID
+    alias: str = json_field(json="Alias")
+
+
+@dataclass
+class Item:
+    id: int
+    score: float
+    created: datetime = json_field(epoch="s")
+    state: State
+    variant: Variant
+    parent: Optional[Variant] = json_field(omitempty=True)
+    tags: List[str] = json_field(json="Tags")
+    note: Optional[str] = json_field(omitempty=True)
+
+
+ROWS = [
+    {
+        "id": 1,
+        "score": 0.5,
+        "created": 1592816105,
+        "state": "OPEN",
+        "variant": {"id": "cb637f6a-0dc0-4c42-8764-5b98137a8ea6", "Alias": "a"},
+        "parent": {"id": "7499af75-0d01-42a9-a6d7-1c45c1d22125", "Alias": "p"},
+        "Tags": ["x"],
+        "note": "hello",
+    },
+    {
+        "id": 2,
+        "score": 1.5,
+        "created": 1592816106,
+        "state": "CLOSED",
+        "variant": {"id": "7499af75-0d01-42a9-a6d7-1c45c1d22125", "Alias": "b"},
+        "Tags": [],
+    },
+]
+
+COLUMNS = {
+    "id": [1, 2],
+    "score": [0.5, 1.5],
+    "created": [
+        datetime(2020, 6, 22, 8, 55, 5, tzinfo=timezone.utc),
+        datetime(2020, 6, 22, 8, 55, 6, tzinfo=timezone.utc),
+    ],
+    "state": [State.OPEN, State.CLOSED],
+    "variant.id": [
+        UUID("cb637f6a-0dc0-4c42-8764-5b98137a8ea6"),
+        UUID("7499af75-0d01-42a9-a6d7-1c45c1d22125"),
+    ],
+    "variant.alias": ["a", "b"],
+    "parent.id": [UUID("7499af75-0d01-42a9-a6d7-1c45c1d22125"), None],
+    "parent.alias": ["p", None],
+    "tags": [["x"], []],
+    "note": ["hello", None],
+}
+
+
+def test_unmarshal_columns():
+    got = unmarshal_columns(ROWS, Item)
+    assert got == COLUMNS
+    assert list(got) == list(COLUMNS)
+
+
+def test_unmarshal_columns_null_nested():
+    @dataclass
+    class Row:
+        parent: Optional[Variant]
+
+    got = unmarshal_columns([{"parent": None}, {"parent": {"id": 1, "Alias": "a"}}], Row, uuid_format="int")
+    assert got == {"parent.id": [None, UUID(int=1)], "parent.alias": [None, "a"]}
+    assert marshal_columns(got, Row) == [
+        {"parent": None},
+        {"parent": {"id": "00000000-0000-0000-0000-000000000001", "Alias": "a"}},
+    ]
+
+
+def test_marshal_columns():
+    assert marshal_columns(COLUMNS, Item) == ROWS
+
+
+def test_columns_collected_data_tasks():
+    data = load_json(marshalled)
+    tasks = [
+        task for officer in data["officers"]["directors"] for task in officer["linked_profile"]["tasks"]
+    ]
+    got = unmarshal(copy.deepcopy(tasks), List[Task], datetime_fmt=datetime_fmt)
+    want = marshal(got, datetime_fmt=datetime_fmt)
+
+    columns = unmarshal_columns(tasks, Task, datetime_fmt=datetime_fmt)
+    assert columns["variant.task_type"] == [task.variant.task_type for task in got]
+    assert marshal_columns(columns, Task, datetime_fmt=datetime_fmt) == want
+
+
+@pytest.mark.parametrize("numeric,want_type", [("array", array.array), ("numpy", None)])
+def test_unmarshal_columns_numeric(numeric, want_type):
+    if numeric == "numpy":
+        want_type = pytest.importorskip("numpy").ndarray
+
+    @dataclass
+    class Point:
+        id: int
+        x: float
+        y: Optional[float]
+        big: int
+
+    rows = [{"id": 1, "x": 0.5, "y": None, "big": 2**64}, {"id": 2, "x": 1.5, "y": 1.0, "big": 1}]
+    got = unmarshal_columns(rows, Point, numeric=numeric)
+    assert isinstance(got["id"], want_type)
+    assert list(got["id"]) == [1, 2]
+    assert isinstance(got["x"], want_type)
+    assert list(got["x"]) == [0.5, 1.5]
+    # Nulls and values outside of 64 bits are kept as lists
+    assert got["y"] == [None, 1.0]
+    assert got["big"] == [2**64, 1]
+
+    assert marshal_columns(got, Point) == rows
+
+
+def test_unmarshal_columns_intern():
+    @dataclass
+    class Row:
+        country: str
+        city: Optional[str]
+
+    table = InternTable()
+    rows = [
+        {"country": "".join(["G", "B"]), "city": None},
+        {"country": "".join(["G", "B"]), "city": "x" * 2},
+    ]
+    got = unmarshal_columns(rows, Row, intern=table)
+    assert got["country"][0] is got["country"][1]
+    assert got["city"] == [None, "xx"]
+    assert table.hits == 1
+
+
+def test_unmarshal_columns_empty():
+    assert unmarshal_columns([], Variant) == {"id": [], "alias": []}
+    assert marshal_columns({"id": [], "alias": []}, Variant) == []
+
+
+def test_unmarshal_columns_invalid_numeric():
+    with pytest.raises(ValueError) as exc_info:
+        unmarshal_columns([], Variant, numeric="list")
+    assert str(exc_info.value) == "Invalid numeric option 'list', expected one of ['array', 'numpy']"
+
+
+@pytest.mark.parametrize(
+    "data,errmsg",
+    [
+        (
+            {"id": 1},
+            "Invalid schema. schema = typing.List[tests.test_columns.Variant], "
+            "data = '{'id': 1}' (<class 'dict'>) at location = ",
+        ),
+        (
+            [["a"]],
+            "Invalid schema. schema = <class 'tests.test_columns.Variant'>, "
+            "data = '['a']' (<class 'list'>) at location = .0",
+        ),
+        (
+            [{"Alias": "a"}],
+            "Expected json key is not present in object at position '.0'. 'id' not in ['Alias']",
+        ),
+        (
+            [{"id": "cb637f6a-0dc0-4c42-8764-5b98137a8ea6", "Alias": 1}],
+            "Invalid schema. schema = <class 'str'>, data = '1' (<class 'int'>) at location = alias",
+        ),
+    ],
+)
+def test_unmarshal_columns_invalid(data, errmsg):
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal_columns(data, Variant)
+    assert str(exc_info.value) == errmsg
+
+
+def test_unmarshal_columns_invalid_nested():
+    @dataclass
+    class Row:
+        variant: Variant
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal_columns([{"variant": None}], Row)
+    assert str(exc_info.value) == (
+        "Invalid schema. schema = <class 'tests.test_columns.Variant'>, "
+        "data = 'None' (<class 'NoneType'>) at location = .0.variant"
+    )
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal_columns([{"variant": "a"}], Row)
+    assert str(exc_info.value) == (
+        "Invalid schema. schema = <class 'tests.test_columns.Variant'>, "
+        "data = 'a' (<class 'str'>) at location = .0.variant"
+    )
+
+
+def test_marshal_columns_invalid():
+    with pytest.raises(MarshalError) as exc_info:
+        marshal_columns({"id": []}, Variant)
+    assert (
+        str(exc_info.value) == "Missing columns ['alias'] for schema <class 'tests.test_columns.Variant'>."
+    )
+
+    with pytest.raises(MarshalError) as exc_info:
+        marshal_columns({"id": [], "alias": ["a"]}, Variant)
+    assert str(exc_info.value) == "Columns must all have the same length, got lengths [0, 1]."
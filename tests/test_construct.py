@@ -0,0 +1,210 @@
+import copy
+import dataclasses
+import pickle
+import sys
+from dataclasses import InitVar, dataclass, field
+from typing import List
+
+import pytest
+
+from jsonmarshal.construct import (
+    _build_constructor,
+    _constructor,
+    _is_known_safe,
+    _record_constructor,
+    _record_type,
+)
+from jsonmarshal.fields import json_field
+from jsonmarshal.marshal import marshal
+from jsonmarshal.unmarshal import unmarshal
+from tests.fixtures import load_fixtures
+
+requires_slots = pytest.mark.skipif(sys.version_info < (3, 10), reason="slots requires python 3.10")
+
+
+@dataclass
+class Plain:
+    id: int
+    name: str
+
+
+@dataclass(frozen=True)
+class Frozen:
+    id: int
+    name: str
+
+
+@dataclass
+class PostInit:
+    id: int
+    name: str
+
+    def __post_init__(self):
+        self.name = self.name.upper()
+
+
+@dataclass
+class WithInitVar:
+    id: int
+    scale: InitVar[int]
+
+    def __post_init__(self, scale):
+        self.id *= scale
+
+
+@dataclass
+class NotInit:
+    id: int
+    name: str = field(init=False, default="x")
+
+
+@dataclass(init=False)
+class CustomInit:
+    id: int
+
+    def __init__(self, id):
+        self.id = id + 1
+
+
+@dataclass
+class CustomSetattr:
+    id: int
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value * 2)
+
+
+@pytest.mark.parametrize("schema", [Plain, Frozen])
+def test_known_safe(schema):
+    assert _is_known_safe(schema)
+
+
+@pytest.mark.parametrize("schema", [PostInit, WithInitVar, NotInit, CustomInit, CustomSetattr])
+def test_not_known_safe(schema):
+    assert not _is_known_safe(schema)
+
+
+def test_constructor_cached():
+    assert _constructor(Frozen) is _constructor(Frozen)
+
+
+def test_construct_plain():
+    assert _build_constructor(Plain)({"id": 1, "name": "a"}) == Plain(id=1, name="a")
+
+
+def test_construct_frozen():
+    got = _build_constructor(Frozen)({"name": "a", "id": 1})
+    assert got == Frozen(id=1, name="a")
+    # Attributes are set in field order, as the generated __init__ would.
+    assert list(vars(got)) == ["id", "name"]
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        got.id = 2
+
+
+def test_unmarshal_uses_init_when_not_known_safe():
+    assert unmarshal({"id": 1, "name": "a"}, PostInit) == PostInit(id=1, name="A")
+    assert unmarshal({"id": 1}, CustomInit).id == 2
+    assert unmarshal({"id": 1}, CustomSetattr).id == 2
+
+
+@requires_slots
+def test_unmarshal_slots():
+    @dataclass(slots=True)
+    class Child:
+        value: float
+
+    @dataclass(slots=True, frozen=True)
+    class Parent:
+        id: int
+        children: list[Child]
+
+    assert _is_known_safe(Parent)
+    json = {"id": 1, "children": [{"value": 1.5}, {"value": 2.5}]}
+    got = unmarshal(json, Parent)
+    assert got == Parent(id=1, children=[Child(value=1.5), Child(value=2.5)])
+    assert not hasattr(got, "__dict__")
+    assert marshal(got) == {"id": 1, "children": [{"value": 1.5}, {"value": 2.5}]}
+
+
+def test_record_type():
+    record = _record_type(Plain)
+    assert record is _record_type(Plain)
+    assert record.__name__ == "Plain"
+    assert record._fields == ("id", "name")
+    # Records are tuples, not dataclasses.
+    assert not dataclasses.is_dataclass(record)
+
+    got = _record_constructor(Plain)({"name": "a", "id": 1})
+    assert got == record(id=1, name="a")
+    assert (got.id, got.name) == (1, "a")
+    assert repr(got) == "Plain(id=1, name='a')"
+    assert not hasattr(got, "__dict__")
+    with pytest.raises(AttributeError):
+        got.id = 2
+
+
+def test_record_type_private_field_names():
+    @dataclass
+    class Document:
+        _id: int
+        _cls: str
+        _rev: int = 0
+
+    got = unmarshal({"_id": 1, "_cls": "a", "_rev": 2}, Document, output="record")
+    assert (got._id, got._cls, got._rev) == (1, "a", 2)
+    assert got == _record_type(Document)(_id=1, _cls="a", _rev=2)
+    assert got._asdict() == {"_id": 1, "_cls": "a", "_rev": 2}
+    assert marshal(got) == {"_id": 1, "_cls": "a", "_rev": 2}
+
+
+def test_record_copy():
+    got = _record_constructor(Plain)({"id": 1, "name": "a"})
+    assert copy.copy(got) == got
+    assert type(copy.deepcopy(got)) is type(got)
+
+
+def test_record_pickle():
+    record = _record_constructor(Plain)({"id": 1, "name": "a"})
+
+    got = pickle.loads(pickle.dumps(record))
+    assert got == record
+    assert type(got) is type(record)
+    assert got.name == "a"
+
+
+@pytest.mark.parametrize(
+    "fixture_name,marshalled,schema,unmarshalled,date_fmt,datetime_fmt", load_fixtures()
+)
+def test_unmarshal_records_integration(
+    fixture_name, marshalled, schema, unmarshalled, date_fmt, datetime_fmt
+):
+    got = unmarshal(
+        copy.deepcopy(marshalled), schema, date_fmt=date_fmt, datetime_fmt=datetime_fmt, output="record"
+    )
+    assert type(got) is _record_type(schema)
+    # Records marshal into the same json as the dataclasses.
+    assert marshal(got, date_fmt=date_fmt, datetime_fmt=datetime_fmt) == marshal(
+        unmarshalled, date_fmt=date_fmt, datetime_fmt=datetime_fmt
+    )
+
+
+def test_unmarshal_records_nested():
+    @dataclass
+    class Child:
+        value: float = json_field(json="Value")
+
+    @dataclass
+    class Parent:
+        id: int
+        children: List[Child]
+
+    got = unmarshal([{"id": 1, "children": [{"Value": 1.5}]}], List[Parent], output="record")
+    assert got == [(1, [(1.5,)])]
+    assert got[0].children[0].value == 1.5
+    assert marshal(got) == [{"id": 1, "children": [{"Value": 1.5}]}]
+
+
+def test_unmarshal_invalid_output():
+    with pytest.raises(ValueError) as exc_info:
+        unmarshal({"id": 1, "name": "a"}, Plain, output="tuple")
+    assert str(exc_info.value) == "Invalid output 'tuple', expected one of ['dataclass', 'record']"
@@ -0,0 +1,223 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from jsonmarshal.datetimes import (
+    _compile_format,
+    _DatetimeFormatter,
+    _DatetimeParser,
+    _from_epoch,
+    _normalize_iso,
+    _parse_iso_datetime,
+    _to_epoch,
+    _validate_epoch,
+)
+
+
+@pytest.mark.parametrize(
+    "timestamp,want",
+    [
+        ("2020-06-22T08:55:05", datetime(2020, 6, 22, 8, 55, 5)),
+        ("2020-06-22 08:55:05", datetime(2020, 6, 22, 8, 55, 5)),
+        ("2020-06-22T08:55:05Z", datetime(2020, 6, 22, 8, 55, 5, tzinfo=timezone.utc)),
+        ("2020-06-22T08:55:05.123Z", datetime(2020, 6, 22, 8, 55, 5, 123000, tzinfo=timezone.utc)),
+        ("2020-06-22T08:55:05.1Z", datetime(2020, 6, 22, 8, 55, 5, 100000, tzinfo=timezone.utc)),
+        ("2020-06-22T08:55:05.123456789Z", datetime(2020, 6, 22, 8, 55, 5, 123456, tzinfo=timezone.utc)),
+        (
+            "2020-06-22T08:55:05+01:00",
+            datetime(2020, 6, 22, 8, 55, 5, tzinfo=timezone(timedelta(hours=1))),
+        ),
+        (
+            "2020-06-22T08:55:05-0130",
+            datetime(2020, 6, 22, 8, 55, 5, tzinfo=timezone(-timedelta(hours=1, minutes=30))),
+        ),
+    ],
+)
+def test_parse_iso_datetime(timestamp, want):
+    got = _parse_iso_datetime(timestamp)
+    assert got == want
+    assert got.utcoffset() == want.utcoffset()
+
+
+def test_parse_iso_datetime_shares_tzinfo():
+    first = _parse_iso_datetime("2020-06-22T08:55:05+02:00")
+    second = _parse_iso_datetime("2020-06-23T08:55:05+02:00")
+    assert first.tzinfo is second.tzinfo
+
+    assert _parse_iso_datetime("2020-06-22T08:55:05Z").tzinfo is timezone.utc
+
+
+def test_parse_iso_datetime_known_offset():
+    tz = _parse_iso_datetime("2020-06-22T08:55:05+03:00").tzinfo
+    # Later values with the same offset get the tzinfo of the first one.
+    got = _parse_iso_datetime("2020-06-23 09:15:00.250+03:00")
+    assert got == datetime(2020, 6, 23, 9, 15, 0, 250000, tzinfo=timezone(timedelta(hours=3)))
+    assert got.tzinfo is tz
+    # Other spellings of the offset share it too.
+    assert _parse_iso_datetime("2020-06-23T09:15:00+0300").tzinfo is tz
+
+    for invalid in ["2020-06-23T25:00:00+03:00", "2020-06-23T09:15:00+01:00+03:00"]:
+        with pytest.raises(ValueError):
+            _parse_iso_datetime(invalid)
+
+
+def test_parse_iso_datetime_invalid():
+    with pytest.raises(ValueError) as exc_info:
+        _parse_iso_datetime("22/06/2020")
+    assert str(exc_info.value) == "Invalid isoformat string: '22/06/2020'"
+
+
+def test_normalize_iso():
+    assert _normalize_iso("2020-06-22T08:55:05.1234+0100") == "2020-06-22T08:55:05.123400+01:00"
+    assert _normalize_iso("2020-06-22T08:55:05.1Z") == "2020-06-22T08:55:05.100000+00:00"
+
+
+@pytest.mark.parametrize(
+    "fmt,timestamp,want",
+    [
+        ("%Y/%m/%d (%H:%M:%S)", "2020/05/27 (09:34:36)", datetime(2020, 5, 27, 9, 34, 36)),
+        ("%d.%m.%y %H:%M", "7.5.20 9:04", datetime(2020, 5, 7, 9, 4)),
+        ("%d.%m.%y", "07.05.98", datetime(1998, 5, 7)),
+        ("%Y-%m-%dT%H:%M:%S.%f", "2020-05-27t09:34:36.5", datetime(2020, 5, 27, 9, 34, 36, 500000)),
+        ("%Y-%m-%d  %H%%", "2020-05-27 \t09%", datetime(2020, 5, 27, 9)),
+        ("%Y-%m-%d  %H", "2020-05-27 09", datetime(2020, 5, 27, 9)),
+        (" %d\t%m %Y", "\n07 05   2020", datetime(2020, 5, 7)),
+        ("%Y-%m-%d %H:%M%z", "2020-05-27 09:34Z", datetime(2020, 5, 27, 9, 34, tzinfo=timezone.utc)),
+        (
+            "%Y-%m-%d %H:%M%z",
+            "2020-05-27 09:34-02:30",
+            datetime(2020, 5, 27, 9, 34, tzinfo=timezone(-timedelta(hours=2, minutes=30))),
+        ),
+        (
+            "%Y-%m-%d %H:%M%z",
+            "2020-05-27 09:34+02:00:30",
+            datetime(2020, 5, 27, 9, 34, tzinfo=timezone(timedelta(hours=2, seconds=30))),
+        ),
+        ("%d %b %Y %H:%M", "11 Jun 2020 14:32", datetime(2020, 6, 11, 14, 32)),
+    ],
+)
+def test_parse_datetime_format(fmt, timestamp, want):
+    parser = _DatetimeParser(datetime_fmt=fmt)
+    got = parser.parse_datetime(timestamp)
+    assert got == want
+    assert got == datetime.strptime(timestamp, fmt)
+    assert got.utcoffset() == want.utcoffset()
+
+
+@pytest.mark.parametrize("fmt", ["%Y/%m/%d", "%d %b %Y"])
+def test_parse_datetime_format_mismatch(fmt):
+    parser = _DatetimeParser(datetime_fmt=fmt)
+    with pytest.raises(ValueError):
+        parser.parse_datetime("2020/13/01")
+
+
+@pytest.mark.parametrize("fmt", ["%d %b %Y", "%Y %Y", "%Y-%m-%d %"])
+def test_compile_format_unsupported(fmt):
+    # Unsupported formats are left to strptime
+    assert _compile_format(fmt) is None
+
+
+def test_compile_format_whitespace():
+    # Each run of whitespace is matched by a single expression.
+    pattern, _ = _compile_format("%Y-%m-%d \t %H")
+    assert pattern.pattern.count(r"\s+") == 1
+
+
+def test_parse_date_format():
+    parser = _DatetimeParser(date_fmt="%d/%m/%Y")
+    assert parser.parse_date("02/11/2020") == date(2020, 11, 2)
+    assert parser.parse_datetime("2020-11-02T10:00:00") == datetime(2020, 11, 2, 10)
+
+
+def test_parse_with_cache():
+    parser = _DatetimeParser(cache_size=2)
+    first = parser.parse_datetime("2020-06-22T08:55:05Z")
+    assert parser.parse_datetime("2020-06-22T08:55:05Z") is first
+    assert parser.parse_date("2020-06-22") is parser.parse_date("2020-06-22")
+
+
+@pytest.mark.parametrize(
+    "fmt",
+    ["%Y/%m/%d (%H:%M:%S)", "%Y-%m-%dT%H:%M:%S.%f", "%H%%", "%H", "date", "%d %b %Y %H:%M", "%Y %"],
+)
+def test_format_datetime(fmt):
+    value = datetime(2020, 5, 7, 9, 4, 36, 123, tzinfo=timezone.utc)
+    formatter = _DatetimeFormatter(datetime_fmt=fmt)
+    assert formatter.format_datetime(value) == value.strftime(fmt)
+
+
+@pytest.mark.parametrize("fmt", ["%d/%m/%Y", "%d/%m/%Y %H:%M"])
+def test_format_date(fmt):
+    value = date(2020, 5, 7)
+    formatter = _DatetimeFormatter(date_fmt=fmt)
+    assert formatter.format_date(value) == value.strftime(fmt)
+    assert formatter.format_datetime(datetime(2020, 5, 7, 9)) == "2020-05-07T09:00:00"
+
+
+@pytest.mark.parametrize("year", [5, 999, 1000, 9999])
+def test_format_years_like_strftime(year):
+    formatter = _DatetimeFormatter(datetime_fmt="%Y-%m-%d %H", date_fmt="%d/%m/%Y")
+    value = datetime(year, 5, 7, 9)
+    assert formatter.format_datetime(value) == value.strftime("%Y-%m-%d %H")
+    assert formatter.format_date(value.date()) == value.date().strftime("%d/%m/%Y")
+
+
+def test_format_with_cache():
+    formatter = _DatetimeFormatter(cache_size=2)
+    utc = datetime(2020, 5, 7, 9, tzinfo=timezone.utc)
+    offset = datetime(2020, 5, 7, 10, tzinfo=timezone(timedelta(hours=1)))
+    # Equal values in different timezones must not share a cache entry.
+    assert formatter.format_datetime(utc) == "2020-05-07T09:00:00+00:00"
+    assert formatter.format_datetime(offset) == "2020-05-07T10:00:00+01:00"
+    assert formatter.format_datetime(utc) is formatter.format_datetime(utc)
+    # The cache is cleared when full.
+    assert formatter.format_datetime(datetime(2020, 5, 8)) == "2020-05-08T00:00:00"
+    assert formatter.format_date(date(2020, 5, 7)) is formatter.format_date(date(2020, 5, 7))
+
+
+@pytest.mark.parametrize(
+    "value,unit,want",
+    [
+        (datetime(2020, 6, 22, 8, 55, 5, tzinfo=timezone.utc), "s", 1592816105),
+        (datetime(2020, 6, 22, 9, 55, 5, tzinfo=timezone(timedelta(hours=1))), "s", 1592816105),
+        (datetime(2020, 6, 22, 8, 55, 5), "s", 1592816105),
+        (datetime(2020, 6, 22, 8, 55, 5, 500000), "s", 1592816105.5),
+        (datetime(2020, 6, 22, 8, 55, 5, 123000), "ms", 1592816105123),
+        (datetime(2020, 6, 22, 8, 55, 5, 123500), "ms", 1592816105123.5),
+        (datetime(1969, 12, 31, 23, 59, 59), "ms", -1000),
+        (date(2020, 6, 22), "s", 1592784000),
+    ],
+)
+def test_to_epoch(value, unit, want):
+    got = _to_epoch(value, unit)
+    assert got == want
+    assert type(got) is type(want)
+
+
+@pytest.mark.parametrize(
+    "value,unit,want",
+    [
+        (1592816105, "s", datetime(2020, 6, 22, 8, 55, 5, tzinfo=timezone.utc)),
+        (1592816105.5, "s", datetime(2020, 6, 22, 8, 55, 5, 500000, tzinfo=timezone.utc)),
+        (1592816105123, "ms", datetime(2020, 6, 22, 8, 55, 5, 123000, tzinfo=timezone.utc)),
+        (-1000, "ms", datetime(1969, 12, 31, 23, 59, 59, tzinfo=timezone.utc)),
+    ],
+)
+def test_from_epoch(value, unit, want):
+    got = _from_epoch(value, unit)
+    assert got == want
+    assert got.tzinfo is timezone.utc
+
+
+@pytest.mark.parametrize("value", ["1592816105", True, None])
+def test_from_epoch_invalid(value):
+    with pytest.raises(TypeError):
+        _from_epoch(value, "s")
+
+
+def test_validate_epoch():
+    _validate_epoch(None)
+    _validate_epoch("ms")
+    with pytest.raises(ValueError) as exc_info:
+        _validate_epoch("us")
+    assert str(exc_info.value) == "Invalid epoch unit 'us', expected one of ['s', 'ms']"
@@ -0,0 +1,53 @@
+from enum import Enum
+
+import pytest
+
+from jsonmarshal.enums import _enum_table
+
+
+class Role(Enum):
+    COMPANY_CUSTOMER = "COMPANY_CUSTOMER"
+    CUSTOMER = "COMPANY_CUSTOMER"
+    INDIVIDUAL = "Individual"
+
+
+class Unhashable(Enum):
+    PAIR = [1, 2]
+    SINGLE = 1
+
+
+class Fallback(Enum):
+    KNOWN = "KNOWN"
+    UNKNOWN = "UNKNOWN"
+
+    @classmethod
+    def _missing_(cls, value):
+        return cls.UNKNOWN
+
+
+def test_enum_table_lookups():
+    table = _enum_table(Role)
+    assert table is _enum_table(Role)
+    assert table.member("COMPANY_CUSTOMER") is Role.COMPANY_CUSTOMER
+    assert table.values[Role.CUSTOMER] == "COMPANY_CUSTOMER"
+    assert table.values[Role.INDIVIDUAL] == "Individual"
+
+
+def test_enum_table_case_insensitive():
+    table = _enum_table(Role)
+    assert table.member("individual", case_insensitive=True) is Role.INDIVIDUAL
+    with pytest.raises(ValueError):
+        table.member("individual")
+    with pytest.raises(ValueError):
+        table.member("unknown", case_insensitive=True)
+
+
+def test_enum_table_unhashable():
+    table = _enum_table(Unhashable)
+    assert table.member([1, 2]) is Unhashable.PAIR
+    assert table.member(1) is Unhashable.SINGLE
+    assert table.values[Unhashable.PAIR] == [1, 2]
+
+
+def test_enum_table_missing():
+    assert _enum_table(Fallback).member("OTHER") is Fallback.UNKNOWN
@@ -0,0 +1,291 @@
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import pytest
+
+from jsonmarshal import json_field, marshal, marshal_to_stream, unmarshal
+from jsonmarshal.exceptions import UnmarshalError
+
+
+def test_unmarshal_index_by():
+    @dataclass
+    class Country:
+        code: str
+        region: str = json_field(json="Region")
+
+    data = [{"code": "FR", "Region": "EU"}, {"code": "DE", "Region": "EU"}, {"code": "JP", "Region": "AS"}]
+
+    want = {"FR": Country("FR", "EU"), "DE": Country("DE", "EU"), "JP": Country("JP", "AS")}
+    got = unmarshal(data, Dict[str, Country], index_by="code")
+    assert got == want
+    assert list(got) == ["FR", "DE", "JP"]
+
+
+def test_unmarshal_group_by():
+    @dataclass
+    class Country:
+        code: str
+        region: str = json_field(json="Region")
+
+    data = [{"code": "FR", "Region": "EU"}, {"code": "DE", "Region": "EU"}, {"code": "JP", "Region": "AS"}]
+
+    want = {"EU": [Country("FR", "EU"), Country("DE", "EU")], "AS": [Country("JP", "AS")]}
+    got = unmarshal(data, Dict[str, List[Country]], group_by="region")
+    assert got == want
+
+
+def test_unmarshal_index_by_empty():
+    @dataclass
+    class Country:
+        code: str
+        region: str = json_field(json="Region")
+
+    got = unmarshal([], Dict[str, Country], index_by="code")
+    assert got == {}
+
+
+def test_unmarshal_index_by_records():
+    @dataclass
+    class Country:
+        code: str
+        region: str = json_field(json="Region")
+
+    data = [{"code": "FR", "Region": "EU"}, {"code": "JP", "Region": "AS"}]
+
+    got = unmarshal(data, Dict[str, Country], index_by="code", output="record")
+    assert got["JP"] == ("JP", "AS")
+
+
+def test_unmarshal_index_by_optional():
+    @dataclass
+    class Country:
+        code: str
+        region: str = json_field(json="Region")
+
+    data = [{"code": "FR", "Region": "EU"}, {"code": "JP", "Region": "AS"}]
+
+    got = unmarshal(data, Optional[Dict[str, Country]], index_by="code")
+    assert list(got) == ["FR", "JP"]
+    assert unmarshal(None, Optional[Dict[str, Country]], index_by="code") is None
+
+
+@pytest.mark.parametrize("duplicates,region", [("first", "EU"), ("last", "AS")])
+def test_unmarshal_index_by_duplicates(duplicates, region):
+    @dataclass
+    class Country:
+        code: str
+        region: str = json_field(json="Region")
+
+    data = [{"code": "FR", "Region": "EU"}, {"code": "FR", "Region": "AS"}]
+
+    want = {"FR": Country("FR", region)}
+    got = unmarshal(data, Dict[str, Country], index_by="code", duplicates=duplicates)
+    assert got == want
+
+
+def test_unmarshal_index_by_field():
+    @dataclass
+    class Country:
+        code: str
+        region: str = json_field(json="Region")
+
+    @dataclass
+    class Reference:
+        countries: Dict[str, Country] = json_field(index_by="code")
+
+    data = {"countries": [{"code": "FR", "Region": "EU"}, {"code": "DE", "Region": "EU"}]}
+
+    want = Reference({"FR": Country("FR", "EU"), "DE": Country("DE", "EU")})
+    got = unmarshal(data, Reference)
+    assert got == want
+
+
+def test_unmarshal_group_by_field():
+    @dataclass
+    class Country:
+        code: str
+        region: str = json_field(json="Region")
+
+    @dataclass
+    class Reference:
+        regions: Dict[str, List[Country]] = json_field(json="by_region", group_by="region")
+
+    data = {"by_region": [{"code": "FR", "Region": "EU"}, {"code": "JP", "Region": "AS"}]}
+
+    want = Reference({"EU": [Country("FR", "EU")], "AS": [Country("JP", "AS")]})
+    got = unmarshal(data, Reference)
+    assert got == want
+
+
+def test_unmarshal_index_by_optional_field():
+    @dataclass
+    class Country:
+        code: str
+        region: str = json_field(json="Region")
+
+    @dataclass
+    class Reference:
+        previous: Optional[Dict[str, Country]] = json_field(index_by="code", duplicates="last")
+
+    data = {"previous": [{"code": "FR", "Region": "EU"}, {"code": "FR", "Region": "AS"}]}
+
+    want = Reference({"FR": Country("FR", "AS")})
+    got = unmarshal(data, Reference)
+    assert got == want
+    assert unmarshal({"previous": None}, Reference) == Reference(None)
+
+
+def test_marshal_index_by_fields():
+    @dataclass
+    class Country:
+        code: str
+        region: str = json_field(json="Region")
+
+    @dataclass
+    class Reference:
+        countries: Dict[str, Country] = json_field(index_by="code")
+        regions: Dict[str, List[Country]] = json_field(group_by="region")
+
+    reference = Reference(
+        {"FR": Country("FR", "EU"), "JP": Country("JP", "AS")},
+        {"EU": [Country("FR", "EU")], "AS": [Country("JP", "AS")]},
+    )
+
+    want = {
+        "countries": [{"code": "FR", "Region": "EU"}, {"code": "JP", "Region": "AS"}],
+        "regions": [{"code": "FR", "Region": "EU"}, {"code": "JP", "Region": "AS"}],
+    }
+    got = marshal(reference)
+    assert got == want
+
+
+def test_marshal_to_stream_index_by_fields():
+    @dataclass
+    class Country:
+        code: str
+        region: str = json_field(json="Region")
+
+    @dataclass
+    class Reference:
+        countries: Dict[str, Country] = json_field(index_by="code")
+
+    class Writer:
+        chunks = []
+
+        def write(self, data):
+            self.chunks.append(data)
+
+        async def drain(self):
+            pass
+
+    writer = Writer()
+    asyncio.run(marshal_to_stream(writer, Reference({"FR": Country("FR", "EU")})))
+    want = {"countries": [{"code": "FR", "Region": "EU"}]}
+    got = json.loads(b"".join(writer.chunks))
+    assert got == want
+
+
+def test_unmarshal_index_by_duplicate_key():
+    @dataclass
+    class Country:
+        code: str
+        region: str = json_field(json="Region")
+
+    @dataclass
+    class Reference:
+        countries: Dict[str, Country] = json_field(index_by="code")
+
+    data = {"countries": [{"code": "FR", "Region": "EU"}, {"code": "FR", "Region": "EU"}]}
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal(data, Reference)
+    assert str(exc_info.value) == "Duplicate key 'FR' for index_by 'code' at location = countries"
+
+
+def test_unmarshal_list_into_dict_without_index():
+    @dataclass
+    class Country:
+        code: str
+        region: str = json_field(json="Region")
+
+    data = [{"code": "FR", "Region": "EU"}]
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal(data, Dict[str, Country])
+    assert str(exc_info.value).startswith(f"Invalid schema. schema = {Dict[str, Country]}")
+
+
+def test_unmarshal_index_by_missing_field():
+    @dataclass
+    class Country:
+        code: str
+        region: str = json_field(json="Region")
+
+    data = [{"code": "FR", "Region": "EU"}]
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal(data, Dict[str, Country], index_by="name")
+    want = f"index_by requires a dataclass with a 'name' field, got {Country} at location = "
+    assert str(exc_info.value) == want
+
+
+def test_unmarshal_group_by_field_not_list():
+    @dataclass
+    class Country:
+        code: str
+        region: str = json_field(json="Region")
+
+    @dataclass
+    class Reference:
+        regions: Dict[str, Country] = json_field(group_by="region")
+
+    data = {"regions": [{"code": "FR", "Region": "EU"}]}
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal(data, Reference)
+    assert str(exc_info.value) == (
+        f"group_by requires a Dict[..., List[...]] schema, got values of {Country} at location = regions"
+    )
+
+
+@pytest.mark.parametrize(
+    "schema,options,want",
+    [
+        (List[int], {"index_by": "code"}, "The index_by option requires a Dict[K, V] schema, got "),
+        (int, {"index_by": "code"}, "The index_by option requires a Dict[K, V] schema, got "),
+        (Dict, {"index_by": "code"}, "The index_by option requires a Dict[K, V] schema, got "),
+        (
+            Dict[str, int],
+            {"group_by": "region"},
+            "The group_by option requires a Dict[K, List[V]] schema, got ",
+        ),
+        (
+            List[int],
+            {"group_by": "region"},
+            "The group_by option requires a Dict[K, List[V]] schema, got ",
+        ),
+    ],
+)
+def test_index_by_invalid_schema(schema, options, want):
+    with pytest.raises(ValueError) as exc_info:
+        unmarshal([{"code": "FR"}], schema, **options)
+    assert str(exc_info.value) == f"{want}{schema}"
+
+
+@pytest.mark.parametrize(
+    "options,want",
+    [
+        (
+            {"index_by": "code", "group_by": "region"},
+            "The index_by and group_by options cannot be used together",
+        ),
+        ({"index_by": "code", "duplicates": "raise"}, "Invalid duplicates 'raise', expected one of"),
+    ],
+)
+def test_index_by_invalid_options(options, want):
+    with pytest.raises(ValueError, match=want):
+        unmarshal([], Dict[str, int], **options)
+    with pytest.raises(ValueError, match=want):
+        json_field(**options)
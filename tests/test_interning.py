@@ -0,0 +1,81 @@
+import json
+import sys
+from dataclasses import dataclass
+from typing import List, Optional
+
+from jsonmarshal import InternTable, unmarshal
+
+
+@dataclass
+class Address:
+    country: str
+    city: str
+    tags: List[str]
+    note: Optional[str] = None
+
+
+RAW = """[
+    {"country": "GBR", "city": "London", "tags": ["home", "billing"]},
+    {"country": "GBR", "city": "London", "tags": ["home"], "note": "a long note that is never interned"}
+]"""
+
+
+def test_intern_short_strings():
+    table = InternTable(max_length=10)
+    first, second = unmarshal(json.loads(RAW), List[Address], intern=table)
+
+    assert first.country is second.country
+    assert first.city is second.city
+    assert first.tags[0] is second.tags[0]
+    assert table.hits == 3
+    assert table.saved_bytes == sys.getsizeof("GBR") + sys.getsizeof("London") + sys.getsizeof("home")
+    assert "a long note that is never interned" not in table.strings
+
+
+def test_intern_fields():
+    table = InternTable(fields=["country", "note"])
+    first, second = unmarshal(json.loads(RAW), List[Address], intern=table)
+
+    assert first.country is second.country
+    assert first.city is not second.city
+    assert sorted(table.strings) == ["GBR", "a long note that is never interned"]
+
+    # The table can be shared between calls
+    (third,) = unmarshal(
+        json.loads('[{"country": "GBR", "city": "Paris", "tags": []}]'), List[Address], intern=table
+    )
+    assert third.country is first.country
+
+
+def test_intern_field():
+    table = InternTable(fields=["country"])
+    country = "".join(["G", "BR"])
+    assert table.intern_field("GBR", "country") is table.intern_field(country, "country")
+    assert table.intern_field(country, "city") is country
+
+    table = InternTable(max_length=3)
+    note = "".join(["no", "te"])
+    assert table.intern_field("GBR", None) is table.intern_field(country, "city")
+    assert table.intern_field(note, "note") is note
+    assert sorted(table.strings) == ["GBR"]
+
+
+def test_intern_table_bounded():
+    table = InternTable(max_size=1)
+    got = unmarshal(json.loads('["ab", "cd", "ab", "cd"]'), List[str], intern=table)
+    assert got == ["ab", "cd", "ab", "cd"]
+    assert got[0] is got[2]
+    assert got[1] is not got[3]
+    assert len(table) == 1
+    assert table.hits == 1
+
+
+def test_intern_list_with_nulls():
+    @dataclass
+    class Labels:
+        names: List[Optional[str]]
+
+    table = InternTable()
+    got = unmarshal({"names": ["".join(["a", "b"]), None, "".join(["a", "b"])]}, Labels, intern=table)
+    assert got.names == ["ab", None, "ab"]
+    assert got.names[0] is got.names[2]
@@ -0,0 +1,249 @@
+import asyncio
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import pytest
+
+from jsonmarshal import LazyList, json_field, marshal, marshal_to_stream, unmarshal
+from jsonmarshal.exceptions import UnmarshalError
+
+
+def test_lazy_list():
+    @dataclass
+    class Item:
+        id: int
+        name: str = json_field(json="Name")
+
+    data = [{"id": i, "Name": f"item {i}"} for i in range(100)]
+
+    got = unmarshal(data, List[Item], lazy=True)
+    assert isinstance(got, LazyList)
+    assert len(got) == 100
+    assert repr(got) == "<LazyList of 100 elements, 0 decoded>"
+
+
+def test_lazy_list_slice():
+    @dataclass
+    class Item:
+        id: int
+        name: str = json_field(json="Name")
+
+    data = [{"id": i, "Name": f"item {i}"} for i in range(100)]
+
+    items = unmarshal(data, List[Item], lazy=True)
+    want = [Item(i, f"item {i}") for i in range(20)]
+    got = items[0:20]
+    assert got == want
+    assert [item.id for item in items[30:50:10]] == [30, 40]
+    # Only the accessed elements are decoded
+    assert repr(items) == "<LazyList of 100 elements, 22 decoded>"
+
+
+def test_lazy_list_index():
+    @dataclass
+    class Item:
+        id: int
+        name: str = json_field(json="Name")
+
+    data = [{"id": 0, "Name": "first"}, {"id": 1, "Name": "second"}]
+
+    items = unmarshal(data, List[Item], lazy=True)
+    assert items[-1] == Item(1, "second")
+    # The decoded elements are kept
+    assert items[0] is items[0]
+
+
+@pytest.mark.parametrize("index", [2, -3])
+def test_lazy_list_index_out_of_range(index):
+    @dataclass
+    class Item:
+        id: int
+
+    items = unmarshal([{"id": 0}, {"id": 1}], List[Item], lazy=True)
+    with pytest.raises(IndexError):
+        items[index]
+
+
+def test_lazy_list_iter():
+    @dataclass
+    class Item:
+        id: int
+
+    items = unmarshal([{"id": 0}, {"id": 1}], List[Item], lazy=True)
+
+    want = [Item(0), Item(1)]
+    got = list(items)
+    assert got == want
+
+
+def test_lazy_list_equality():
+    @dataclass
+    class Item:
+        id: int
+
+    items = unmarshal([{"id": 0}, {"id": 1}], List[Item], lazy=True)
+    assert items == [Item(0), Item(1)]
+    assert items == unmarshal([{"id": 0}, {"id": 1}], List[Item], lazy=True)
+    assert items != [Item(0)]
+    assert items != (Item(0), Item(1))
+
+
+def test_lazy_list_materialize():
+    @dataclass
+    class Item:
+        id: int
+
+    items = unmarshal([{"id": 0}, {"id": 1}, {"id": 2}], List[Item], lazy=True)
+    first = items[1]
+
+    want = [Item(0), Item(1), Item(2)]
+    got = items.materialize()
+    assert type(got) is list
+    assert got == want
+    assert got[1] is first
+
+
+def test_lazy_fields():
+    @dataclass
+    class Item:
+        id: int
+
+    @dataclass
+    class Page:
+        items: List[Item]
+        tags: List[str]
+        missing: Optional[List[Item]] = json_field(omitempty=True)
+
+    data = {"items": [{"id": 0}, {"id": 1}], "tags": ["a"]}
+
+    got = unmarshal(data, Page, lazy=True)
+    assert isinstance(got.items, LazyList)
+    # Only lists of dataclasses are lazy
+    assert type(got.tags) is list
+    assert got == Page([Item(0), Item(1)], ["a"], None)
+
+
+def test_lazy_field_option():
+    @dataclass
+    class Item:
+        id: int
+
+    @dataclass
+    class Page:
+        items: List[Item]
+        times: List[datetime] = json_field(epoch="s", lazy=True)
+
+    data = {"items": [{"id": 0}], "times": [0, 1]}
+
+    got = unmarshal(data, Page)
+    assert type(got.items) is list
+    assert isinstance(got.times, LazyList)
+    assert got.times[1] == datetime(1970, 1, 1, 0, 0, 1, tzinfo=timezone.utc)
+    assert got.times.materialize() == [datetime.fromtimestamp(i, timezone.utc) for i in range(2)]
+
+
+def test_lazy_records():
+    @dataclass
+    class Item:
+        id: int
+        name: str
+
+    data = [{"id": 0, "name": "a"}, {"id": 1, "name": "b"}]
+
+    got = unmarshal(data, List[Item], lazy=True, output="record")
+    assert got[1] == (1, "b")
+    assert not isinstance(got[1], Item)
+
+
+def test_lazy_errors():
+    @dataclass
+    class Item:
+        id: int
+
+    data = [{"id": 0}, {"id": "1"}, {"id": 2}]
+
+    items = unmarshal(data, List[Item], lazy=True)
+    assert items[0].id == 0
+    # The invalid element only raises when it is accessed
+    with pytest.raises(UnmarshalError) as exc_info:
+        items[1]
+    expected = "Invalid schema. schema = <class 'int'>, data = '1' (<class 'str'>) at location = id"
+    assert str(exc_info.value) == expected
+    assert items[2].id == 2
+
+
+def test_lazy_decode_while_unmarshalling():
+    @dataclass
+    class Item:
+        id: int
+
+    @dataclass
+    class Summary:
+        items: List[Item]
+
+        def __post_init__(self):
+            # Accessing a lazy list while unmarshalling
+            self.first = self.items[0]
+
+    @dataclass
+    class Summaries:
+        summaries: List[Summary] = json_field(lazy=True)
+        other: List[Summary]
+
+    data = {"summaries": [{"items": [{"id": 0}, {"id": 1}]}], "other": [{"items": [{"id": 2}]}]}
+
+    got = unmarshal(data, Summaries, lazy=True)
+    assert got.summaries[0].first == Item(0)
+    assert got.other[0].first == Item(2)
+
+
+def test_marshal_lazy_list():
+    @dataclass
+    class Item:
+        id: int
+        name: str = json_field(json="Name")
+
+    data = [{"id": 0, "Name": "a"}, {"id": 1, "Name": "b"}]
+
+    items = unmarshal(data, List[Item], lazy=True)
+    items[1]
+    want = [{"id": 0, "Name": "a"}, {"id": 1, "Name": "b"}]
+    got = marshal(items)
+    assert got == want
+
+
+def test_marshal_lazy_field():
+    @dataclass
+    class Page:
+        times: List[datetime] = json_field(epoch="s", lazy=True)
+
+    data = {"times": [0, 1]}
+
+    want = {"times": [0, 1]}
+    got = marshal(unmarshal(data, Page), epoch="s")
+    assert got == want
+
+
+def test_marshal_lazy_list_to_stream():
+    @dataclass
+    class Item:
+        id: int
+
+    class Writer:
+        chunks = []
+
+        def write(self, data):
+            self.chunks.append(data)
+
+        async def drain(self):
+            pass
+
+    data = [{"id": 0}, {"id": 1}]
+
+    writer = Writer()
+    asyncio.run(marshal_to_stream(writer, unmarshal(data, List[Item], lazy=True)))
+    want = [{"id": 0}, {"id": 1}]
+    got = json.loads(b"".join(writer.chunks))
+    assert got == want
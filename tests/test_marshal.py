@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from datetime import date, datetime
-from enum import Enum
-from typing import List, Optional
+from enum import Enum, Flag
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
 from uuid import UUID
 
 import pytest
@@ -371,3 +371,208 @@ def test_marshal_datetimes():
     got = marshal(data, datetime_fmt="%d %b %Y %H:%M")
     want = {"datetime_value": "23 Jun 2020 11:30"}
     assert got == want
+
+
+def test_marshal_datetimes_cached():
+    @dataclass
+    class Item:
+        start: date
+        end: date
+        created: datetime
+
+    data = [
+        Item(start=date(2020, 6, 1), end=date(2020, 6, 30), created=datetime(2020, 6, 23, 11, 30, 12)),
+        Item(start=date(2020, 6, 1), end=date(2020, 6, 30), created=datetime(2020, 6, 23, 11, 30, 12)),
+    ]
+    got = marshal(data, datetime_fmt="%Y/%m/%d %H:%M", date_fmt="%d/%m/%Y", datetime_cache_size=16)
+    want = [
+        {"start": "01/06/2020", "end": "30/06/2020", "created": "2020/06/23 11:30"},
+        {"start": "01/06/2020", "end": "30/06/2020", "created": "2020/06/23 11:30"},
+    ]
+    assert got == want
+    assert got[0]["start"] is got[1]["start"]
+
+
+def test_marshal_epoch():
+    @dataclass
+    class Item:
+        created: datetime
+        day: date
+        updated: datetime = json_field(epoch="ms")
+
+    data = Item(
+        created=datetime(2020, 6, 22, 8, 55, 5, tzinfo=pytz.UTC),
+        day=date(2020, 6, 22),
+        updated=datetime(2020, 6, 22, 8, 55, 5, 123000, tzinfo=pytz.UTC),
+    )
+    assert marshal(data, epoch="s") == {"created": 1592816105, "day": 1592784000, "updated": 1592816105123}
+    assert marshal(data) == {
+        "created": "2020-06-22T08:55:05+00:00",
+        "day": "2020-06-22",
+        "updated": 1592816105123,
+    }
+
+
+def test_marshal_epoch_invalid():
+    with pytest.raises(ValueError):
+        marshal(datetime(2020, 6, 22), epoch="us")
+
+
+def test_marshal_flags():
+    class Permission(Flag):
+        READ = 1
+        WRITE = 2
+
+    @dataclass
+    class Item:
+        single: Permission
+        combined: Permission
+
+    data = Item(single=Permission.READ, combined=Permission.READ | Permission.WRITE)
+    assert marshal(data) == {"single": 1, "combined": 3}
+
+
+def test_marshal_uuid_formats():
+    @dataclass
+    class Item:
+        ids: List[UUID]
+        owner: UUID = json_field(uuid_format="int")
+
+    ids = [UUID("cb637f6a-0dc0-4c42-8764-5b98137a8ea6"), UUID("7499af75-0d01-42a9-a6d7-1c45c1d22125")]
+    data = Item(ids=ids, owner=UUID(int=1))
+    assert marshal(data) == {
+        "ids": ["cb637f6a-0dc0-4c42-8764-5b98137a8ea6", "7499af75-0d01-42a9-a6d7-1c45c1d22125"],
+        "owner": 1,
+    }
+    assert marshal(data, uuid_format="hex") == {
+        "ids": ["cb637f6a0dc04c4287645b98137a8ea6", "7499af750d0142a9a6d71c45c1d22125"],
+        "owner": 1,
+    }
+    # The original list is left untouched
+    assert data.ids == ids
+
+
+def test_marshal_dict_field():
+    @dataclass
+    class Item:
+        attributes: dict
+
+    assert marshal(Item(attributes={"colour": "red"})) == {"attributes": {"colour": "red"}}
+
+
+def test_marshal_large_list_of_nested_dataclasses():
+    @dataclass
+    class Child:
+        value: int
+
+    @dataclass
+    class Item:
+        id: int
+        children: List[Child]
+
+    data = [Item(id=i, children=[Child(value=i), Child(value=-i)]) for i in range(3_000)]
+    got = marshal(data)
+    assert len(got) == 3_000
+    assert got[-1] == {"id": 2_999, "children": [{"value": 2_999}, {"value": -2_999}]}
+    # The original lists are left untouched
+    assert len(data) == 3_000
+    assert len(data[-1].children) == 2
+
+
+def test_marshal_list_of_mixed_values():
+    @dataclass
+    class Item:
+        values: list
+
+    item_id = UUID("cb637f6a-8a5f-4d2b-9c1e-3f5c1b0e2d4a")
+    assert marshal(Item(values=[item_id, "a", 1])) == {"values": [str(item_id), "a", 1]}
+
+
+def test_marshal_lists_of_simple_values():
+    class Role(Enum):
+        ADMIN = "ADMIN"
+        USER = "USER"
+
+    @dataclass
+    class Item:
+        roles: List[Role]
+        created: List[datetime]
+        days: List[date] = json_field(epoch="s")
+
+    data = Item(
+        roles=[Role.ADMIN, Role.USER],
+        created=[datetime(2020, 6, 22, 8, 55, 5)],
+        days=[date(2020, 6, 22), date(2020, 6, 23)],
+    )
+    assert marshal(data) == {
+        "roles": ["ADMIN", "USER"],
+        "created": ["2020-06-22T08:55:05"],
+        "days": [1592784000, 1592870400],
+    }
+
+
+def test_marshal_dict_values():
+    class Colour(Enum):
+        RED = "red"
+
+    @dataclass
+    class Tag:
+        name: str
+
+    @dataclass
+    class Item:
+        tags: Dict[str, Tag]
+        created: Dict[str, datetime]
+        colours: Dict[date, Optional[Colour]] = json_field(epoch="s")
+        nested: Dict[UUID, Dict[str, List[Tag]]]
+        mixed: Dict[str, Any]
+
+    item = Item(
+        tags={"b": Tag("x"), "a": Tag("y")},
+        created={"a": datetime(2020, 6, 22, 8, 55, 5)},
+        colours={date(2020, 6, 22): Colour.RED},
+        nested={UUID(int=1): {"e": [], "f": [Tag("z")]}},
+        mixed={"a": 1, "b": datetime(2020, 6, 22), "c": [Colour.RED], "d": None, Colour.RED: "red"},
+    )
+    got = marshal(item)
+    assert got == {
+        "tags": {"b": {"name": "x"}, "a": {"name": "y"}},
+        "created": {"a": "2020-06-22T08:55:05"},
+        "colours": {1592784000: "red"},
+        "nested": {"00000000-0000-0000-0000-000000000001": {"e": [], "f": [{"name": "z"}]}},
+        "mixed": {"a": 1, "b": "2020-06-22T00:00:00", "c": ["red"], "d": None, "red": "red"},
+    }
+    # The order of the keys is kept
+    assert list(got["mixed"]) == ["a", "b", "c", "d", "red"]
+
+
+def test_marshal_dict_of_simple_values():
+    data = {"a": 1, "b": "2", "c": None, "d": 1.5}
+    assert marshal(data) is data
+    assert marshal({"a": [1], "b": {"c": [2]}}) == {"a": [1], "b": {"c": [2]}}
+    assert marshal({1: "a", 2.5: True}) == {1: "a", 2.5: True}
+    assert marshal({1: "a", 2: "b"}) == {1: "a", 2: "b"}
+    assert marshal({}) == {}
+
+
+def test_marshal_dict_invalid_key():
+    with pytest.raises(MarshalError) as exc_info:
+        marshal({"a": {(1, 2): 1}})
+    assert str(exc_info.value) == "Unable to marshal dict key '(1, 2)' (<class 'tuple'>) at location = .a"
+
+
+def test_marshal_tuples_and_sets():
+    @dataclass(frozen=True)
+    class Tag:
+        name: str
+
+    @dataclass
+    class Item:
+        values: Tuple[int, ...]
+        labels: FrozenSet[str]
+        tags: Set[Tag]
+        dates: Tuple[date, ...]
+
+    got = marshal(Item(values=(1, 2), labels=frozenset({"a"}), tags={Tag("x")}, dates=(date(2020, 6, 22),)))
+    assert got == {"values": [1, 2], "labels": ["a"], "tags": [{"name": "x"}], "dates": ["2020-06-22"]}
+    assert marshal((1, {"a"})) == [1, ["a"]]
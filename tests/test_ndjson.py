@@ -0,0 +1,359 @@
+import gzip
+import io
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import pytest
+
+from jsonmarshal import NdjsonReader, json_field, ndjson, read_ndjson, write_ndjson
+from jsonmarshal.exceptions import UnmarshalError
+from jsonmarshal.ndjson import _build_index
+
+
+def test_reader(tmp_path):
+    @dataclass
+    class Event:
+        id: int
+        name: str
+        created: datetime
+        note: Optional[str] = json_field(omitempty=True)
+
+    path = tmp_path / "events.ndjson"
+    path.write_text(
+        "".join(f'{{"id": {i}, "name": "event {i}", "created": {1592816105 + i}}}\n' for i in range(10))
+    )
+
+    with NdjsonReader(str(path), Event, epoch="s") as reader:
+        assert len(reader) == 10
+        assert reader[0] == Event(0, "event 0", datetime(2020, 6, 22, 8, 55, 5, tzinfo=timezone.utc), None)
+        assert reader[-1].id == 9
+        assert [event.id for event in reader[2:8:3]] == [2, 5]
+        assert [event.id for event in reader[-2:]] == [8, 9]
+        assert [event.id for event in reader] == list(range(10))
+        assert reader.raw(1) == b'{"id": 1, "name": "event 1", "created": 1592816106}'
+
+
+@pytest.mark.parametrize("index", [10, -11])
+def test_reader_index_out_of_range(tmp_path, index):
+    @dataclass
+    class Event:
+        id: int
+
+    path = tmp_path / "events.ndjson"
+    path.write_text("".join(f'{{"id": {i}}}\n' for i in range(10)))
+
+    with NdjsonReader(str(path), Event) as reader:
+        with pytest.raises(IndexError) as exc_info:
+            reader[index]
+    assert str(exc_info.value) == f"record index {index if index >= 0 else index + 10} out of range"
+
+
+def test_reader_options(tmp_path):
+    @dataclass
+    class Event:
+        id: int
+        name: str
+        created: datetime
+        note: Optional[str] = json_field(omitempty=True)
+
+    path = tmp_path / "events.ndjson"
+    path.write_text('{"id": 1, "name": "a", "created": 1592816105000, "note": "b"}')
+
+    with NdjsonReader(str(path), Event, epoch="ms", output="record") as reader:
+        record = reader[0]
+    assert not isinstance(record, Event)
+    assert record == (1, "a", datetime(2020, 6, 22, 8, 55, 5, tzinfo=timezone.utc), "b")
+
+
+def test_reader_invalid_json(tmp_path):
+    @dataclass
+    class Event:
+        id: int
+
+    path = tmp_path / "events.ndjson"
+    path.write_text('{"id": 0}\n{invalid\n')
+
+    with NdjsonReader(str(path), Event) as reader:
+        assert reader[0] == Event(0)
+        with pytest.raises(UnmarshalError) as exc_info:
+            reader[1]
+    assert str(exc_info.value).startswith(f"Invalid json in record 1 of {path}: Expecting property name")
+
+
+def test_reader_invalid_record_then_valid(tmp_path):
+    @dataclass
+    class Inner:
+        x: int
+
+    @dataclass
+    class Outer:
+        inner: Inner
+        a: int
+
+    path = tmp_path / "records.ndjson"
+    path.write_text('{"inner": {"x": "zz"}, "a": "bad"}\n{"inner": {"x": 1}, "a": 2}\n')
+
+    with NdjsonReader(str(path), Outer) as reader:
+        with pytest.raises(UnmarshalError) as exc_info:
+            reader[0]
+        assert str(exc_info.value).endswith("at location = a")
+
+        # The nested objects of the invalid record are not decoded with the next one
+        want = Outer(Inner(1), 2)
+        got = reader[1]
+        assert got == want
+
+
+def test_reader_empty_file(tmp_path):
+    @dataclass
+    class Event:
+        id: int
+
+    path = tmp_path / "events.ndjson"
+    path.write_text("")
+
+    with NdjsonReader(str(path), Event) as reader:
+        assert len(reader) == 0
+        assert list(reader) == []
+
+
+@pytest.mark.parametrize(
+    "text,want",
+    [
+        (b"", []),
+        (b"{}", [0]),
+        (b"{}\n", [0]),
+        (b"{}\n{}", [0, 3]),
+        (b"\n{}\r\n\r\n  \n{}\n\n", [1, 10]),
+        (b'{"a": "          "}\n\n', [0]),
+        (b"{}\n \t          \r\n{}", [0, 17]),
+    ],
+)
+def test_build_index(text, want):
+    assert _build_index(text).tolist() == want
+
+
+def test_reader_closes_file_on_error(tmp_path, monkeypatch):
+    @dataclass
+    class Event:
+        id: int
+
+    path = tmp_path / "events.ndjson"
+    path.write_text('{"id": 0}\n')
+    files = []
+
+    def _open(*args):
+        files.append(open(*args))
+        return files[-1]
+
+    def _fail(data):
+        raise RuntimeError("indexing failed")
+
+    monkeypatch.setattr(ndjson, "open", _open, raising=False)
+    monkeypatch.setattr(ndjson, "_build_index", _fail)
+    with pytest.raises(RuntimeError):
+        NdjsonReader(str(path), Event)
+    assert files[0].closed
+
+
+def test_reader_index_path(tmp_path):
+    @dataclass
+    class Event:
+        id: int
+
+    path = tmp_path / "events.ndjson"
+    path.write_text("".join(f'{{"id": {i}}}\n' for i in range(10)))
+    index_path = str(tmp_path / "events.idx")
+
+    with NdjsonReader(str(path), Event, index_path=index_path) as reader:
+        assert len(reader) == 10
+    assert os.path.exists(index_path)
+
+    # The persisted index is used
+    with open(index_path, "r+b") as buf:
+        buf.truncate(os.path.getsize(index_path) - 8)
+    with NdjsonReader(str(path), Event, index_path=index_path) as reader:
+        assert len(reader) == 9
+
+    # and rebuilt when the file changes.
+    with open(path, "a") as buf:
+        buf.write('{"id": 10}\n')
+    with NdjsonReader(str(path), Event, index_path=index_path) as reader:
+        assert len(reader) == 11
+        assert reader[10] == Event(10)
+    with NdjsonReader(str(path), Event, index_path=index_path) as reader:
+        assert len(reader) == 11
+
+
+def test_reader_index_path_interrupted(tmp_path, monkeypatch):
+    @dataclass
+    class Event:
+        id: int
+
+    path = tmp_path / "events.ndjson"
+    path.write_text('{"id": 0}\n{"id": 1}\n')
+    index_path = tmp_path / "events.idx"
+    index_path.write_bytes(b"previous")
+
+    def _fail(src, dst):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(os, "replace", _fail)
+    with pytest.raises(KeyboardInterrupt):
+        NdjsonReader(str(path), Event, index_path=str(index_path))
+
+    # The index is left as it was, without temporary files.
+    assert index_path.read_bytes() == b"previous"
+    assert sorted(os.listdir(tmp_path)) == ["events.idx", "events.ndjson"]
+
+
+@pytest.mark.parametrize(
+    "name,magic",
+    [
+        ("events.ndjson", b'{"id": 0'),
+        ("events.ndjson.gz", b"\x1f\x8b"),
+        ("events.ndjson.bz2", b"BZh"),
+        ("events.ndjson.xz", b"\xfd7zXZ"),
+    ],
+)
+def test_write_read_ndjson(tmp_path, monkeypatch, name, magic):
+    @dataclass
+    class Event:
+        id: int
+        name: str
+        created: datetime
+        note: Optional[str] = json_field(omitempty=True)
+
+    monkeypatch.setattr(ndjson, "_WRITE_BATCH_SIZE", 7)
+    path = tmp_path / name
+    events = [
+        Event(i, f"event {i}", datetime(2020, 6, 22, 8, 55, i, tzinfo=timezone.utc), None) for i in range(50)
+    ]
+
+    write_ndjson(path, iter(events), epoch="s")
+    assert path.read_bytes().startswith(magic)
+
+    want = events
+    got = list(read_ndjson(str(path), Event, block_size=16, epoch="s"))
+    assert got == want
+    assert list(read_ndjson(path, Event, epoch="s")) == want
+
+
+@pytest.mark.parametrize("compression", [None, "gzip", "bz2", "lzma"])
+def test_write_read_ndjson_file_object(compression):
+    @dataclass
+    class Event:
+        id: int
+        created: datetime
+
+    events = [Event(i, datetime(2020, 6, 22, 8, 55, i, tzinfo=timezone.utc)) for i in range(3)]
+
+    buf = io.BytesIO()
+    write_ndjson(buf, events, compression=compression, datetime_fmt="%Y-%m-%d %H:%M:%S")
+    assert not buf.closed
+
+    buf.seek(0)
+    # The timezone is not part of the format
+    want = [Event(i, datetime(2020, 6, 22, 8, 55, i)) for i in range(3)]
+    got = list(read_ndjson(buf, Event, compression=compression, datetime_fmt="%Y-%m-%d %H:%M:%S"))
+    assert got == want
+
+
+def test_read_ndjson_lines(tmp_path):
+    @dataclass
+    class Event:
+        id: int
+
+    path = tmp_path / "events.ndjson"
+    path.write_text('\n{"id": 1}\r\n\n  \n{"id": 2}')
+
+    want = [Event(1), Event(2)]
+    got = list(read_ndjson(path, Event, block_size=4))
+    assert got == want
+
+
+def test_read_ndjson_long_lines(tmp_path):
+    @dataclass
+    class Series:
+        name: str
+        values: List[int]
+
+    path = tmp_path / "series.ndjson"
+    values = ", ".join(["7"] * 100)
+    path.write_text(f'{{"name": "a", "values": [{values}]}}\n\n{{"name": "b", "values": []}}\n{{"name": ')
+
+    # The lines are longer than the blocks, the last one not being terminated.
+    series = read_ndjson(path, Series, block_size=8)
+    want = [Series("a", [7] * 100), Series("b", [])]
+    got = [next(series), next(series)]
+    assert got == want
+    with pytest.raises(UnmarshalError) as exc_info:
+        next(series)
+    assert str(exc_info.value).startswith(f"Invalid json on line 4 of {path}")
+
+
+def test_read_ndjson_invalid_json(tmp_path):
+    @dataclass
+    class Event:
+        id: int
+
+    path = tmp_path / "events.ndjson.gz"
+    with gzip.open(path, "wt") as buf:
+        buf.write('{"id": 1}\n\n{"id": 2,\n')
+
+    events = read_ndjson(path, Event)
+    assert next(events) == Event(1)
+    with pytest.raises(UnmarshalError) as exc_info:
+        next(events)
+    assert str(exc_info.value).startswith(f"Invalid json on line 3 of {path}: Expecting property name")
+
+
+def test_read_ndjson_stop(tmp_path):
+    @dataclass
+    class Event:
+        id: int
+
+    path = tmp_path / "events.ndjson"
+    write_ndjson(path, [Event(i) for i in range(5000)])
+    threads = threading.active_count()
+
+    events = read_ndjson(path, Event, block_size=16)
+    next(events)
+    # The background thread reading the file is stopped when the generator is closed
+    assert threading.active_count() == threads + 1
+    events.close()
+    assert threading.active_count() == threads
+
+
+def test_read_write_ndjson_errors(monkeypatch):
+    @dataclass
+    class Event:
+        id: int
+
+    class Broken(io.BytesIO):
+        def read(self, *args):
+            raise OSError("read failed")
+
+        def write(self, *args):
+            raise OSError("write failed")
+
+    monkeypatch.setattr(ndjson, "_WRITE_BATCH_SIZE", 1)
+    with pytest.raises(OSError, match="write failed"):
+        write_ndjson(Broken(), [Event(0), Event(1)], compression=None)
+
+    with pytest.raises(OSError, match="read failed"):
+        list(read_ndjson(Broken(), Event))
+
+
+def test_ndjson_invalid_compression():
+    @dataclass
+    class Event:
+        id: int
+
+    with pytest.raises(ValueError) as exc_info:
+        list(read_ndjson("events.zip", Event, compression="zip"))
+    want = "Invalid compression 'zip', expected one of ['infer', 'gzip', 'bz2', 'lzma']"
+    assert str(exc_info.value) == want
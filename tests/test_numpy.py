@@ -0,0 +1,135 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import pytest
+
+from jsonmarshal import json_field
+from jsonmarshal.exceptions import MarshalError, UnmarshalError
+from jsonmarshal.marshal import marshal
+from jsonmarshal.unmarshal import unmarshal
+
+np = pytest.importorskip("numpy")
+
+
+def test_unmarshal_datetime64_array():
+    @dataclass
+    class Item:
+        values: np.ndarray = json_field(dtype="datetime64[ms]")
+        optional_values: Optional[np.ndarray] = json_field(dtype="datetime64[s]")
+
+    json = {
+        "values": [
+            "2020-06-22T08:55:05.123",
+            "2020-06-22T08:55:05.123Z",
+            "2020-06-22T09:55:05.123+01:00",
+            None,
+        ],
+        "optional_values": None,
+    }
+
+    got = unmarshal(json, Item)
+    want = np.array(
+        ["2020-06-22T08:55:05.123", "2020-06-22T08:55:05.123", "2020-06-22T08:55:05.123", "NaT"],
+        dtype="datetime64[ms]",
+    )
+    assert got.values.dtype == np.dtype("datetime64[ms]")
+    np.testing.assert_array_equal(got.values, want)
+    assert got.optional_values is None
+
+
+@pytest.mark.parametrize("dtype", [None, "U10"])
+def test_unmarshal_ndarray_unsupported_dtype(dtype):
+    @dataclass
+    class Item:
+        values: np.ndarray = json_field(dtype=dtype)
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal({"values": [1.0]}, Item)
+    assert str(exc_info.value) == (
+        f"numpy.ndarray fields require a datetime64 or numeric dtype (json_field(dtype=...)), "
+        f"got {dtype} at location = values"
+    )
+
+
+@pytest.mark.parametrize("dtype", ["float6", "datetime64[xx]"])
+def test_invalid_dtype(dtype):
+    with pytest.raises(ValueError) as exc_info:
+        json_field(dtype=dtype)
+    assert str(exc_info.value).startswith(f"Invalid dtype {dtype!r}: ")
+
+
+def test_unmarshal_numeric_array():
+    @dataclass
+    class Item:
+        values: np.ndarray = json_field(dtype="float32")
+        counts: np.ndarray = json_field(dtype="int64")
+        matrix: np.ndarray = json_field(dtype="float64")
+        flags: np.ndarray = json_field(dtype="bool")
+
+    json = {"values": [1.5, 2], "counts": [], "matrix": [[1.0, 2.0], [3.0, 4.0]], "flags": [True, False]}
+    got = unmarshal(json, Item)
+    assert got.values.dtype == np.dtype("float32")
+    np.testing.assert_array_equal(got.values, np.array([1.5, 2.0]))
+    assert got.counts.dtype == np.dtype("int64")
+    assert got.counts.shape == (0,)
+    assert got.matrix.shape == (2, 2)
+    np.testing.assert_array_equal(got.flags, np.array([True, False]))
+
+    assert marshal(got) == {
+        "values": [1.5, 2.0],
+        "counts": [],
+        "matrix": [[1.0, 2.0], [3.0, 4.0]],
+        "flags": [True, False],
+    }
+
+
+@pytest.mark.parametrize("values", [[1.5], [None], ["1"], [2**64]])
+def test_unmarshal_numeric_array_invalid(values):
+    @dataclass
+    class Item:
+        values: np.ndarray = json_field(dtype="int64")
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal({"values": values}, Item)
+    assert str(exc_info.value) == f"Unable to use data value '{values}' as int64 at location = values"
+
+
+def test_unmarshal_datetime64_array_invalid():
+    @dataclass
+    class Item:
+        values: np.ndarray = json_field(dtype="datetime64[ms]")
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal({"values": "2020-06-22T08:55:05"}, Item)
+    assert str(exc_info.value) == (
+        "Invalid schema. schema = <class 'numpy.ndarray'>, data = '2020-06-22T08:55:05' "
+        "(<class 'str'>) at location = values"
+    )
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal({"values": ["not-a-date"]}, Item)
+    assert str(exc_info.value) == (
+        "Unable to use data value '['not-a-date']' as datetime64[ms] at location = values"
+    )
+
+
+def test_marshal_datetime64_array():
+    @dataclass
+    class Item:
+        values: np.ndarray = json_field(dtype="datetime64[ms]")
+
+    item = Item(values=np.array(["2020-06-22T08:55:05.123", "NaT"], dtype="datetime64[ms]"))
+    assert marshal(item) == {"values": ["2020-06-22T08:55:05.123", None]}
+
+    item = Item(values=np.array(["2020-06-22T08:55:05"], dtype="datetime64[s]"))
+    assert marshal(item) == {"values": ["2020-06-22T08:55:05"]}
+
+
+def test_marshal_ndarray_unsupported_dtype():
+    @dataclass
+    class Item:
+        values: np.ndarray
+
+    with pytest.raises(MarshalError) as exc_info:
+        marshal(Item(values=np.array(["a"])))
+    assert str(exc_info.value) == "Unable to marshal numpy array with dtype <U1."
@@ -0,0 +1,64 @@
+import json
+import multiprocessing
+from typing import List
+
+import pytest
+
+from jsonmarshal import marshal, marshal_parallel, unmarshal
+from jsonmarshal.exceptions import MarshalError
+from jsonmarshal.parallel import _SHARED, _encode_shared
+from tests.fixtures import load_json
+from tests.fixtures.collected_data import datetime_fmt, marshalled
+from tests.fixtures.collected_data.schema import Task
+
+
+@pytest.fixture(scope="module")
+def tasks():
+    data = load_json(marshalled)
+    rows = [task for officer in data["officers"]["directors"] for task in officer["linked_profile"]["tasks"]]
+    return unmarshal(rows, List[Task], datetime_fmt=datetime_fmt) * 5
+
+
+@pytest.mark.parametrize("workers,chunk_size", [(1, None), (2, None), (2, 3), (3, 100)])
+def test_marshal_parallel(tasks, workers, chunk_size):
+    want = marshal(tasks, datetime_fmt=datetime_fmt)
+
+    got = marshal_parallel(tasks, workers=workers, chunk_size=chunk_size, datetime_fmt=datetime_fmt)
+    assert got == json.dumps(want).encode()
+
+    got = marshal_parallel(
+        tasks, ndjson=True, workers=workers, chunk_size=chunk_size, datetime_fmt=datetime_fmt
+    )
+    assert got == "".join(json.dumps(task) + "\n" for task in want).encode()
+    assert not _SHARED
+
+
+def test_marshal_parallel_spawn(tasks, monkeypatch):
+    monkeypatch.setattr(multiprocessing, "get_start_method", lambda: "spawn")
+    got = marshal_parallel(tasks, workers=2, epoch="ms")
+    assert json.loads(got) == marshal(tasks, epoch="ms")
+
+
+@pytest.mark.parametrize("ndjson,want", [(False, b"[]"), (True, b"")])
+def test_marshal_parallel_empty(ndjson, want):
+    assert marshal_parallel([], ndjson=ndjson, workers=2) == want
+
+
+def test_marshal_parallel_errors(tasks):
+    with pytest.raises(ValueError):
+        marshal_parallel(tasks, workers=2, epoch="us")
+
+    with pytest.raises(MarshalError):
+        marshal_parallel([*tasks, object()], workers=2, chunk_size=2)
+    assert not _SHARED
+
+
+def test_encode_shared(tasks):
+    # Run in the worker processes
+    _SHARED[-1] = tasks
+    try:
+        got = _encode_shared(-1, (1, 3), True, {"datetime_fmt": datetime_fmt})
+    finally:
+        del _SHARED[-1]
+    want = marshal(tasks[1:3], datetime_fmt=datetime_fmt)
+    assert got == "".join(json.dumps(task) + "\n" for task in want).encode()
@@ -0,0 +1,167 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+import pytest
+
+from jsonmarshal import (
+    NdjsonReader,
+    RawJSON,
+    marshal,
+    marshal_to_stream,
+    read_ndjson,
+    unmarshal,
+    write_ndjson,
+)
+
+
+def test_unmarshal_raw_json_field():
+    @dataclass
+    class Request:
+        id: int
+        extensions: RawJSON
+
+    extensions = {"trace": [1, {"span": "a"}], "when": "2020-06-22T09:15:05"}
+    data = {"id": 1, "extensions": extensions}
+
+    want = Request(1, RawJSON({"trace": [1, {"span": "a"}], "when": "2020-06-22T09:15:05"}))
+    got = unmarshal(data, Request)
+    assert got == want
+    # The value is kept as it is, without being copied
+    assert got.extensions.value is extensions
+
+
+def test_unmarshal_any_field():
+    @dataclass
+    class Request:
+        id: int
+        meta: Any
+
+    meta = {"nested": [{"x": 1}]}
+    data = {"id": 1, "meta": meta}
+
+    want = Request(1, {"nested": [{"x": 1}]})
+    got = unmarshal(data, Request)
+    assert got == want
+    assert got.meta is meta
+
+
+def test_unmarshal_any_elements():
+    @dataclass
+    class Request:
+        tags: List[Any]
+        previous: Optional[RawJSON]
+        extra: Optional[Any]
+
+    data = {"tags": [1, "a", None, {"b": 2}], "previous": None, "extra": [1.5]}
+
+    want = Request([1, "a", None, {"b": 2}], None, [1.5])
+    got = unmarshal(data, Request)
+    assert got == want
+
+
+@pytest.mark.parametrize(
+    "data,schema,want",
+    [
+        ({"a": [1]}, Any, {"a": [1]}),
+        ([1, {"a": [1]}], List[RawJSON], [RawJSON(1), RawJSON({"a": [1]})]),
+        (None, Optional[Any], None),
+    ],
+)
+def test_unmarshal_passthrough_values(data, schema, want):
+    got = unmarshal(data, schema)
+    assert got == want
+
+
+def test_marshal_passthrough():
+    @dataclass
+    class Request:
+        id: int
+        extensions: RawJSON
+        meta: Any
+
+    data = {"id": 1, "extensions": {"trace": [1, {"span": "a"}]}, "meta": {"nested": [{"x": 1}]}}
+
+    want = {"id": 1, "extensions": {"trace": [1, {"span": "a"}]}, "meta": {"nested": [{"x": 1}]}}
+    got = marshal(unmarshal(data, Request))
+    assert got == want
+
+
+def test_marshal_raw_json():
+    want = [{"a": 1}, [2], {"b": 3}]
+    got = marshal([RawJSON({"a": 1}), RawJSON([2]), RawJSON.from_text('{"b": 3}')])
+    assert got == want
+
+
+def test_raw_json_from_text():
+    raw = RawJSON.from_text(b'{"a":  [1, 2]}')
+    assert repr(raw) == "RawJSON.from_text('{\"a\":  [1, 2]}')"
+    assert raw.text == '{"a":  [1, 2]}'
+
+    assert raw.value == {"a": [1, 2]}
+    assert repr(raw) == "RawJSON({'a': [1, 2]})"
+    # The text is kept once the value is decoded
+    assert raw.text == '{"a":  [1, 2]}'
+
+
+def test_raw_json_from_value():
+    raw = RawJSON([1])
+    assert raw.text == "[1]"
+    assert raw == RawJSON.from_text("[1]")
+    assert raw != [1]
+
+
+def test_raw_json_invalid_text():
+    raw = RawJSON.from_text("{")
+    with pytest.raises(ValueError):
+        raw.value
+
+
+def test_ndjson_read_raw_json(tmp_path):
+    path = tmp_path / "requests.ndjson"
+    path.write_text('{"id":1,  "ext": {}}\n[1, 2]\nnot json\n\n')
+
+    with NdjsonReader(str(path), RawJSON) as reader:
+        assert [raw.text for raw in reader] == ['{"id":1,  "ext": {}}', "[1, 2]", "not json"]
+        assert reader[1].value == [1, 2]
+
+    got = [raw.text for raw in read_ndjson(str(path), RawJSON)]
+    assert got == ['{"id":1,  "ext": {}}', "[1, 2]", "not json"]
+
+
+def test_ndjson_write_raw_json(tmp_path):
+    path = tmp_path / "requests.ndjson"
+    # The records are written as they are, even when they are not valid json.
+    records = [RawJSON.from_text("not json"), RawJSON({"id": 2}), RawJSON.from_text('{\n"id": 3\n}'), 4]
+
+    write_ndjson(str(path), records)
+    want = ["not json", '{"id": 2}', '{ "id": 3 }', "4"]
+    got = path.read_text().splitlines()
+    assert got == want
+
+
+def test_marshal_to_stream_raw_json():
+    @dataclass
+    class Request:
+        id: int
+        extensions: RawJSON
+        tags: List[Any]
+        meta: Any
+
+    class Writer:
+        chunks = []
+
+        def write(self, data):
+            self.chunks.append(data)
+
+        async def drain(self):
+            pass
+
+    writer = Writer()
+    data = Request(
+        1, RawJSON.from_text('{"a" :1}'), [RawJSON.from_text('{"b":2}'), 1], [RawJSON.from_text("[ 1 ]")]
+    )
+    asyncio.run(marshal_to_stream(writer, data))
+    want = '{"id": 1, "extensions": {"a" :1}, "tags": [{"b":2}, 1], "meta": [[ 1 ]]}'
+    got = b"".join(writer.chunks).decode()
+    assert got == want
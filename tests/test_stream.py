@@ -0,0 +1,492 @@
+import asyncio
+import copy
+import io
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import pytest
+
+from jsonmarshal import Decoder, json_field, marshal, marshal_to_stream, unmarshal, unmarshal_stream
+from jsonmarshal.exceptions import UnmarshalError
+from tests.fixtures import load_json
+from tests.fixtures.collected_data import datetime_fmt, marshalled
+from tests.fixtures.collected_data.schema import Officer, Schema
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 65536])
+@pytest.mark.parametrize("binary", [False, True])
+def test_unmarshal_stream(chunk_size, binary):
+    @dataclass
+    class Item:
+        id: int
+        created: datetime
+        tags: List[str]
+        note: Optional[str] = json_field(omitempty=True)
+
+    document = {
+        "meta": {"page": 1, "sizes": [1, 2]},
+        "data": [
+            {"id": 0, "created": 1592816105, "tags": ["a", "b"]},
+            {"id": 1, "created": 1592816106, "tags": []},
+        ],
+        "next": "cursor",
+        "total": 2,
+    }
+    text = json.dumps(document, indent=2)
+    fp = io.BytesIO(text.encode()) if binary else io.StringIO(text)
+
+    stream = unmarshal_stream(fp, Item, path="data", chunk_size=chunk_size, epoch="s")
+    want = [
+        Item(0, datetime(2020, 6, 22, 8, 55, 5, tzinfo=timezone.utc), ["a", "b"], None),
+        Item(1, datetime(2020, 6, 22, 8, 55, 6, tzinfo=timezone.utc), [], None),
+    ]
+    got = list(stream)
+    assert got == want
+    assert stream.envelope == {"meta": {"page": 1, "sizes": [1, 2]}, "next": "cursor", "total": 2}
+
+
+def test_unmarshal_stream_is_lazy():
+    @dataclass
+    class Item:
+        id: int
+
+    fp = io.StringIO(
+        json.dumps({"meta": {"page": 1}, "data": [{"id": i} for i in range(100)], "total": 100})
+    )
+
+    stream = unmarshal_stream(fp, Item, path="data", chunk_size=16)
+    assert next(iter(stream)) == Item(0)
+    # Only the start of the document has been read
+    assert fp.tell() < 100
+    assert stream.envelope == {"meta": {"page": 1}}
+
+    want = list(range(1, 100))
+    got = [item.id for item in stream]
+    assert got == want
+    assert stream.envelope == {"meta": {"page": 1}, "total": 100}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64])
+def test_unmarshal_stream_large_element(chunk_size):
+    @dataclass
+    class Page:
+        id: int
+        lines: List[str]
+
+    lines = ["{[", "]}}", 'a "quoted" line', "\\"] * 50
+    text = json.dumps([{"id": 1, "lines": lines}, {"id": 2, "lines": []}])
+
+    stream = unmarshal_stream(io.StringIO(text), Page, chunk_size=chunk_size)
+    want = [Page(1, ["{[", "]}}", 'a "quoted" line', "\\"] * 50), Page(2, [])]
+    got = list(stream)
+    assert got == want
+
+
+def test_unmarshal_stream_root_array():
+    @dataclass
+    class Item:
+        id: int
+        name: str
+
+    text = '[{"id": 0, "name": "a"}, {"id": 1, "name": "b"}]'
+
+    want = [(0, "a"), (1, "b")]
+    got = list(unmarshal_stream(io.StringIO(text), Item, output="record"))
+    assert got == want
+    assert not isinstance(got[0], Item)
+
+
+def test_unmarshal_stream_nested_path():
+    @dataclass
+    class Item:
+        id: int
+
+    text = json.dumps({"status": "ok", "result": {"count": 2, "items": [{"id": 0}, {"id": 1}], "more": {}}})
+
+    stream = unmarshal_stream(io.StringIO(text), Item, path="result.items")
+    want = [Item(0), Item(1)]
+    got = list(stream)
+    assert got == want
+    assert stream.envelope == {"status": "ok", "result": {"count": 2, "more": {}}}
+
+
+@pytest.mark.parametrize(
+    "text,path",
+    [
+        ('{"data": []}', "data"),
+        ('{"data": null}', "data"),
+        ("[]", None),
+        ('{"result": null}', "result.items"),
+    ],
+)
+def test_unmarshal_stream_empty(text, path):
+    @dataclass
+    class Item:
+        id: int
+
+    stream = unmarshal_stream(io.StringIO(text), Item, path=path)
+    assert list(stream) == []
+    assert stream.envelope == {}
+
+
+def test_unmarshal_stream_collected_data():
+    data = load_json(marshalled)
+    stream = unmarshal_stream(
+        io.StringIO(json.dumps(data)), Officer, path="officers.directors", datetime_fmt=datetime_fmt
+    )
+    directors = copy.deepcopy(data["officers"]["directors"])
+    assert list(stream) == unmarshal(directors, List[Officer], datetime_fmt=datetime_fmt)
+
+    del data["officers"]["directors"]
+    assert stream.envelope == data
+
+
+@pytest.mark.parametrize(
+    "text,path,error",
+    [
+        (
+            '{"meta": 1}',
+            "data",
+            "Expected json key is not present in object at position ''. 'data' not in ['meta']",
+        ),
+        ("{}", "data", "Expected json key is not present in object at position ''. 'data' not in []"),
+        (
+            '{"result": {}}',
+            "result.items",
+            "Expected json key is not present in object at position 'result'. " "'items' not in []",
+        ),
+        ('{"data": {"a": 1}}', "data", "Expected a json array at location = data, got {'a': 1}"),
+        ('[{"data": []}]', "data", "Expected a json object at location = , got [{'data': []}]"),
+        (
+            '{"data": [{"id": "1"}]}',
+            "data",
+            "Invalid schema. schema = <class 'int'>, data = '1' (<class 'str'>) " "at location = id",
+        ),
+        ('{"data": [] "next": 1}', "data", "Invalid json: Expecting one of [',', '}'] at position 12"),
+        ('{"data": []', "data", "Invalid json: Expecting one of [',', '}'] at position 11"),
+        ("{1: 2}", "data", "Invalid json: Expecting property name enclosed in double quotes at position 1"),
+        ('{"data": [{"id": }]}', "data", "Invalid json: Expecting value at position 17"),
+        ("[] []", None, "Invalid json: Extra data at position 3"),
+        ("", None, "Invalid json: Expecting value at position 0"),
+    ],
+)
+def test_unmarshal_stream_invalid(text, path, error):
+    @dataclass
+    class Item:
+        id: int
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        list(unmarshal_stream(io.StringIO(text), Item, path=path, chunk_size=4))
+    assert str(exc_info.value) == error
+
+
+@pytest.mark.parametrize("size", [1, 3, 10, 1000])
+@pytest.mark.parametrize("separator,indent", [("\n", None), ("", None), (" ", 2), ("\r\n", None)])
+@pytest.mark.parametrize("binary", [False, True])
+def test_decoder(size, separator, indent, binary):
+    @dataclass
+    class Item:
+        id: int
+        tags: List[str]
+        note: Optional[str] = json_field(omitempty=True)
+
+    documents = [
+        {"id": 0, "tags": ["a", "{b}"]},
+        {"id": 1, "tags": ['"[c]"', "d\\"], "note": "x\ny"},
+        {"id": 2, "tags": []},
+    ]
+    text = separator.join(json.dumps(document, indent=indent) for document in documents)
+    data = text.encode() if binary else text
+
+    # The documents are split into chunks of `size` characters (or bytes).
+    decoder = Decoder(Item)
+    got = []
+    for start in range(0, len(data), size):
+        end = start + size
+        got.extend(decoder.feed(data[start:end]))
+    got.extend(decoder.close())
+    want = [Item(0, ["a", "{b}"], None), Item(1, ['"[c]"', "d\\"], "x\ny"), Item(2, [], None)]
+    assert got == want
+
+
+def test_decoder_feed():
+    @dataclass
+    class Item:
+        id: int
+        created: datetime
+        tags: List[str]
+
+    decoder = Decoder(Item, epoch="s", output="record")
+    first = datetime(1970, 1, 1, 0, 0, 1, tzinfo=timezone.utc)
+    assert decoder.feed('{"id": 0, "created": 1, "tags": []}\n{"id": 1,') == [(0, first, [])]
+    second = datetime(1970, 1, 1, 0, 0, 2, tzinfo=timezone.utc)
+    assert decoder.feed('"created": 2, "tags": ["\\""]}') == [(1, second, ['"'])]
+    assert decoder.feed(" \n ") == []
+    assert decoder.close() == []
+
+
+def test_decoder_unicode():
+    @dataclass
+    class Item:
+        tags: List[str]
+
+    data = json.dumps({"tags": ["\u00e9\u20ac"]}, ensure_ascii=False).encode()
+
+    # The characters are split between the chunks.
+    decoder = Decoder(Item)
+    got = [item for byte in data for item in decoder.feed(bytes([byte]))]
+    want = [Item(["\u00e9\u20ac"])]
+    assert got == want
+
+
+@pytest.mark.parametrize(
+    "text,schema,want",
+    [
+        ("1 2\n3", int, [1, 2, 3]),
+        ("1.5 -2e3", float, [1.5, -2000.0]),
+        ('"a" "b\\"c""d"', str, ["a", 'b"c', "d"]),
+        ("true false", bool, [True, False]),
+        ("null 1", Optional[int], [None, 1]),
+        ("[1][2, 3]", List[int], [[1], [2, 3]]),
+    ],
+)
+def test_decoder_scalars(text, schema, want):
+    decoder = Decoder(schema)
+    got = decoder.feed(text) + decoder.close()
+    assert got == want
+
+    # One character at a time
+    decoder = Decoder(schema)
+    got = [value for char in text for value in decoder.feed(char)] + decoder.close()
+    assert got == want
+
+
+@pytest.mark.parametrize(
+    "text,error",
+    [
+        ('{"id": 0, "tags": [}', "Invalid json: Expecting value: line 1 column 20 (char 19)"),
+        ("tru\n", "Invalid json: Expecting value: line 1 column 1 (char 0)"),
+        (
+            '{"id": "0", "tags": []}\n',
+            "Invalid schema. schema = <class 'int'>, data = '0' " "(<class 'str'>) at location = id",
+        ),
+    ],
+)
+def test_decoder_invalid(text, error):
+    @dataclass
+    class Item:
+        id: int
+        tags: List[str]
+
+    decoder = Decoder(Item)
+    with pytest.raises(UnmarshalError) as exc_info:
+        decoder.feed('{"id": 0, "tags": []}' + text)
+    assert str(exc_info.value) == error
+
+    # The documents before and after the invalid one are decoded
+    want = [Item(0, []), Item(2, [])]
+    got = decoder.feed('{"id": 2, "tags": []}\n')
+    assert got == want
+
+
+@pytest.mark.parametrize(
+    "text,error",
+    [
+        ('{"id": ]}\n', "Invalid json: Expecting value: line 1 column 8 (char 7)"),
+        ('{"id": [}]}\n', "Invalid json: Expecting value: line 1 column 9 (char 8)"),
+        ("}\n", "Invalid json: unexpected '}'"),
+        ("]", "Invalid json: unexpected ']'"),
+    ],
+)
+def test_decoder_invalid_then_valid(text, error):
+    @dataclass
+    class Item:
+        id: int
+
+    decoder = Decoder(Item)
+    with pytest.raises(UnmarshalError) as exc_info:
+        decoder.feed(text)
+    assert str(exc_info.value) == error
+
+    # The invalid document is skipped, including its stray closing brackets
+    want = [Item(1)]
+    got = decoder.feed('{"id": 1}\n')
+    assert got == want
+    assert decoder.close() == []
+
+
+def test_decoder_invalid_nested_then_valid():
+    @dataclass
+    class Inner:
+        x: int
+
+    @dataclass
+    class Outer:
+        inner: Inner
+        a: int
+
+    decoder = Decoder(Outer)
+    with pytest.raises(UnmarshalError) as exc_info:
+        decoder.feed('{"inner": {"x": "zz"}, "a": "bad"}\n')
+    assert str(exc_info.value).endswith("at location = a")
+
+    # The nested objects of the invalid document are not decoded with the next one
+    want = [Outer(Inner(1), 2)]
+    got = decoder.feed('{"inner": {"x": 1}, "a": 2}\n')
+    assert got == want
+
+
+@pytest.mark.parametrize("text", ['{"id": 0', '"abc', '"abc\\'])
+def test_decoder_incomplete(text):
+    @dataclass
+    class Item:
+        id: int
+
+    decoder = Decoder(Item)
+    assert decoder.feed(text) == []
+    with pytest.raises(UnmarshalError) as exc_info:
+        decoder.close()
+    assert str(exc_info.value) == "Invalid json: incomplete document at the end of the data"
+
+    # The decoder can be used again
+    want = [Item(1)]
+    got = decoder.feed('{"id": 1}')
+    assert got == want
+    assert decoder.close() == []
+
+
+def test_decoder_max_buffer_size():
+    @dataclass
+    class Item:
+        id: int
+        tags: List[str]
+
+    decoder = Decoder(Item, max_buffer_size=20)
+    assert decoder.feed('{"id": 0, "tags": []}\n{"id": 1,') == [Item(0, [])]
+    with pytest.raises(UnmarshalError) as exc_info:
+        decoder.feed('"tags": ["abc", ')
+    assert str(exc_info.value) == "Incomplete json document exceeds max_buffer_size (20)"
+
+    # The buffer is cleared
+    want = [Item(2, [])]
+    got = decoder.feed('{"id": 2, "tags": []}')
+    assert got == want
+
+
+@pytest.mark.parametrize("chunk_size", [1, 100, 65536])
+@pytest.mark.parametrize("count", [0, 1, 250])
+def test_marshal_to_stream(chunk_size, count):
+    @dataclass
+    class Item:
+        id: int
+        created: datetime
+        note: Optional[str] = json_field(omitempty=True)
+
+    @dataclass
+    class Series:
+        name: str
+        times: List[datetime] = json_field(epoch="ms")
+        items: List[Item]
+        last: Optional[Item] = json_field(omitempty=True)
+        first: Optional[Item] = json_field(omitempty=True)
+
+    class Writer:
+        def __init__(self):
+            self.chunks = []
+            self.drained = 0
+
+        def write(self, data):
+            self.chunks.append(data)
+
+        async def drain(self):
+            self.drained += 1
+
+    times = [datetime.fromtimestamp(i, timezone.utc) for i in range(count)]
+    items = [Item(i, times[i], None if i % 2 else "note") for i in range(count)]
+    series = Series("series", times, items, items[-1] if items else None, None)
+
+    for data in (series, items, [series, series], tuple(times), frozenset(times), 1, None):
+        writer = Writer()
+        asyncio.run(marshal_to_stream(writer, data, chunk_size=chunk_size, epoch="s"))
+        want = marshal(data, epoch="s")
+        got = json.loads(b"".join(writer.chunks))
+        assert got == want
+        assert writer.drained == len(writer.chunks)
+
+
+def test_marshal_to_stream_chunks():
+    @dataclass
+    class Item:
+        id: int
+        note: str
+
+    @dataclass
+    class Series:
+        name: str
+        times: List[datetime] = json_field(epoch="ms")
+        items: List[Item]
+
+    class Writer:
+        chunks = []
+
+        def write(self, data):
+            self.chunks.append(data)
+
+        async def drain(self):
+            pass
+
+    times = [datetime.fromtimestamp(i, timezone.utc) for i in range(3000)]
+    series = Series("series", times, [Item(i, "note") for i in range(3000)])
+
+    writer = Writer()
+    asyncio.run(marshal_to_stream(writer, series, chunk_size=4096))
+    assert len(writer.chunks) > 10
+    assert all(4096 <= len(chunk) < 4096 * 3 for chunk in writer.chunks[:-1])
+    # The keys are in the order of the fields
+    assert b"".join(writer.chunks).startswith(b'{"name": "series", "times": [0, 1000, ')
+
+
+def test_marshal_to_stream_collected_data():
+    class Writer:
+        chunks = []
+
+        def write(self, data):
+            self.chunks.append(data)
+
+        async def drain(self):
+            pass
+
+    data = unmarshal(load_json(marshalled), Schema, datetime_fmt=datetime_fmt)
+
+    writer = Writer()
+    asyncio.run(marshal_to_stream(writer, data, chunk_size=512, datetime_fmt=datetime_fmt))
+    want = marshal(data, datetime_fmt=datetime_fmt)
+    got = json.loads(b"".join(writer.chunks))
+    assert got == want
+
+
+def test_marshal_to_stream_server():
+    @dataclass
+    class Series:
+        name: str
+        times: List[datetime] = json_field(epoch="ms")
+
+    series = Series("series", [datetime.fromtimestamp(i, timezone.utc) for i in range(2000)])
+
+    async def serve():
+        async def handle(reader, writer):
+            await marshal_to_stream(writer, series, chunk_size=1024)
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        data = await reader.read()
+        writer.close()
+        server.close()
+        return data
+
+    want = {"name": "series", "times": [i * 1000 for i in range(2000)]}
+    got = json.loads(asyncio.run(serve()))
+    assert got == want
@@ -0,0 +1,274 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, List, Optional, Union
+
+import pytest
+
+from jsonmarshal import json_field, marshal, unmarshal
+from jsonmarshal.exceptions import UnmarshalError
+
+
+def test_unmarshal_tagged_union():
+    @dataclass
+    class Click:
+        x: int
+        y: int
+        kind: str = json_field(json="type", default="click")
+
+    @dataclass
+    class View:
+        page: str
+        kind: str = json_field(json="type", default="view")
+
+    data = [{"type": "view", "page": "home"}, {"type": "click", "x": 1, "y": 2}]
+
+    want = [View("home"), Click(1, 2)]
+    got = unmarshal(data, List[Union[Click, View]], discriminator="kind")
+    assert got == want
+
+
+def test_unmarshal_tagged_union_enum_tag():
+    class Kind(Enum):
+        CLICK = "click"
+        SCROLL = "scroll"
+
+    @dataclass
+    class Click:
+        x: int
+        kind: Kind = json_field(json="type", default=Kind.CLICK)
+
+    @dataclass
+    class Scroll:
+        offset: float
+        kind: Kind = json_field(json="type", default=Kind.SCROLL)
+
+    data = {"type": "scroll", "offset": 0.5}
+
+    want = Scroll(0.5)
+    got = unmarshal(data, Union[Click, Scroll], discriminator="kind")
+    assert got == want
+    assert got.kind is Kind.SCROLL
+
+
+def test_unmarshal_tagged_union_records():
+    @dataclass
+    class Click:
+        x: int
+        y: int
+        kind: str = json_field(json="type", default="click")
+
+    @dataclass
+    class View:
+        page: str
+        kind: str = json_field(json="type", default="view")
+
+    data = [{"type": "view", "page": "home"}, {"type": "click", "x": 1, "y": 2}]
+
+    got = unmarshal(data, List[Union[Click, View]], discriminator="kind", output="record")
+    assert got[1] == (1, 2, "click")
+    assert type(got[1]).__name__ == "Click"
+
+
+def test_unmarshal_tagged_union_fields():
+    @dataclass
+    class Click:
+        x: int
+        kind: str = json_field(json="type", default="click")
+
+    @dataclass
+    class View:
+        page: str
+        kind: str = json_field(json="type", default="view")
+
+    @dataclass
+    class Session:
+        events: List[Union[Click, View]] = json_field(discriminator="kind")
+        first: Union[Click, View] = json_field(discriminator="kind")
+        by_page: Dict[str, Union[Click, View]] = json_field(discriminator="kind")
+
+    data = {
+        "events": [{"type": "view", "page": "home"}, {"type": "click", "x": 1}],
+        "first": {"type": "view", "page": "home"},
+        "by_page": {"home": {"type": "click", "x": 3}},
+    }
+
+    want = Session(events=[View("home"), Click(1)], first=View("home"), by_page={"home": Click(3)})
+    got = unmarshal(data, Session)
+    assert got == want
+
+
+def test_unmarshal_optional_tagged_union_field():
+    @dataclass
+    class Click:
+        x: int
+        kind: str = json_field(json="type", default="click")
+
+    @dataclass
+    class View:
+        page: str
+        kind: str = json_field(json="type", default="view")
+
+    @dataclass
+    class Session:
+        last: Optional[Union[Click, View]] = json_field(discriminator="kind")
+
+    assert unmarshal({"last": {"type": "click", "x": 5}}, Session) == Session(Click(5))
+    assert unmarshal({"last": None}, Session) == Session(None)
+
+
+def test_marshal_tagged_union():
+    @dataclass
+    class Click:
+        x: int
+        kind: str = json_field(json="type", default="click")
+
+    @dataclass
+    class View:
+        page: str
+        kind: str = json_field(json="type", default="view")
+
+    @dataclass
+    class Session:
+        events: List[Union[Click, View]] = json_field(discriminator="kind")
+
+    data = {"events": [{"type": "view", "page": "home"}, {"type": "click", "x": 1}]}
+
+    want = {"events": [{"page": "home", "type": "view"}, {"x": 1, "type": "click"}]}
+    got = marshal(unmarshal(data, Session))
+    assert got == want
+
+
+def test_marshal_tag_from_default():
+    @dataclass
+    class Click:
+        x: int
+        kind: str = json_field(json="type", default="click")
+
+    # The tag is written from the default value of the discriminator field.
+    want = [{"x": 1, "type": "click"}]
+    got = marshal([Click(1)])
+    assert got == want
+
+
+@pytest.mark.parametrize(
+    "data,message",
+    [
+        ({"page": "home"}, "Missing discriminator 'type' in object at location = first"),
+        ({"type": "drag"}, "Unknown discriminator 'drag' for 'type', expected one of ['click', 'view']"),
+        ({"type": ["click"]}, "Unknown discriminator ['click'] for 'type'"),
+        ("home", "Expected an object tagged by 'type', got 'home' (<class 'str'>) at location = first"),
+    ],
+)
+def test_unmarshal_tagged_union_errors(data, message):
+    @dataclass
+    class Click:
+        x: int
+        kind: str = json_field(json="type", default="click")
+
+    @dataclass
+    class View:
+        page: str
+        kind: str = json_field(json="type", default="view")
+
+    @dataclass
+    class Session:
+        first: Union[Click, View] = json_field(discriminator="kind")
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal({"first": data}, Session)
+    assert message in str(exc_info.value)
+
+
+def test_tagged_union_json_key():
+    @dataclass
+    class Other:
+        name: str
+        kind: str = "other"
+
+    @dataclass
+    class Renamed:
+        name: str
+        kind: str = json_field(json="kind", default="renamed")
+
+    data = [{"kind": "renamed", "name": "a"}, {"kind": "other", "name": "b"}]
+
+    # The json key is the one of the discriminator fields, which is the field name by default.
+    want = [Renamed("a"), Other("b")]
+    got = unmarshal(data, List[Union[Other, Renamed]], discriminator="kind")
+    assert got == want
+
+
+def test_tagged_union_without_tag():
+    @dataclass
+    class Other:
+        name: str
+        kind: str = "other"
+
+    @dataclass
+    class Untagged:
+        name: str
+        kind: str
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal({"kind": "other", "name": "a"}, Union[Other, Untagged], discriminator="kind")
+    message = "require dataclasses with a 'kind' field holding their tag as default value"
+    assert message in str(exc_info.value)
+
+
+def test_tagged_union_of_other_types():
+    @dataclass
+    class Other:
+        name: str
+        kind: str = "other"
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal({"kind": "other", "name": "a"}, Union[Other, int], discriminator="kind")
+    assert "require dataclasses with a 'kind' field" in str(exc_info.value)
+
+
+def test_tagged_union_different_keys():
+    @dataclass
+    class Other:
+        name: str
+        kind: str = "other"
+
+    @dataclass
+    class Renamed:
+        name: str
+        kind: str = json_field(json="type", default="renamed")
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal({"kind": "other", "name": "a"}, Union[Other, Renamed], discriminator="kind")
+    assert "must use the same json key, got ['kind', 'type']" in str(exc_info.value)
+
+
+def test_tagged_union_duplicate_tags():
+    @dataclass
+    class Other:
+        name: str
+        kind: str = "other"
+
+    @dataclass
+    class Again:
+        name: str
+        kind: str = "other"
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal({"kind": "other", "name": "a"}, Union[Other, Again], discriminator="kind")
+    assert "Duplicate tag 'other'" in str(exc_info.value)
+
+
+def test_union_without_discriminator():
+    @dataclass
+    class Click:
+        x: int
+        kind: str = "click"
+
+    @dataclass
+    class View:
+        page: str
+        kind: str = "view"
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal([{"kind": "view", "page": "home"}], List[Union[Click, View]])
+    assert "unions containing anything other than optional" in str(exc_info.value)
@@ -1,7 +1,8 @@
+import copy
 import enum
 from dataclasses import dataclass
 from datetime import date, datetime
-from typing import List, Optional, Union
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set, Tuple, Union
 from uuid import UUID
 
 import pytest
@@ -9,6 +10,7 @@ import pytz
 
 from jsonmarshal.exceptions import UnmarshalError
 from jsonmarshal.fields import json_field
+from jsonmarshal.interning import InternTable
 from jsonmarshal.unmarshal import unmarshal
 from tests.fixtures import load_fixtures
 
@@ -604,6 +606,19 @@ def test_simple_datetime_explicit_format():
     assert got == want
 
 
+def test_simple_datetime_cached():
+    @dataclass
+    class Item:
+        value: List[datetime]
+
+    json = {"value": ["2020-06-22T08:55:05Z", "2020-06-22T08:55:05Z"]}
+
+    want = Item(value=[datetime(2020, 6, 22, 8, 55, 5, tzinfo=pytz.UTC)] * 2)
+    got = unmarshal(json, Item, datetime_cache_size=16)
+    assert got == want
+    assert got.value[0] is got.value[1]
+
+
 def test_simple_date():
     @dataclass
     class Item:
@@ -873,3 +888,358 @@ def test_unknown_datatype():
     with pytest.raises(UnmarshalError) as exc_info:
         unmarshal(json, Item)
     assert str(exc_info.value) == f"Schema type '{Impossible}' is not currently supported."
+
+
+def test_unknown_typing_datatype():
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal(999, Callable[[], int])
+    want = "Schema type '<class 'collections.abc.Callable'>' is not currently supported."
+    assert str(exc_info.value) == want
+
+
+def test_unmarshal_epoch():
+    @dataclass
+    class Item:
+        created: datetime
+        day: date
+        history: List[datetime] = json_field(epoch="ms")
+
+    json = {"created": 1592816105, "day": 1592784000, "history": [1592816105123]}
+
+    want = Item(
+        created=datetime(2020, 6, 22, 8, 55, 5, tzinfo=pytz.UTC),
+        day=date(2020, 6, 22),
+        history=[datetime(2020, 6, 22, 8, 55, 5, 123000, tzinfo=pytz.UTC)],
+    )
+    got = unmarshal(json, Item, epoch="s")
+    assert got == want
+
+
+@pytest.mark.parametrize("value", ["1592816105", True, 1e300])
+def test_unmarshal_epoch_invalid(value):
+    @dataclass
+    class Item:
+        created: datetime = json_field(epoch="s")
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal({"created": value}, Item)
+    assert str(exc_info.value) == (
+        f"Unable to use data value '{value}' as epoch timestamp (s) at location = created"
+    )
+
+
+def test_unmarshal_epoch_invalid_unit():
+    with pytest.raises(ValueError):
+        unmarshal(1592816105, datetime, epoch="us")
+
+    with pytest.raises(ValueError):
+        json_field(epoch="us")
+
+
+def test_enum_case_insensitive():
+    class Role(enum.Enum):
+        CUSTOMER = "CUSTOMER"
+        APPLICANT = "APPLICANT"
+
+    @dataclass
+    class Item:
+        roles: List[Role] = json_field(case_insensitive=True)
+        role: Optional[Role] = None
+
+    json = {"roles": ["customer", "Applicant"], "role": "CUSTOMER"}
+    got = unmarshal(json, Item)
+    assert got == Item(roles=[Role.CUSTOMER, Role.APPLICANT], role=Role.CUSTOMER)
+
+    json = {"roles": [], "role": "customer"}
+    with pytest.raises(UnmarshalError):
+        unmarshal(json, Item)
+
+
+def test_uuid_formats():
+    @dataclass
+    class Item:
+        ids: List[UUID]
+        owner: UUID = json_field(uuid_format="int")
+
+    json = {"ids": ["cb637f6a0dc04c4287645b98137a8ea6"], "owner": 1}
+    got = unmarshal(json, Item, uuid_format="hex")
+    assert got == Item(ids=[UUID("cb637f6a-0dc0-4c42-8764-5b98137a8ea6")], owner=UUID(int=1))
+
+    with pytest.raises(ValueError):
+        unmarshal(json, Item, uuid_format="base64")
+
+
+def test_simple_uuid_array_invalid_element():
+    @dataclass
+    class Item:
+        value: List[UUID]
+
+    json = {"value": ["cb637f6a-0dc0-4c42-8764-5b98137a8ea6", "cb637f6a"]}
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal(json, Item)
+    assert str(exc_info.value) == "Unable to use data value 'cb637f6a' as UUID <class 'uuid.UUID'>"
+
+
+def test_unmarshal_large_list_of_nested_dataclasses():
+    @dataclass
+    class Child:
+        value: int
+
+    @dataclass
+    class Item:
+        id: int
+        children: List[Child]
+
+    json = [{"id": i, "children": [{"value": i}, {"value": -i}]} for i in range(3_000)]
+    got = unmarshal(json, List[Item])
+    assert len(got) == 3_000
+    assert got[-1] == Item(id=2_999, children=[Child(value=2_999), Child(value=-2_999)])
+
+
+def test_unmarshal_lists_of_simple_values():
+    class Role(enum.Enum):
+        ADMIN = "ADMIN"
+        USER = "USER"
+
+    @dataclass
+    class Item:
+        roles: List[Role] = json_field(case_insensitive=True)
+        created: List[Optional[datetime]]
+        days: List[date] = json_field(epoch="s")
+
+    json = {
+        "roles": ["admin", "USER"],
+        "created": ["2020-06-22T08:55:05", None],
+        "days": [1592784000, 1592870400],
+    }
+    got = unmarshal(json, Item)
+    assert got == Item(
+        roles=[Role.ADMIN, Role.USER],
+        created=[datetime(2020, 6, 22, 8, 55, 5), None],
+        days=[date(2020, 6, 22), date(2020, 6, 23)],
+    )
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal({"roles": [], "created": [], "days": [1592784000, "2020-06-22"]}, Item)
+    assert str(exc_info.value) == (
+        "Unable to use data value '2020-06-22' as epoch timestamp (s) at location = days"
+    )
+
+
+def test_unmarshal_where():
+    class Role(enum.Enum):
+        ADMIN = "ADMIN"
+        USER = "USER"
+
+    @dataclass
+    class User:
+        id: int
+        role: Role
+
+    json = [{"id": 1, "role": "ADMIN"}, {"id": 2, "role": "USER"}, {"id": 3, "role": "INVALID"}]
+    got = unmarshal(json, List[User], where=lambda user: user["role"] == "ADMIN")
+    assert got == [User(1, Role.ADMIN)]
+    # The skipped elements are not unmarshalled
+    assert json[1] == {"id": 2, "role": "USER"}
+
+    assert unmarshal([1, 2, 3], List[int], where=lambda value: value > 1) == [2, 3]
+
+    # Lists decoded into dicts are filtered too
+    got = unmarshal(json, Dict[int, User], index_by="id", where=lambda user: user["role"] == "USER")
+    assert got == {2: User(2, Role.USER)}
+
+
+@pytest.mark.parametrize(
+    "data,schema,want",
+    [
+        ([1, 2, 3], Tuple[int, ...], (2, 3)),
+        ([1, 2, 3], FrozenSet[int], frozenset([2, 3])),
+        ([1, 2, 3], Optional[List[int]], [2, 3]),
+        (None, Optional[List[int]], None),
+    ],
+)
+def test_unmarshal_where_arrays(data, schema, want):
+    assert unmarshal(data, schema, where=lambda value: value > 1) == want
+
+
+@pytest.mark.parametrize("schema", [int, Dict[str, int], Optional[str], Any])
+def test_unmarshal_where_invalid_schema(schema):
+    with pytest.raises(ValueError) as exc_info:
+        unmarshal({"a": 1}, schema, where=lambda value: False)
+    assert str(exc_info.value) == f"The where option requires the schema of a json array, got {schema}"
+
+
+def test_unmarshal_dict():
+    class Color(enum.Enum):
+        RED = "red"
+        BLUE = "blue"
+
+    @dataclass
+    class Tag:
+        name: str
+
+    @dataclass
+    class Item:
+        tags: Dict[str, Tag]
+        counts: Dict[str, int]
+        colors: Dict[date, Optional[Color]]
+        groups: Optional[Dict[int, List[Tag]]]
+        nested: Dict[str, Dict[str, Tag]]
+        scores: Dict[float, Any]
+
+    json = {
+        "tags": {"b": {"name": "x"}, "a": {"name": "y"}},
+        "counts": {"a": 1, "b": 2},
+        "colors": {"2020-06-22": "red", "2020-06-23": None},
+        "groups": {"1": [{"name": "z"}], "2": []},
+        "nested": {"o": {"p": {"name": "q"}}, "e": {}},
+        "scores": {"1.5": {"a": 1}},
+    }
+    got = unmarshal(json, Item)
+    assert got == Item(
+        tags={"b": Tag("x"), "a": Tag("y")},
+        counts={"a": 1, "b": 2},
+        colors={date(2020, 6, 22): Color.RED, date(2020, 6, 23): None},
+        groups={1: [Tag("z")], 2: []},
+        nested={"o": {"p": Tag("q")}, "e": {}},
+        scores={1.5: {"a": 1}},
+    )
+    # The order of the keys is kept
+    assert list(got.tags) == ["b", "a"]
+
+    assert unmarshal({"a": [1]}, Dict) == {"a": [1]}
+    assert unmarshal({}, Dict[str, int]) == {}
+    assert unmarshal(None, Optional[Dict[str, int]]) is None
+    assert unmarshal({"a": "1", "b": 2}, Dict[str, Any]) == {"a": "1", "b": 2}
+
+
+def test_unmarshal_dict_intern():
+    table = InternTable()
+    json = {"a": "".join(["F", "R"]), "b": "".join(["F", "R"])}
+    assert json["a"] is not json["b"]
+    got = unmarshal(json, Dict[str, str], intern=table)
+    assert got["a"] is got["b"]
+
+
+def test_unmarshal_bare_dict():
+    json = {"a": [1, {"b": None}], "c": "d"}
+
+    want = {"a": [1, {"b": None}], "c": "d"}
+    got = unmarshal(json, dict)
+    assert got == want
+
+
+def test_unmarshal_bare_dict_field():
+    @dataclass
+    class Item:
+        name: str
+        meta: dict
+        extra: Optional[dict]
+
+    json = {"name": "a", "meta": {"b": [1, 2], "c": {"d": 1}}, "extra": None}
+
+    want = Item(name="a", meta={"b": [1, 2], "c": {"d": 1}}, extra=None)
+    got = unmarshal(json, Item)
+    assert got == want
+
+
+def test_unmarshal_bare_dict_invalid():
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal([1], dict)
+    want = "Invalid schema. schema = <class 'dict'>, data = '[1]' (<class 'list'>) at location = "
+    assert str(exc_info.value) == want
+
+
+def test_unmarshal_dict_errors():
+    @dataclass
+    class Tag:
+        name: str
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal({"a": 1, "b": "2"}, Dict[str, int])
+    assert str(exc_info.value) == (
+        "Invalid schema. schema = <class 'int'>, data = '2' (<class 'str'>) at location = b"
+    )
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal({"a": {"name": 1}}, Dict[str, Tag])
+    assert str(exc_info.value) == (
+        "Invalid schema. schema = <class 'str'>, data = '1' (<class 'int'>) at location = name"
+    )
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal({"tags": {"one": 1}}, Dict[str, Dict[int, int]])
+    assert str(exc_info.value) == "Unable to use key 'one' as <class 'int'> at location = tags"
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal({"a": 1}, Dict[Tag, int])
+    assert str(exc_info.value) == f"Dict keys of type {Tag} are not supported at location = "
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal("a", Dict[str, int])
+    assert str(exc_info.value) == (
+        "Invalid schema. schema = typing.Dict[str, int], data = 'a' (<class 'str'>) at location = "
+    )
+
+
+def test_unmarshal_tuples_and_sets():
+    @dataclass(frozen=True)
+    class Tag:
+        name: str
+
+    @dataclass
+    class Item:
+        values: Tuple[int, ...]
+        labels: FrozenSet[str]
+        tags: Set[Tag]
+        dates: Optional[Tuple[date, ...]]
+        names: List[str]
+        nested: List[List[Tag]]
+
+    json = {
+        "values": [1, 2],
+        "labels": ["a", "b", "a"],
+        "tags": [{"name": "x"}, {"name": "x"}],
+        "dates": ["2020-06-22"],
+        "names": [],
+        "nested": [[{"name": "y"}], []],
+    }
+    want = Item(
+        values=(1, 2),
+        labels=frozenset({"a", "b"}),
+        tags={Tag("x")},
+        dates=(date(2020, 6, 22),),
+        names=[],
+        nested=[[Tag("y")], []],
+    )
+    got = unmarshal(copy.deepcopy(json), Item)
+    assert got == want
+    assert type(got.labels) is frozenset
+
+    got = unmarshal(copy.deepcopy(json), Item, tuples=True)
+    assert got.names == ()
+    assert got.nested == ((Tag("y"),), ())
+    assert unmarshal([1, "a"], tuple) == (1, "a")
+
+
+def test_unmarshal_tuples_and_sets_errors():
+    @dataclass
+    class Tag:
+        name: str
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal([1, "a"], Tuple[int, str])
+    assert str(exc_info.value) == (
+        "Schema type 'typing.Tuple[int, str]' is not currently supported, "
+        "tuples must be typed as Tuple[X, ...]."
+    )
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal([{"name": "x"}], Set[Tag])
+    assert str(exc_info.value) == "Unable to collect the elements into a set: unhashable type: 'Tag'"
+
+    with pytest.raises(UnmarshalError) as exc_info:
+        unmarshal({"a": 1}, FrozenSet[int])
+    assert str(exc_info.value) == (
+        "Invalid schema. schema = typing.FrozenSet[int], data = '{'a': 1}' (<class 'dict'>) at location = "
+    )
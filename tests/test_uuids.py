@@ -0,0 +1,67 @@
+from uuid import UUID
+
+import pytest
+
+from jsonmarshal.uuids import _uuid_decoder, _uuid_encoder, _validate_uuid_format
+
+VALUE = UUID("cb637f6a-0dc0-4c42-8764-5b98137a8ea6")
+
+
+@pytest.mark.parametrize(
+    "uuid_format,data",
+    [
+        (None, "cb637f6a-0dc0-4c42-8764-5b98137a8ea6"),
+        ("str", "CB637F6A-0DC0-4C42-8764-5B98137A8EA6"),
+        ("str", "{cb637f6a-0dc0-4c42-8764-5b98137a8ea6}"),
+        ("str", "urn:uuid:cb637f6a-0dc0-4c42-8764-5b98137a8ea6"),
+        ("hex", "cb637f6a0dc04c4287645b98137a8ea6"),
+        ("int", 270349904801793539420998303644418477734),
+        ("bytes", b"\xcbc\x7fj\r\xc0LB\x87d[\x98\x13z\x8e\xa6"),
+    ],
+)
+def test_uuid_decoder(uuid_format, data):
+    got = _uuid_decoder(uuid_format)(data)
+    assert got == VALUE
+    assert hash(got) == hash(VALUE)
+    assert str(got) == str(VALUE)
+
+
+@pytest.mark.parametrize(
+    "uuid_format,data",
+    [
+        ("str", "cb637f6a-0dc0-4c42-8764-5b98137a8eag"),
+        ("str", "cb637f6a-0dc0-4c42-8764-+b98137a8ea6"),
+        ("str", 123),
+        ("hex", "cb637f6a-0dc0-4c42-8764-5b98137a8ea6"),
+        ("hex", 123),
+        ("int", "270349904801793539420998303644418477734"),
+        ("int", -1),
+        ("bytes", "cb637f6a0dc04c4287645b98137a8ea6"),
+        ("bytes", b"\xcbc"),
+    ],
+)
+def test_uuid_decoder_invalid(uuid_format, data):
+    with pytest.raises((ValueError, TypeError, AttributeError)):
+        _uuid_decoder(uuid_format)(data)
+
+
+@pytest.mark.parametrize(
+    "uuid_format,want",
+    [
+        (None, "cb637f6a-0dc0-4c42-8764-5b98137a8ea6"),
+        ("hex", "cb637f6a0dc04c4287645b98137a8ea6"),
+        ("int", 270349904801793539420998303644418477734),
+        ("bytes", b"\xcbc\x7fj\r\xc0LB\x87d[\x98\x13z\x8e\xa6"),
+    ],
+)
+def test_uuid_encoder(uuid_format, want):
+    assert _uuid_encoder(uuid_format)(VALUE) == want
+
+
+def test_validate_uuid_format():
+    _validate_uuid_format(None)
+    with pytest.raises(ValueError) as exc_info:
+        _validate_uuid_format("base64")
+    assert (
+        str(exc_info.value) == "Invalid uuid format 'base64', expected one of ['str', 'hex', 'int', 'bytes']"
+    )